@@ -166,9 +166,9 @@ if __name__ == "__main__":
     # _robot = get_robot_from_argv(index=1)
     _robot = None
     import sys
-    import pickle
+    from robot_smach_states.util.people_clustering import load_detections
     import random
-    ppl_dicts = pickle.load(open(sys.argv[2]))
+    ppl_dicts = load_detections(sys.argv[2])
     # ppl_dicts is a list of dicts {'rgb':sensor_msgs/Image, 'person_detection':..., 'map_ps':...}
 
     # Test data
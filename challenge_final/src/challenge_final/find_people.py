@@ -2,7 +2,6 @@
 import datetime
 import math
 import os
-import pickle
 
 import numpy as np
 import time
@@ -17,6 +16,7 @@ from geometry_msgs.msg import PointStamped
 # TU/e Robotics
 import robot_smach_states as states
 import robot_smach_states.util.designators as ds
+from robot_smach_states.util.people_clustering import save_detections
 from robot_skills.util import kdl_conversions
 
 from .clustering import cluster_people
@@ -67,10 +67,9 @@ def _filter_and_cluster_images(robot, raw_person_detections, room_id):
     :return: clusters
     """
     try:
-        with open(os.path.expanduser(
-            '~/floorplan-{}.pickle'.format(datetime.now().strftime("%Y-%m-%d-%H-%M-%S"))
-        ), 'w') as f:
-            pickle.dump(raw_person_detections, f)
+        save_detections(os.path.expanduser(
+            '~/floorplan-{}.npz'.format(datetime.now().strftime("%Y-%m-%d-%H-%M-%S"))
+        ), raw_person_detections)
     except:
         pass
 
@@ -6,7 +6,6 @@
 
 import math
 import os
-import pickle
 import random
 import time
 from collections import deque
@@ -21,6 +20,7 @@ from cv_bridge import CvBridge
 from geometry_msgs.msg import PointStamped
 from robot_skills import Hero
 from robot_skills.util import kdl_conversions
+from robot_smach_states.util.people_clustering import save_detections
 from smach import StateMachine, cb_interface, CBState
 from challenge_find_my_mates.cluster import cluster_people
 
@@ -99,8 +99,8 @@ class LocatePeople(StateMachine):
             global PERSON_DETECTIONS
 
             try:
-                with open(os.path.expanduser('~/floorplan-{}.pickle'.format(datetime.now().strftime("%Y-%m-%d-%H-%M-%S"))), 'w') as f:
-                    pickle.dump(PERSON_DETECTIONS, f)
+                save_detections(os.path.expanduser('~/floorplan-{}.npz'.format(datetime.now().strftime("%Y-%m-%d-%H-%M-%S"))),
+                                PERSON_DETECTIONS)
             except:
                 pass
 
@@ -1,10 +1,10 @@
 import argparse
-import pickle
 import rospy
 import smach
 from challenge_final import FindPeople
 from challenge_final.find_people import _filter_and_cluster_images
 from robot_skills import get_robot
+from robot_smach_states.util.people_clustering import load_detections
 
 
 if __name__ == "__main__":
@@ -22,9 +22,8 @@ if __name__ == "__main__":
     # Test data
     user_data = smach.UserData()
 
-    with open('/home/amigo/Downloads/floorplan-2019-07-05-12-02-17.pickle', 'r') as f:
-        raw_detections = pickle.load(f)
-        rospy.loginfo("Loaded %d persons", len(raw_detections))
+    raw_detections = load_detections('/home/amigo/Downloads/floorplan-2019-07-05-12-02-17.pickle')
+    rospy.loginfo("Loaded %d persons", len(raw_detections))
 
     detected_people = _filter_and_cluster_images(robot, raw_detections, args.room_id)
 
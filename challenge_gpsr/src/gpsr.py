@@ -13,6 +13,7 @@ import hmi
 from action_server import Client as ActionClient
 
 from robot_skills import get_robot
+from robot_skills.util.grammar_cache import get_grammar_cache, grammar_hash
 from robot_smach_states.navigation import NavigateToObserve, NavigateToWaypoint, NavigateToSymbolic
 from robot_smach_states import StartChallengeRobust
 from robot_smach_states.util.designators import EntityByIdDesignator
@@ -27,6 +28,10 @@ class ConversationEngineWithHmi(ConversationEngine):
         client = ActionClient(robot.robot_name)
         super(ConversationEngineWithHmi, self).__init__(client, grammar, command_target, give_examples=False)
 
+        # The sentences recognized by the HMI are parsed again by the conversation engine, reuse the HMI results
+        self._grammar_cache = get_grammar_cache()
+        self._parser = self._grammar_cache.cached_parser(grammar, self._parser)
+
         self.robot = robot
         self.knowledge = knowledge
         self.timeout_count = 0
@@ -109,7 +114,8 @@ class ConversationEngineWithHmi(ConversationEngine):
                     correct = self.heard_correct(sentence)
 
                 if correct:
-                    # Pass the heard sentence to the conv.engine. This parses it again, but fuck efficiency for now
+                    # Pass the heard sentence to the conv.engine, its parser gets the semantics from the cache
+                    self._grammar_cache.store_parse_result(grammar_hash(grammar), target, sentence, semantics)
                     self.user_to_robot_text(sentence)
                     break
             except hmi.TimeoutException as e:
@@ -162,7 +168,8 @@ class ConversationEngineWithHmi(ConversationEngine):
                     correct = self.heard_correct(sentence)
 
                 if correct:
-                    # Pass the heard sentence to the conv.engine. This parses it again, but fuck efficiency for now
+                    # Pass the heard sentence to the conv.engine, its parser gets the semantics from the cache
+                    self._grammar_cache.store_parse_result(grammar_hash(grammar), target, sentence, semantics)
                     self.user_to_robot_text(sentence)
                     rospy.sleep(self._tc_fuckup_time)
                     break
@@ -369,10 +369,7 @@ class RemoveSegmentedEntities(smach.State):
 
         entities = self.robot.ed.get_entities()
 
-        for e in entities:
-            if not e.is_a("furniture") and e.id != '_root':
-                # import ipdb; ipdb.set_trace()
-                self.robot.ed.remove_entity(e.id)
+        self.robot.ed.remove_entities([e.id for e in entities if not e.is_a("furniture") and e.id != '_root'])
 
         return "done"
 
@@ -61,8 +61,9 @@ class StoringGroceries(smach.StateMachine):
                 table_id = closest_workspace.grasp_entity_conf.entity_id
 
                 # Update the world model by fitting the entities to the frame_stamped's given below.
-                robot.ed.update_entity(id=cabinet_id, frame_stamped=closest_workspace.place_entity_conf.pose_estimate)
-                robot.ed.update_entity(id=table_id, frame_stamped=closest_workspace.grasp_entity_conf.pose_estimate)
+                robot.ed.update_entities([
+                    dict(id=cabinet_id, frame_stamped=closest_workspace.place_entity_conf.pose_estimate),
+                    dict(id=table_id, frame_stamped=closest_workspace.grasp_entity_conf.pose_estimate)])
 
                 # Update designators
                 cabinet.id_ = closest_workspace.place_entity_conf.entity_id
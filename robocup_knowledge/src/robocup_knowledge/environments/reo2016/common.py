@@ -1,5 +1,7 @@
 # COMMON KNOWLEDGE FILE REO2016
 
+from robocup_knowledge.knowledge_index import first_by_name, names_by, names_where
+
 female_names = ["Emma", "Olivia", "Sophia", "Isabella", "Ava", "Mia", "Emily", "Abigail", "Madison", "Charlotte"]
 male_names = ["Noah", "Liam", "Mason", "Jacob", "William", "Ethan", "Michael", "Alexander", "James", "Daniel"]
 
@@ -91,16 +93,20 @@ inspect_positions = {
 
 # - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - 
 
+# Lookup tables of the knowledge above, used by the functions below
+_locations_by_name = first_by_name(locations)
+_pick_locations = names_where(locations, lambda loc: loc.get("manipulation") == "yes")
+_place_locations = names_where(locations, lambda loc: loc.get("manipulation") in ["yes", "only_putting"])
+_objects_by_name = first_by_name(objects)
+_object_names_by_category = names_by(objects, "category")
+
+
 def is_location(location):
-    for loc in locations:
-        if loc["name"] == location:
-            return True
-    return False
+    return location in _locations_by_name
 
 def get_room(location):
-    for loc in locations:
-        if loc["name"] == location:
-            return loc["room"]
+    if location in _locations_by_name:
+        return _locations_by_name[location]["room"]
     return None
 
 def get_inspect_areas(location):
@@ -116,16 +122,10 @@ def get_inspect_position(location, area=""):
         return "in_front_of"
 
 def is_pick_location(location):
-    for loc in locations:
-        if loc["name"] == location and loc["manipulation"] == "yes":
-            return True
-    return False
+    return location in _pick_locations
 
 def is_place_location(location):
-    for loc in locations:
-        if loc["name"] == location and (loc["manipulation"] == "yes" or loc["manipulation"] == "only_putting"):
-            return True
-    return False
+    return location in _place_locations
 
 def get_locations(room=None, pick_location=None, place_location=None):
     return [loc["name"] for loc in locations
@@ -134,13 +134,13 @@ def get_locations(room=None, pick_location=None, place_location=None):
                    (place_location == None or is_place_location(loc["name"]))]
 
 def get_objects(category=None):
-    return [obj["name"] for obj in objects 
-                if category == None or category == obj["category"]]
+    if category is None:
+        return [obj["name"] for obj in objects]
+    return list(_object_names_by_category.get(category, []))
 
 def get_object_category(obj):
-    for o in objects:
-        if o["name"] == obj:
-            return o["category"]
+    if obj in _objects_by_name:
+        return _objects_by_name[obj]["category"]
     return None
 
 # Returns (location, area_name)
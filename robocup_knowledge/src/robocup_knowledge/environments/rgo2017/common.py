@@ -1,5 +1,7 @@
 # COMMON KNOWLEDGE FILE RGO2017
 
+from robocup_knowledge.knowledge_index import first_by_name, names_by, names_where
+
 female_names = ["emma","olivia","sophia","ava","isabella","mia","abigail","emily","charlotte","harper"]
 male_names = ["noah","liam","mason","jacob","william","ethan","james","alexander","michael","benjamin"]
 names = female_names + male_names
@@ -151,19 +153,23 @@ def make_prints(name):
 # - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
 
 
+# Lookup tables of the knowledge above, used by the functions below
+_locations_by_name = first_by_name(locations)
+_pick_locations = names_where(locations, lambda loc: loc.get("manipulation") == "yes")
+_place_locations = names_where(locations, lambda loc: loc.get("manipulation") in ["yes", "only_putting"])
+_objects_by_name = first_by_name(objects)
+_object_names_by_category = names_by(objects, "category")
+
+
 def is_location(location):
-    for loc in locations:
-        if loc["name"] == location:
-            return True
-    return False
+    return location in _locations_by_name
 
 
 def get_room(location):
     if location in location_rooms:
         return location
-    for loc in locations:
-        if loc["name"] == location:
-            return loc["room"]
+    if location in _locations_by_name:
+        return _locations_by_name[location]["room"]
     return None
 
 
@@ -182,17 +188,11 @@ def get_inspect_position(location, area=""):
 
 
 def is_pick_location(location):
-    for loc in locations:
-        if loc["name"] == location and loc["manipulation"] == "yes":
-            return True
-    return False
+    return location in _pick_locations
 
 
 def is_place_location(location):
-    for loc in locations:
-        if loc["name"] == location and (loc["manipulation"] == "yes" or loc["manipulation"] == "only_putting"):
-            return True
-    return False
+    return location in _place_locations
 
 
 def get_locations(room=None, pick_location=None, place_location=None):
@@ -203,14 +203,14 @@ def get_locations(room=None, pick_location=None, place_location=None):
 
 
 def get_objects(category=None):
-    return [obj["name"] for obj in objects
-                if category == None or category == obj["category"]]
+    if category is None:
+        return [obj["name"] for obj in objects]
+    return list(_object_names_by_category.get(category, []))
 
 
 def get_object_category(obj):
-    for o in objects:
-        if o["name"] == obj:
-            return o["category"]
+    if obj in _objects_by_name:
+        return _objects_by_name[obj]["category"]
     return None
 
 
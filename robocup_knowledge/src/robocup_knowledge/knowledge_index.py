@@ -0,0 +1,58 @@
+from collections import OrderedDict
+
+# Helpers to build the lookup tables of the common knowledge of the environments. The knowledge is defined as lists of
+# dicts, e.g., locations = [{'name': 'bookcase', 'room': 'livingroom', ...}, ...], which are indexed once at import
+# instead of scanned on every lookup.
+
+
+def first_by_name(items):
+    """
+    Maps the name of each item to the first item with that name
+
+    :param items: list of dicts with a 'name' key
+    :return: dict mapping names to items
+
+    >>> first_by_name([{'name': 'a', 'room': 'x'}, {'name': 'a', 'room': 'y'}])['a']['room']
+    'x'
+    """
+    index = {}
+    for item in items:
+        index.setdefault(item["name"], item)
+    return index
+
+
+def names_where(items, predicate):
+    """
+    Returns the names of all items that satisfy the predicate
+
+    :param items: list of dicts with a 'name' key
+    :param predicate: function that takes an item and returns a bool
+    :return: set with names
+
+    >>> sorted(names_where([{'name': 'a', 'manipulation': 'yes'}, {'name': 'b'}], lambda item: 'manipulation' in item))
+    ['a']
+    """
+    return set(item["name"] for item in items if predicate(item))
+
+
+def names_by(items, key):
+    """
+    Groups the names of the items by the value of key, preserving the order of the items
+
+    :param items: list of dicts with a 'name' key
+    :param key: key to group on. Items without this key are skipped
+    :return: OrderedDict mapping the values of key to lists of names
+
+    >>> names_by([{'name': 'a', 'room': 'x'}, {'name': 'b', 'room': 'y'}, {'name': 'c', 'room': 'x'}], 'room')
+    OrderedDict([('x', ['a', 'c']), ('y', ['b'])])
+    """
+    groups = OrderedDict()
+    for item in items:
+        if key in item:
+            groups.setdefault(item[key], []).append(item["name"])
+    return groups
+
+
+if __name__ == "__main__":
+    import doctest
+    doctest.testmod()
@@ -1,9 +1,43 @@
 from __future__ import print_function
 
+import imp
+import os
+import threading
+
+# Loaded knowledge modules, keyed by path. Values are (modification time, module) tuples
+_knowledge_cache = {}
+_knowledge_cache_lock = threading.RLock()
+
+
+def _load_source(knowledge_item, knowledge_path):
+    """
+    Loads the knowledge module at knowledge_path. Modules are cached as long as the file is not modified
+
+    :param knowledge_item: name of the knowledge module
+    :param knowledge_path: path of the knowledge file
+    :return: the knowledge module
+    """
+    mtime = os.path.getmtime(knowledge_path)
+    # Reentrant: knowledge modules load other knowledge while being loaded
+    with _knowledge_cache_lock:
+        cached = _knowledge_cache.get(knowledge_path)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+
+        knowledge = imp.load_source(knowledge_item, knowledge_path)
+        _knowledge_cache[knowledge_path] = (mtime, knowledge)
+        return knowledge
+
+
+def clear_knowledge_cache():
+    """ Forgets all loaded knowledge, the next load_knowledge call reads the knowledge file again """
+    with _knowledge_cache_lock:
+        _knowledge_cache.clear()
+
+
 # Resolve the environment variable $ROBOT_ENV
 
 def load_knowledge(knowledge_item, print_knowledge=False):
-    import os, imp
     _robot_env = os.environ.get('ROBOT_ENV')
 
     if not _robot_env:
@@ -12,7 +46,7 @@ def load_knowledge(knowledge_item, print_knowledge=False):
     # Look for the correct knowledge file
     try:
         _knowledge_path = os.path.dirname(os.path.realpath(__file__)) + "/environments/%s/%s.py" % (_robot_env, knowledge_item)
-        knowledge = imp.load_source(knowledge_item, _knowledge_path)
+        knowledge = _load_source(knowledge_item, _knowledge_path)
 
         knowledge_attrs = [attr for attr in dir(knowledge) if not callable(attr) and not attr.startswith("__")]
 
@@ -0,0 +1,99 @@
+import imp
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from robocup_knowledge import knowledge_loader
+
+ENVIRONMENTS_PATH = os.path.join(os.path.dirname(os.path.realpath(knowledge_loader.__file__)), "environments")
+
+
+def load_common(environment):
+    """ Loads the common knowledge of an environment under a unique module name """
+    return imp.load_source("common_" + environment, os.path.join(ENVIRONMENTS_PATH, environment, "common.py"))
+
+
+def scan(items, name):
+    """ Reference implementation of the lookups: returns the first item with the name """
+    for item in items:
+        if item["name"] == name:
+            return item
+    return None
+
+
+class TestKnowledgeIndex(unittest.TestCase):
+    def _check(self, environment):
+        """
+        Check that the indexed lookups of an environment return the same answers as scanning the knowledge
+        """
+        common = load_common(environment)
+        if not hasattr(common, "get_object_category"):
+            return
+
+        location_names = [loc["name"] for loc in common.locations]
+        object_names = [obj["name"] for obj in common.objects]
+        rooms = set(getattr(common, "location_rooms", [])) | set(getattr(common, "rooms", []))
+
+        for name in location_names + object_names + ["unknown"]:
+            loc = scan(common.locations, name)
+            self.assertEqual(common.is_location(name), loc is not None)
+            if name not in rooms:
+                self.assertEqual(common.get_room(name), loc["room"] if loc else None)
+            self.assertEqual(common.is_pick_location(name),
+                             any(l["name"] == name and l["manipulation"] == "yes" for l in common.locations))
+            self.assertEqual(common.is_place_location(name),
+                             any(l["name"] == name and l["manipulation"] in ["yes", "only_putting"]
+                                 for l in common.locations))
+
+            obj = scan(common.objects, name)
+            self.assertEqual(common.get_object_category(name), obj["category"] if obj else None)
+            for function, key in [("get_object_color", "color"), ("get_object_size", "volume"),
+                                  ("get_object_weight", "weight")]:
+                if hasattr(common, function) and (obj is None or key in obj):
+                    self.assertEqual(getattr(common, function)(name), obj[key] if obj else None)
+
+        categories = set(obj["category"] for obj in common.objects)
+        for category in list(categories) + [None, "unknown"]:
+            self.assertEqual(common.get_objects(category),
+                             [obj["name"] for obj in common.objects if category is None or obj["category"] == category])
+
+    def test_environments(self):
+        """
+        Check all environments
+        """
+        for environment in sorted(os.listdir(ENVIRONMENTS_PATH)):
+            if os.path.exists(os.path.join(ENVIRONMENTS_PATH, environment, "common.py")):
+                self._check(environment)
+
+
+class TestKnowledgeCache(unittest.TestCase):
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.file = os.path.join(self.path, "knowledge_cache_item.py")
+        with open(self.file, "w") as f:
+            f.write("value = 1\n")
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+        knowledge_loader.clear_knowledge_cache()
+
+    def test_cache(self):
+        """
+        Check that knowledge is only loaded again if the file is modified
+        """
+        knowledge = knowledge_loader._load_source("knowledge_cache_item", self.file)
+        knowledge.value = 2
+        self.assertEqual(knowledge_loader._load_source("knowledge_cache_item", self.file).value, 2)
+
+        # Make sure the modification time differs
+        mtime = os.path.getmtime(self.file) + 1.0
+        with open(self.file, "w") as f:
+            f.write("value = 3\n")
+        os.utime(self.file, (time.time(), mtime))
+        self.assertEqual(knowledge_loader._load_source("knowledge_cache_item", self.file).value, 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
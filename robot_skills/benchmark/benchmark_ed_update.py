@@ -0,0 +1,83 @@
+#! /usr/bin/env python
+
+# System
+import argparse
+import time
+
+# ROS
+import mock
+import rospy
+
+# TU/e Robotics
+from robot_skills.world_model_ed import ED
+
+
+class MockedUpdateService(object):
+    """ Stands in for the ED update service. Counts round-trips and simulates the service latency """
+    def __init__(self, latency):
+        self.latency = latency
+        self.calls = 0
+
+    def __call__(self, request):
+        self.calls += 1
+        time.sleep(self.latency)
+        return True
+
+
+def create_ed(latency):
+    """
+    Creates an ED robot part of which the update service is replaced by a MockedUpdateService. No ROS master is needed.
+
+    :param latency: simulated latency [s] of a single update request
+    :return: tuple with the ED object and the mocked update service
+    """
+    with mock.patch("rospy.get_param", side_effect=lambda name, default=None: default), \
+            mock.patch("rospy.ServiceProxy"), mock.patch("rospy.Publisher"):
+        ed = ED(robot_name="mockbot", tf_listener=mock.MagicMock())
+    update_srv = MockedUpdateService(latency)
+    ed._ed_update_srv = update_srv
+    return ed, update_srv
+
+
+def benchmark(ed, update_srv, entity_count):
+    """
+    Locks and unlocks entity_count entities, once per entity and once batched
+
+    :return: dict with the round-trips and durations of both approaches
+    """
+    ids = ["entity_{}".format(i) for i in range(entity_count)]
+
+    update_srv.calls = 0
+    start = time.time()
+    for eid in ids:
+        ed.update_entity(id=eid, add_flags=['locked'])
+    for eid in ids:
+        ed.update_entity(id=eid, remove_flags=['locked'])
+    single = {"round_trips": update_srv.calls, "duration": time.time() - start}
+
+    update_srv.calls = 0
+    start = time.time()
+    ed.lock_entities(lock_ids=ids, unlock_ids=[])
+    ed.lock_entities(lock_ids=[], unlock_ids=ids)
+    batched = {"round_trips": update_srv.calls, "duration": time.time() - start}
+
+    return single, batched
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare locking entities one by one with the batched update API "
+                                                 "against a mocked ED update service")
+    parser.add_argument("--latency", type=float, default=0.005,
+                        help="Simulated latency [s] of a single update request")
+    parser.add_argument("--counts", type=int, nargs="+", default=[1, 10, 50, 100, 500],
+                        help="Numbers of entities to lock and unlock")
+    args = parser.parse_args()
+
+    ed, update_srv = create_ed(args.latency)
+
+    print("{:>8} {:>14} {:>14} {:>14} {:>14}".format(
+        "entities", "single_trips", "single_time", "batch_trips", "batch_time"))
+    for count in args.counts:
+        single, batched = benchmark(ed, update_srv, count)
+        print("{:>8} {:>14} {:>14.4f} {:>14} {:>14.4f}".format(
+            count, single["round_trips"], single["duration"], batched["round_trips"], batched["duration"]))
@@ -0,0 +1,102 @@
+#! /usr/bin/env python
+
+# System
+import argparse
+import random
+import time
+
+# ROS
+from ed_msgs.msg import EntityInfo, SubVolume, Volume
+from geometry_msgs.msg import Point
+from shape_msgs.msg import SolidPrimitive
+
+# TU/e Robotics
+from robot_skills.util.entity import from_entity_info
+from robot_skills.util.kdl_conversions import VectorStamped
+
+TYPES = ["coke", "fanta", "cabinet", "table", "person"]
+
+PERSON_DATA = """
+name: ''
+age: 30
+emotion: neutral
+gender: 1
+gender_confidence: 0.9
+pointing_pose: ''
+posture: standing
+reliability: 0.8
+shirt_colors: [red, blue, black]
+tags: []
+tagnames: []
+velocity: ''
+position: {x: 0.0, y: 0.0, z: 0.0}
+header: {frame_id: map}
+"""
+
+
+def random_entity_info(index, person_ratio):
+    """ Creates an EntityInfo with a convex hull, an 'on_top_of' volume and, for some entities, person data """
+    e = EntityInfo()
+    e.id = "entity_{}".format(index)
+    e.type = "person" if random.random() < person_ratio else random.choice(TYPES[:-1])
+    e.types = [e.type, "thing"]
+    e.pose.position.x = random.uniform(-5.0, 5.0)
+    e.pose.position.y = random.uniform(-5.0, 5.0)
+    e.pose.orientation.w = 1.0
+    e.has_shape = True
+    e.convex_hull = [Point(x, y, 0.0) for x, y in [(-0.5, -0.5), (0.5, -0.5), (0.5, 0.5), (-0.5, 0.5)]]
+    e.z_min = 0.0
+    e.z_max = 1.0
+
+    subvolume = SubVolume()
+    subvolume.geometry.type = SolidPrimitive.BOX
+    subvolume.geometry.dimensions = [1.0, 1.0, 0.3]
+    subvolume.center_point.point.z = 1.15
+    e.volumes = [Volume(name="on_top_of", subvolumes=[subvolume])]
+
+    if e.type == "person":
+        e.data = PERSON_DATA
+    return e
+
+
+def timed(func, repeat=1):
+    """ Returns the result of func and the mean duration [s] of a call """
+    start = time.time()
+    for _ in range(repeat):
+        result = func()
+    return result, (time.time() - start) / repeat
+
+
+def benchmark(entity_infos, repeat):
+    """
+    Converts the entity infos and applies the common queries on the entities
+
+    :return: dict mapping the name of each step to its duration [s]
+    """
+    entities, convert = timed(lambda: [from_entity_info(e) for e in entity_infos])
+    point = VectorStamped(0.0, 0.0, 1.1, frame_id="/map")
+
+    _, pose = timed(lambda: [e.pose for e in entities], repeat)
+    _, is_a = timed(lambda: [e.is_a("furniture") for e in entities], repeat)
+    _, in_volume = timed(lambda: [e.in_volume(point, "on_top_of") for e in entities], repeat)
+    _, person = timed(lambda: [e.person_properties for e in entities if e.type == "person"])
+    return {"convert": convert, "pose": pose, "is_a": is_a, "in_volume": in_volume, "person": person}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Converts large synthetic lists of EntityInfo messages to Entity "
+                                                 "objects and measures the common queries on the result")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--repeat", type=int, default=10, help="Number of times the queries are repeated")
+    parser.add_argument("--person-ratio", type=float, default=0.1, help="Fraction of the entities that are persons")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+
+    steps = ["convert", "pose", "is_a", "in_volume", "person"]
+    print("{:>8} ".format("entities") + " ".join("{:>14}".format(step + " [ms]") for step in steps))
+    for size in args.sizes:
+        entity_infos = [random_entity_info(i, args.person_ratio) for i in range(size)]
+        result = benchmark(entity_infos, args.repeat)
+        print("{:>8} ".format(size) + " ".join("{:>14.3f}".format(result[step] * 1000) for step in steps))
@@ -0,0 +1,87 @@
+#! /usr/bin/env python
+
+# System
+import argparse
+import random
+import time
+
+# ROS
+import PyKDL as kdl
+
+# TU/e Robotics
+from robot_skills.util.entity import Entity
+from robot_skills.util.geometry import kdl_vectors_to_array, points_in_convex_hull
+from robot_skills.util.shape import RightPrism
+from robot_skills.util.volume import BoxVolume, CompositeBoxVolume
+
+
+def random_cloud(size, extent=2.0):
+    return [kdl.Vector(random.uniform(-extent, extent), random.uniform(-extent, extent), random.uniform(-extent, extent))
+            for _ in range(size)]
+
+
+def is_left_of_line(p, a, b):
+    """ Per point reference implementation, see robot_smach_states.util.geometry_helpers.isLeftOfLine """
+    return (b.x() - a.x()) * (p.y() - a.y()) - (b.y() - a.y()) * (p.x() - a.x()) > 0
+
+
+def is_point_inside_hull(p, hull):
+    """ Per point reference implementation, see robot_smach_states.util.geometry_helpers.isPointInsideHull """
+    return all(is_left_of_line(p, hull[i], hull[(i + 1) % len(hull)]) for i in range(len(hull)))
+
+
+def timed(func, repeat):
+    """ Returns the result of func and the mean duration [s] of a call """
+    start = time.time()
+    for _ in range(repeat):
+        result = func()
+    return result, (time.time() - start) / repeat
+
+
+def entities_in_volume_mask(entity, entities, volume_id):
+    """ Returns for all entities whether they are in the volume of entity, using the batch check """
+    inside = set(e.id for e in entity.entities_in_volume(entities, volume_id))
+    return [e.id in inside for e in entities]
+
+
+def report(name, size, per_point, batch):
+    print("{:<24} {:>8} {:>14.1f} {:>14.1f} {:>8.1f}x".format(
+        name, size, size / per_point[1], size / batch[1], per_point[1] / batch[1]))
+    assert list(per_point[0]) == list(batch[0]), "{}: results differ".format(name)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare the throughput (points per second) of the per point and "
+                                                 "batch point-in-volume/point-in-hull checks on synthetic clouds")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    box = BoxVolume(kdl.Vector(-1, -1, -1), kdl.Vector(1, 1, 1))
+    composite = CompositeBoxVolume([(kdl.Vector(-1.0 + 0.4 * i, -1, -1), kdl.Vector(-0.6 + 0.4 * i, 1, 1))
+                                    for i in range(5)])
+    hull = [kdl.Vector(1, 0, 0), kdl.Vector(0.5, 0.87, 0), kdl.Vector(-0.5, 0.87, 0), kdl.Vector(-1, 0, 0),
+            kdl.Vector(-0.5, -0.87, 0), kdl.Vector(0.5, -0.87, 0)]
+    prism = RightPrism(hull, z_min=-1, z_max=1)
+    table = Entity("table", "table", "/map", kdl.Frame(kdl.Rotation.RPY(0, 0, 0.3), kdl.Vector(0.2, 0.1, 0)), prism,
+                   {"on_top_of": box}, [], 0)
+
+    print("{:<24} {:>8} {:>14} {:>14} {:>9}".format("check", "points", "per_point/s", "batch/s", "speedup"))
+    for size in args.sizes:
+        cloud = random_cloud(size)
+        array = kdl_vectors_to_array(cloud)
+        entities = [Entity(str(i), "", "/map", kdl.Frame(p), None, {}, [], 0) for i, p in enumerate(cloud)]
+
+        report("BoxVolume", size,
+               timed(lambda: [box.contains(p) for p in cloud], args.repeat),
+               timed(lambda: box.contains_points(array), args.repeat))
+        report("CompositeBoxVolume", size,
+               timed(lambda: [composite.contains(p) for p in cloud], args.repeat),
+               timed(lambda: composite.contains_points(array), args.repeat))
+        report("convex hull", size,
+               timed(lambda: [is_point_inside_hull(p, hull) for p in cloud], args.repeat),
+               timed(lambda: points_in_convex_hull(array, hull), args.repeat))
+        report("Entity in volume", size,
+               timed(lambda: [table.in_volume(e.pose.extractVectorStamped(), "on_top_of") for e in entities],
+                     args.repeat),
+               timed(lambda: entities_in_volume_mask(table, entities, "on_top_of"), args.repeat))
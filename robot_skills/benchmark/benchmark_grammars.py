@@ -0,0 +1,96 @@
+#! /usr/bin/env python
+
+# System
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+# ROS
+from grammar_parser.cfgparser import CFGParser
+
+# TU/e Robotics
+from robocup_knowledge import knowledge_loader
+from robot_skills.util.grammar_cache import GrammarCache
+
+
+def challenge_grammars(environment):
+    """
+    Finds the grammars in the challenge knowledge of an environment
+
+    :param environment: (str) name of the environment
+    :return: list of (name, grammar, target) tuples
+    """
+    os.environ["ROBOT_ENV"] = environment
+    path = os.path.join(os.path.dirname(os.path.realpath(knowledge_loader.__file__)), "environments", environment)
+    grammars = []
+    for file_name in sorted(os.listdir(path)):
+        if not file_name.startswith("challenge_") or not file_name.endswith(".py"):
+            continue
+        try:
+            knowledge = knowledge_loader.load_knowledge(file_name[:-len(".py")])
+        except RuntimeError as e:
+            print("Skipping {}: {}".format(file_name, e))
+            continue
+        for attr in sorted(dir(knowledge)):
+            value = getattr(knowledge, attr)
+            if attr.endswith("grammar") and isinstance(value, str) and "->" in value:
+                target = getattr(knowledge, attr + "_target", "T")
+                grammars.append(("{}.{}".format(file_name[:-len(".py")], attr), value, target))
+    return grammars
+
+
+def timed(func, repeat=1):
+    """ Returns the result of func and the mean duration [s] of a call """
+    start = time.time()
+    for _ in range(repeat):
+        result = func()
+    return result, (time.time() - start) / repeat
+
+
+def benchmark(grammar, target, sentences, cache_dir):
+    """
+    Measures loading the grammar and parsing sentences, with and without the grammar cache
+
+    :return: dict mapping the name of each step to its duration [s]
+    """
+    _, parse_grammar = timed(lambda: CFGParser.fromstring(grammar))
+
+    # Store the parser on disk, then load it in a fresh cache as a new process would
+    GrammarCache(cache_dir=cache_dir).get_parser(grammar)
+    cache = GrammarCache(cache_dir=cache_dir)
+    parser, load_cached = timed(lambda: cache.get_parser(grammar))
+
+    sentences = [parser.get_random_sentence(target) for _ in range(sentences)]
+    _, parse = timed(lambda: [parser.parse(target, sentence) for sentence in sentences])
+    cache.max_parses = len(sentences)
+    _, parse_cached = timed(lambda: [cache.parse(grammar, target, sentence) for sentence in sentences])
+    _, parse_cached_again = timed(lambda: [cache.parse(grammar, target, sentence) for sentence in sentences])
+
+    count = float(len(sentences))
+    return {"size": len(grammar),
+            "parse_grammar": parse_grammar,
+            "load_cached": load_cached,
+            "parse": parse / count,
+            "parse_cached": parse_cached / count,
+            "parse_cached_again": parse_cached_again / count}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measures loading the challenge grammars and parsing sentences, "
+                                                 "with and without the grammar cache")
+    parser.add_argument("--environment", default=os.environ.get("ROBOT_ENV", "robotics_testlabs"))
+    parser.add_argument("--sentences", type=int, default=100, help="Number of random sentences parsed per grammar")
+    args = parser.parse_args()
+
+    cache_dir = tempfile.mkdtemp()
+    try:
+        steps = ["parse_grammar", "load_cached", "parse", "parse_cached", "parse_cached_again"]
+        print("{:<48} {:>8} ".format("grammar", "size") + " ".join("{:>20}".format(step + " [ms]") for step in steps))
+        for name, grammar, target in challenge_grammars(args.environment):
+            result = benchmark(grammar, target, args.sentences, cache_dir)
+            print("{:<48} {:>8} ".format(name, result["size"]) +
+                  " ".join("{:>20.3f}".format(result[step] * 1000) for step in steps))
+    finally:
+        shutil.rmtree(cache_dir)
@@ -0,0 +1,81 @@
+#! /usr/bin/env python
+
+# System
+import argparse
+from collections import defaultdict
+import random
+import time
+
+# ROS
+import PyKDL as kdl
+
+# TU/e Robotics
+from robot_skills.mockbot import ED, MockedTfListener
+from robot_skills.util.kdl_conversions import VectorStamped
+
+TYPES = ("table", "cabinet", "coke", "fanta", "person")
+
+
+def linear_get_entities(ed, type="", center_point=VectorStamped(), radius=0, id="", ignore_z=False):
+    """ Answers a query like the mocked ED did before it had an index: copy all entities and filter them """
+    entities = defaultdict(ED.generate_random_entity, ed._dynamic_entities.items() + ed._static_entities.items())
+    entities = entities.values()
+    if type:
+        entities = [e for e in entities if e.is_a(type)]
+    if radius:
+        if ignore_z:
+            entities = [e for e in entities if e.distance_to_2d(center_point.vector) <= radius]
+        else:
+            entities = [e for e in entities if e.distance_to_3d(center_point.vector) <= radius]
+    if id:
+        entities = [e for e in entities if e.id == id]
+    return entities
+
+
+def random_queries(count, world_size, size, seed):
+    """ Returns a mix of id, type and radius queries as keyword arguments of get_entities """
+    rng = random.Random(seed)
+    queries = []
+    for _ in range(count):
+        kind = rng.choice(["id", "type", "radius"])
+        if kind == "id":
+            queries.append({"id": "{}_{}".format(rng.choice(TYPES), rng.randrange(world_size))})
+        elif kind == "type":
+            queries.append({"type": rng.choice(TYPES)})
+        else:
+            center = kdl.Vector(rng.uniform(0, size[0]), rng.uniform(0, size[1]), 0.0)
+            queries.append({"center_point": VectorStamped(vector=center), "radius": rng.uniform(0.5, 3.0),
+                            "ignore_z": True})
+    return queries
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measures the query time of the mocked ED for large synthetic worlds")
+    parser.add_argument("--world-sizes", type=int, nargs="+", default=[100, 1000, 5000])
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--size", type=float, nargs=2, default=[20.0, 20.0], help="Size [m] of the world")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print("{:>10} {:>14} {:>14} {:>14}".format("entities", "populate [ms]", "linear [ms]", "indexed [ms]"))
+    for world_size in args.world_sizes:
+        ed = ED("mockbot", MockedTfListener())
+        start = time.time()
+        ed.populate(world_size, seed=args.seed, size=args.size, types=TYPES)
+        populate_time = time.time() - start
+
+        queries = random_queries(args.queries, world_size, args.size, args.seed)
+
+        start = time.time()
+        for query in queries:
+            linear_get_entities(ed, **query)
+        linear_time = (time.time() - start) / len(queries)
+
+        start = time.time()
+        for query in queries:
+            ed.get_entities(**query)
+        indexed_time = (time.time() - start) / len(queries)
+
+        print("{:>10} {:>14.1f} {:>14.3f} {:>14.3f}".format(
+            world_size, populate_time * 1000, linear_time * 1000, indexed_time * 1000))
+        print("{:>10} {}".format("", dict(ed.statistics)))
@@ -0,0 +1,126 @@
+#! /usr/bin/env python
+
+# System
+import argparse
+import math
+import random
+import time
+
+# ROS
+from geometry_msgs.msg import Point, Pose, PoseStamped
+import PyKDL as kdl
+
+# TU/e Robotics
+from robot_skills.util.entity import Entity
+from robot_skills.util.kdl_conversions import VectorStamped
+from robot_skills.util.plan import Plan
+from robot_skills.util.volume import BoxVolume
+
+
+def random_plan(size, step=0.05, seed=0):
+    """ Returns a plan of pose messages that wanders around, like a global plan with a resolution of step [m] """
+    rng = random.Random(seed)
+    poses = []
+    x, y, yaw = 0.0, 0.0, 0.0
+    for _ in range(size):
+        poses.append(PoseStamped(pose=Pose(position=Point(x, y, 0.0))))
+        yaw += rng.uniform(-0.2, 0.2)
+        x, y = x + step * math.cos(yaw), y + step * math.sin(yaw)
+    for pose in poses:
+        pose.header.frame_id = "/map"
+    return poses
+
+
+def create_rooms(plan, size):
+    """ Returns a grid of room entities of size x size [m] that covers the plan """
+    xs = [p.pose.position.x for p in plan]
+    ys = [p.pose.position.y for p in plan]
+    box = BoxVolume(kdl.Vector(0, 0, -1), kdl.Vector(size, size, 3))
+    rooms = []
+    for i in range(int(math.floor(min(xs) / size)), int(math.ceil(max(xs) / size))):
+        for j in range(int(math.floor(min(ys) / size)), int(math.ceil(max(ys) / size))):
+            rooms.append(Entity("room_{}_{}".format(i, j), "room", "/map", kdl.Frame(kdl.Vector(i * size, j * size, 0)),
+                                None, {"in": box}, [], 0))
+    return rooms
+
+
+def path_length(path):
+    """ Per pose reference implementation, as robot_skills.base.computePathLength did """
+    distance = 0.0
+    for index in range(1, len(path)):
+        dx = path[index].pose.position.x - path[index - 1].pose.position.x
+        dy = path[index].pose.position.y - path[index - 1].pose.position.y
+        distance += math.sqrt(dx * dx + dy * dy)
+    return distance
+
+
+def room_labels(rooms, path):
+    """ Per pose reference implementation of the room labelling, see give_directions.get_room """
+    labels = []
+    for pose in path:
+        point = VectorStamped(pose.pose.position.x, pose.pose.position.y, pose.pose.position.z, "/map")
+        labels.append(next((i for i, room in enumerate(rooms) if room.in_volume(point, "in")), -1))
+    return labels
+
+
+def interpolate(waypoints, res):
+    """ Per segment reference implementation of the breadcrumb interpolation of FollowOperator """
+    points = []
+    for previous, current in zip(waypoints[:-1], waypoints[1:]):
+        dx, dy = current[0] - previous[0], current[1] - previous[1]
+        length = math.hypot(dx, dy)
+        for i in range(int(length / res)):
+            points.append((previous[0] + i * dx / length * res, previous[1] + i * dy / length * res))
+    return points
+
+
+def timed(func, repeat):
+    """ Returns the result of func and the mean duration [s] of a call """
+    start = time.time()
+    for _ in range(repeat):
+        result = func()
+    return result, (time.time() - start) / repeat
+
+
+def report(name, size, reference, vectorized):
+    print("{:<16} {:>8} {:>14.2f} {:>14.2f} {:>8.1f}x".format(
+        name, size, reference[1] * 1000, vectorized[1] * 1000, reference[1] / vectorized[1]))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare the per pose plan processing with the vectorized Plan "
+                                                 "utilities on synthetic plans")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--room-size", type=float, default=4.0, help="Size [m] of the rooms in the grid")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print("{:<16} {:>8} {:>14} {:>14} {:>9}".format("operation", "poses", "per pose [ms]", "vectorized [ms]",
+                                                     "speedup"))
+    for size in args.sizes:
+        path = random_plan(size)
+        rooms = create_rooms(path, args.room_size)
+
+        reference = timed(lambda: path_length(path), args.repeat)
+        vectorized = timed(lambda: Plan.from_pose_stamped_msgs(path).length, args.repeat)
+        assert abs(reference[0] - vectorized[0]) < 1e-6
+        report("length", size, reference, vectorized)
+
+        plan = Plan.from_pose_stamped_msgs(path)
+        reference = timed(lambda: room_labels(rooms, path), 1)
+        vectorized = timed(lambda: plan.room_indices(rooms), args.repeat)
+        assert reference[0] == vectorized[0].tolist()
+        report("rooms ({})".format(len(rooms)), size, reference, vectorized)
+
+        waypoints = plan.points[::20, :2].tolist()
+        reference = timed(lambda: interpolate(waypoints, 0.05), args.repeat)
+        vectorized = timed(lambda: Plan(plan.points[::20]).resample(0.05), args.repeat)
+        report("resample", size, reference, vectorized)
+
+        queries = plan.points[::100]
+        reference = timed(lambda: [min(range(size), key=lambda i: (plan.points[i][0] - q[0]) ** 2 +
+                                                                   (plan.points[i][1] - q[1]) ** 2)
+                                   for q in queries], 1)
+        vectorized = timed(lambda: plan.nearest_many(queries), args.repeat)
+        assert reference[0] == vectorized[0][0].tolist()
+        report("nearest ({})".format(len(queries)), size, reference, vectorized)
@@ -0,0 +1,116 @@
+#! /usr/bin/env python
+
+# System
+import argparse
+from threading import Event, Lock, Thread
+import time
+
+# ROS
+import mock
+import rospy
+from sensor_msgs.msg import CameraInfo, Image
+
+# TU/e Robotics
+from robot_skills.perception import Perception
+
+
+class SimulatedCamera(object):
+    """ Stands in for message_filters: publishes synchronized rgb, depth and camera info messages at a fixed rate to
+    all registered synchronizers. Creating a subscriber costs 'subscribe_latency' seconds """
+    def __init__(self, rate, subscribe_latency):
+        self._period = 1.0 / rate
+        self._subscribe_latency = subscribe_latency
+        self._synchronizers = []
+        self._lock = Lock()
+        self._running = True
+        self._thread = Thread(target=self._publish)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def Subscriber(self, topic, msg_type):
+        time.sleep(self._subscribe_latency)
+        return mock.MagicMock()
+
+    def ApproximateTimeSynchronizer(self, subscribers, queue_size, slop):
+        synchronizer = mock.MagicMock()
+        synchronizer.callbacks = {}
+        synchronizer.registerCallback = lambda cb: synchronizer.callbacks.update({len(synchronizer.callbacks): cb})
+        with self._lock:
+            self._synchronizers.append(synchronizer)
+        return synchronizer
+
+    def stop(self):
+        self._running = False
+        self._thread.join()
+
+    def _publish(self):
+        while self._running:
+            rgb, depth, info = Image(), Image(), CameraInfo()
+            rgb.header.stamp = rospy.Time.now()
+            with self._lock:
+                callbacks = [cb for synchronizer in self._synchronizers for cb in synchronizer.callbacks.values()]
+            for callback in callbacks:
+                callback(rgb, depth, info)
+            time.sleep(self._period)
+
+
+def per_call_rgb_depth_caminfo(camera, timeout=5):
+    """ Reference implementation: subscribe, wait for the first synchronized triple and unsubscribe on every call """
+    event = Event()
+    image_data = []
+
+    def callback(rgb, depth, depth_info):
+        image_data.append((rgb, depth, depth_info))
+        event.set()
+
+    subscribers = [camera.Subscriber(topic, msg_type) for topic, msg_type in
+                   [("rgb/image_raw", Image), ("depth_registered/image", Image),
+                    ("depth_registered/camera_info", CameraInfo)]]
+    ts = camera.ApproximateTimeSynchronizer(subscribers, queue_size=1, slop=10)
+    ts.registerCallback(callback)
+    event.wait(timeout)
+    ts.callbacks.clear()
+    return image_data[0] if image_data else None
+
+
+def create_perception(camera):
+    """ Creates a Perception robot part of which message_filters is replaced by the camera. No ROS master is needed """
+    with mock.patch("rospy.get_param", side_effect=lambda name, default=None: default), \
+            mock.patch("rospy.ServiceProxy"):
+        perception = Perception(robot_name="mockbot", tf_listener=mock.MagicMock())
+    return perception
+
+
+def measure(func, calls):
+    """ Returns the mean and maximum latency [s] of func over a number of calls, all calls must return images """
+    latencies = []
+    for _ in range(calls):
+        start = time.time()
+        assert func() is not None, "No images received"
+        latencies.append(time.time() - start)
+    return sum(latencies) / len(latencies), max(latencies)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare the latency of per call subscribing against the persistent "
+                                                 "rgbd buffer of Perception with a simulated camera")
+    parser.add_argument("--rate", type=float, default=30.0, help="Camera frame rate [Hz]")
+    parser.add_argument("--subscribe-latency", type=float, default=0.05,
+                        help="Simulated duration of creating one subscriber [s]")
+    parser.add_argument("--calls", type=int, default=20)
+    args = parser.parse_args()
+
+    # Use wall time as ROS time
+    rospy.rostime.set_rostime_initialized(True)
+
+    camera = SimulatedCamera(args.rate, args.subscribe_latency)
+    with mock.patch("robot_skills.perception.message_filters", camera):
+        perception = create_perception(camera)
+        results = [("per call", measure(lambda: per_call_rgb_depth_caminfo(camera), args.calls)),
+                   ("buffer, fresh", measure(perception.get_rgb_depth_caminfo, args.calls)),
+                   ("buffer, latest", measure(perception.get_latest_rgb_depth_caminfo, args.calls))]
+    camera.stop()
+
+    print("{:<16} {:>12} {:>12}".format("method", "mean [s]", "max [s]"))
+    for name, (mean, maximum) in results:
+        print("{:<16} {:>12.4f} {:>12.4f}".format(name, mean, maximum))
@@ -17,6 +17,7 @@ from tue_manipulation_msgs.msg import GripperCommandGoal, GripperCommandAction
 from tue_msgs.msg import GripperCommand
 
 from robot_skills.robot_part import RobotPart
+from robot_skills.util.motion_monitor import MotionMonitor
 
 # Constants for arm requirements. Note that "don't care at all" is not here, as
 # it can be expressed by not imposing a requirement (set it to None).
@@ -359,6 +360,9 @@ class Arm(RobotPart):
 
         self._operational = True  # In simulation, there will be no hardware cb
 
+        # Signalled by the done callbacks of the grasp precompute and joint trajectory action clients
+        self._motion = MotionMonitor()
+
         # Get stuff from the parameter server
         offset = self.load_param('skills/arm/' + self.side + '/grasp_offset/')
         self.offset = kdl.Frame(kdl.Rotation.RPY(offset["roll"], offset["pitch"], offset["yaw"]),
@@ -463,6 +467,18 @@ class Arm(RobotPart):
         """
         self._ac_grasp_precompute.cancel_all_goals()
         self._ac_joint_traj.cancel_all_goals()
+        self._motion.cancel()
+
+    @property
+    def dead_times(self):
+        """ DeadTimeHistogram of the time between the end of a motion and a waiting caller continuing """
+        return self._motion.dead_times
+
+    def _motion_done_callback(self, key):
+        """ Returns a done callback for an action client that signals the end of the motion to the waiters """
+        def done_cb(terminal_state, result):
+            self._motion.set_done(key, succeeded=terminal_state == GoalStatus.SUCCEEDED)
+        return done_cb
 
     def close(self):
         """
@@ -558,13 +574,16 @@ class Arm(RobotPart):
 
         # Send goal:
 
+        self._motion.start("grasp_precompute")
         if timeout == 0.0:
-            self._ac_grasp_precompute.send_goal(grasp_precompute_goal)
+            self._ac_grasp_precompute.send_goal(grasp_precompute_goal,
+                                                done_cb=self._motion_done_callback("grasp_precompute"))
             return True
         else:
             result = self._ac_grasp_precompute.send_goal_and_wait(
                 grasp_precompute_goal,
                 execute_timeout=rospy.Duration(timeout))
+            self._motion.set_done("grasp_precompute", succeeded=result == GoalStatus.SUCCEEDED)
             if result == GoalStatus.SUCCEEDED:
 
                 result_pose = self.tf_listener.lookupTransform(self.robot_name + "/base_link",
@@ -787,7 +806,7 @@ class Arm(RobotPart):
                                         # goals probably won't make it. This sleep makes sure the
                                         # goals will always arrive in different update hooks in the
                                         # hardware TrajectoryActionLib server.
-        self._ac_joint_traj.send_goal(goal)
+        self._send_joint_trajectory_goal(goal)
         if timeout != rospy.Duration(0):
             done = self._ac_joint_traj.wait_for_result(timeout*len(joints_references))
             if not done:
@@ -796,6 +815,15 @@ class Arm(RobotPart):
         else:
             return False
 
+    def _send_joint_trajectory_goal(self, goal):
+        """
+        Sends a goal to the joint trajectory action server, wait_for_motion_done waits until it is done
+
+        :param goal: FollowJointTrajectoryGoal
+        """
+        self._motion.start("joint_trajectory")
+        self._ac_joint_traj.send_goal(goal, done_cb=self._motion_done_callback("joint_trajectory"))
+
     def wait_for_motion_done(self, timeout=10.0, cancel=False):
         """
         Waits until all action clients are done
@@ -805,35 +833,15 @@ class Arm(RobotPart):
             if timeout is exceeded
         :return: bool indicates whether motion was done (True if reached, False otherwise)
         """
-        # rospy.loginfo('Waiting for ac_joint_traj')
-        starttime = rospy.Time.now()
-        if self._ac_joint_traj.gh:
-            if not self._ac_joint_traj.wait_for_result(rospy.Duration(timeout)):
-                if cancel:
-                    rospy.loginfo("Arms: cancelling all goals (1)")
-                    self.cancel_goals()
-
-        passed_time = (rospy.Time.now() - starttime).to_sec()
-        if passed_time > timeout:
-            return False
-
-        # rospy.loginfo('Waiting for ac_grasp_precompute')
-        if self._ac_grasp_precompute.gh:
-            if not self._ac_grasp_precompute.wait_for_result(rospy.Duration(timeout-passed_time)):
-                if cancel:
-                    rospy.loginfo("Arms: cancelling all goals (2)")
-                    self.cancel_goals()
-
-        passed_time = (rospy.Time.now() - starttime).to_sec()
-        if passed_time > timeout:
-            return False
-
-        # rospy.loginfo('Waiting for ac_gripper')
-        if self._ac_gripper.gh:
-            rospy.logdebug('Not waiting for gripper action')
-            # return self._ac_gripper.wait_for_result(rospy.Duration(timeout - passed_time))
+        # The gripper action is not waited for
+        if self._motion.wait(timeout):
             return True
 
+        if cancel:
+            rospy.loginfo("Arms: cancelling all goals")
+            self.cancel_goals()
+        return False
+
     @property
     def object_in_gripper_measurement(self):
         """
@@ -932,14 +940,14 @@ class ForceSensingArm(Arm):
         # Fill with required joint names (desired in hardware / gazebo impl)
         current_joint_state = self.get_joint_states()
         current_joint_state['arm_lift_joint'] = 0
-        self._ac_joint_traj.send_goal(self._make_goal(current_joint_state, timeout))
+        self._send_joint_trajectory_goal(self._make_goal(current_joint_state, timeout))
 
         self.force_sensor.wait_for_edge_up(timeout)
         self.cancel_goals()
 
         current_joint_state = self.get_joint_states()
         current_joint_state['arm_lift_joint'] += retract_distance
-        self._ac_joint_traj.send_goal(self._make_goal(current_joint_state, 0.5))
+        self._send_joint_trajectory_goal(self._make_goal(current_joint_state, 0.5))
 
     def _make_goal(self, current_joint_state, timeout):
         positions = [current_joint_state[n] for n in self.joint_names]
@@ -4,7 +4,6 @@
 #
 
 # System
-import math
 from numpy import sign
 
 # ROS
@@ -16,9 +15,10 @@ import tf
 # TU/e Robotics
 from cb_base_navigation_msgs.msg import LocalPlannerAction, OrientationConstraint, PositionConstraint, LocalPlannerGoal
 from cb_base_navigation_msgs.srv import GetPlan, CheckPlan
-from robot_skills.robot_part import RobotPart
+from robot_skills.robot_part import RobotPart, wait_concurrently
 from robot_skills.util.kdl_conversions import kdl_frame_stamped_from_pose_stamped_msg
 from robot_skills.util import nav_analyzer, transformations
+from robot_skills.util.plan import Plan
 
 
 class LocalPlanner(RobotPart):
@@ -38,6 +38,27 @@ class LocalPlanner(RobotPart):
         self._plan = None
         self._goal_handle = None
 
+        # Called with the new status when the status changes, e.g. to wake up the loops of the navigation states
+        self._status_listeners = []
+
+    def add_status_listener(self, callback):
+        """
+        Adds a function that is called with the new status whenever the status changes. It is called from the thread
+        that changes the status, e.g. the thread of the action client callbacks.
+
+        :param callback: function accepting the status (str)
+        """
+        self._status_listeners.append(callback)
+
+    def remove_status_listener(self, callback):
+        """
+        Removes a function added with add_status_listener
+
+        :param callback: function to remove
+        """
+        if callback in self._status_listeners:
+            self._status_listeners.remove(callback)
+
     def setPlan(self, plan, position_constraint, orientation_constraint):
         goal = LocalPlannerGoal()
         goal.plan = plan
@@ -87,10 +108,15 @@ class LocalPlanner(RobotPart):
         self.__setState("arrived")
 
     def __setState(self, status, obstacle_point=None, dtg=None, plan=None):
+        changed = status != self._status
         self._status = status
+        self.analyzer.set_blocked(status == "blocked")
         self._obstacle_point = obstacle_point
         self._dtg = dtg
         self._plan = plan
+        if changed:
+            for callback in list(self._status_listeners):
+                callback(status)
 
 
 class GlobalPlanner(RobotPart):
@@ -113,6 +139,7 @@ class GlobalPlanner(RobotPart):
 
         pcs = [position_constraint]
 
+        self.analyzer.count_plan()
         start_time = rospy.Time.now()
 
         try:
@@ -141,18 +168,42 @@ class GlobalPlanner(RobotPart):
 
         return resp.valid
 
+    def checkPoints(self, points, time_budget=None):
+        """
+        Checks the validity of many poses with as few service calls as possible. A range of poses is checked in a
+        single call and only split in halves if it is blocked, hence the number of calls grows with the number of
+        blocked stretches instead of with the number of poses.
+
+        :param points: list(PoseStamped) with the poses to check
+        :param time_budget: (float) maximum duration [s] of the check. Poses that have not been checked when the
+            budget is exceeded are considered invalid. If None, all poses are checked.
+        :return: list(bool) with the validity of each pose
+        """
+        valid = [False] * len(points)
+        deadline = None if time_budget is None else rospy.Time.now() + rospy.Duration(time_budget)
+
+        # Stack of (begin, end) index ranges that still need to be checked
+        ranges = [(0, len(points))] if points else []
+        while ranges:
+            if deadline is not None and rospy.Time.now() > deadline:
+                rospy.logwarn("checkPoints exceeded its time budget of {} seconds, {} ranges not checked".format(
+                    time_budget, len(ranges)))
+                break
+
+            begin, end = ranges.pop()
+            if self.checkPlan(points[begin:end]):
+                valid[begin:end] = [True] * (end - begin)
+            elif end - begin > 1:
+                middle = (begin + end) // 2
+                ranges += [(middle, end), (begin, middle)]
+
+        return valid
+
     def getCurrentPositionConstraint(self):
         return self._position_constraint
 
     def computePathLength(self, path):
-        #rospy.logwarn("Please use the other computepathlength")
-        distance = 0.0
-        for index, pose in enumerate(path):
-            if not index == 0:
-                dx = path[index].pose.position.x - path[index-1].pose.position.x
-                dy = path[index].pose.position.y - path[index-1].pose.position.y
-                distance += math.sqrt( dx*dx + dy*dy)
-        return distance
+        return computePathLength(path)
 
 
 class Base(RobotPart):
@@ -182,9 +233,11 @@ class Base(RobotPart):
             multiple robot parts in a loop
         :return: bool indicating whether all connections are connected
         """
-        return self.global_planner.wait_for_connections(
-            timeout=timeout, log_failing_connections=log_failing_connections) and \
-            self.local_planner.wait_for_connections(timeout=timeout, log_failing_connections=log_failing_connections)
+        durations = wait_concurrently(
+            {name: lambda t, part=part: part.wait_for_connections(t, log_failing_connections=log_failing_connections)
+             for name, part in [("global_planner", self.global_planner), ("local_planner", self.local_planner)]},
+            timeout)
+        return all(duration is not None for duration in durations.values())
 
     def move(self, position_constraint_string, frame):
         p = PositionConstraint()
@@ -367,10 +420,10 @@ def get_location(robot_name, tf_listener):
 
 
 def computePathLength(path):
-    distance = 0.0
-    for index, pose in enumerate(path):
-        if not index == 0:
-            dx = path[index].pose.position.x - path[index-1].pose.position.x
-            dy = path[index].pose.position.y - path[index-1].pose.position.y
-            distance += math.sqrt(dx*dx + dy*dy)
-    return distance
+    """
+    Computes the length of a plan in x and y
+
+    :param path: list(PoseStamped) as returned by the global planner
+    :return: (float) length [m]
+    """
+    return Plan.from_pose_stamped_msgs(path).length
@@ -6,6 +6,7 @@ from head_ref_msgs.msg import HeadReferenceAction, HeadReferenceGoal
 # TU/e Robotics
 from robot_skills.robot_part import RobotPart
 from robot_skills.util.kdl_conversions import kdl_vector_stamped_to_point_stamped, VectorStamped
+from robot_skills.util.motion_monitor import MotionMonitor
 
 
 class Head(RobotPart):
@@ -16,8 +17,17 @@ class Head(RobotPart):
         self._goal = None
         self._at_setpoint = False
 
+        # Signalled when the head reaches its setpoint, waiters are woken up by the feedback callback
+        self._motion = MotionMonitor()
+        self._settle_time = self.load_param('skills/head/settle_time', 0.3)
+
         self.subscribe_hardware_status('head')
 
+    @property
+    def dead_times(self):
+        """ DeadTimeHistogram of the time between reaching the setpoint and a waiting caller continuing """
+        return self._motion.dead_times
+
     def close(self):
         self._ac_head_ref_action.cancel_all_goals()
 
@@ -84,18 +94,22 @@ class Head(RobotPart):
         self._ac_head_ref_action.cancel_goal()
         self._goal = None
         self._at_setpoint = False
+        self._motion.cancel()
 
     def wait_for_motion_done(self, timeout=5.0):
-        self._at_setpoint = False
-        starttime = rospy.Time.now()
-        if self._goal:
-            while (rospy.Time.now() - starttime).to_sec() < timeout:
-                if self._at_setpoint:
-                    rospy.sleep(0.3)
-                    return True
-                else:
-                    rospy.sleep(0.1)
-        return False
+        """
+        Waits until the head reaches the setpoint of the current goal
+
+        :param timeout: (float) maximum time to wait [s]
+        :return: (bool) True if the setpoint was reached, False on timeout or if there is no goal
+        """
+        if not self._goal:
+            return False
+        if not self._motion.wait(timeout) or not self._motion.succeeded:
+            return False
+        if self._settle_time > 0.0:
+            rospy.sleep(self._settle_time)
+        return True
 
     # ---- INTERFACING THE NODE ---
 
@@ -112,17 +126,20 @@ class Head(RobotPart):
         self._goal.pan = pan
         self._goal.tilt = tilt
         self._goal.end_time = end_time
+        self._motion.start("head_ref")
         self._ac_head_ref_action.send_goal(self._goal, done_cb=self.__doneCallback, feedback_cb=self.__feedbackCallback)
 
-        start = rospy.Time.now()
         if timeout != 0:
-            rospy.logdebug("Waiting for %d seconds to reach target ...".format(timeout))
-            while not (not ((rospy.Time.now() - start) < rospy.Duration(timeout)) or self._at_setpoint):
-                rospy.sleep(0.1)
+            rospy.logdebug("Waiting for {} seconds to reach target ...".format(timeout))
+            self._motion.wait(timeout)
 
     def __feedbackCallback(self, feedback):
         self._at_setpoint = feedback.at_setpoint
+        if feedback.at_setpoint:
+            self._motion.set_done("head_ref")
 
     def __doneCallback(self, terminal_state, result):
         self._goal = None
         self._at_setpoint = False
+        # The goal ended before the setpoint was reached, e.g. because it was preempted
+        self._motion.set_done("head_ref", succeeded=False)
@@ -4,6 +4,7 @@ from __future__ import absolute_import
 
 # System
 from collections import defaultdict
+import math
 import mock
 import random
 import os
@@ -22,8 +23,9 @@ from robot_skills import robot
 from robot_skills.util.kdl_conversions import VectorStamped, FrameStamped
 from robot_skills.classification_result import ClassificationResult
 from robot_skills.util.entity import from_entity_info
+from robot_skills.util.entity_cache import EntityCache
+from robot_skills.util.grammar_cache import get_grammar_cache
 from hmi import HMIResult
-from hmi.common import random_sentence, parse_sentence
 
 
 def random_kdl_vector():
@@ -36,8 +38,9 @@ def random_kdl_frame():
 
 
 def mock_query(description, grammar, target, timeout):
-    sentence = random_sentence(grammar, target)
-    semantics = parse_sentence(sentence, grammar, target)
+    cache = get_grammar_cache()
+    sentence = cache.random_sentence(grammar, target)
+    semantics = cache.parse(grammar, target, sentence)
     return HMIResult(sentence=sentence, semantics=semantics)
 
 
@@ -173,6 +176,7 @@ class Perception(MockedRobotPart):
         self.detect_faces = mock.MagicMock()
         self.get_best_face_recognition = mock.MagicMock()
         self.get_rgb_depth_caminfo = mock.MagicMock()
+        self.get_latest_rgb_depth_caminfo = mock.MagicMock()
         self.project_roi = lambda *args, **kwargs: VectorStamped(random.random(), random.random(), random.random(), "/map")
 
 
@@ -213,16 +217,75 @@ class Torso(MockedRobotPart):
         self.wait_for_motion_done = mock.MagicMock()
 
 
+class _EntityDict(dict):
+    """
+    Dict of entities by id that notifies its owner of every change, so the owner can keep an index up to date. Like a
+    defaultdict, a random entity is created for an unknown id.
+    """
+    def __init__(self, on_change, entities=()):
+        super(_EntityDict, self).__init__()
+        self._on_change = on_change
+        self.update(entities)
+
+    def __missing__(self, key):
+        self[key] = ED.generate_random_entity(id=key)
+        return dict.__getitem__(self, key)
+
+    def __setitem__(self, key, value):
+        dict.__setitem__(self, key, value)
+        self._on_change(key)
+
+    def __delitem__(self, key):
+        dict.__delitem__(self, key)
+        self._on_change(key)
+
+    def update(self, *args, **kwargs):
+        for key, value in dict(*args, **kwargs).iteritems():
+            self[key] = value
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default
+        return dict.__getitem__(self, key)
+
+    def pop(self, key, *args):
+        value = dict.pop(self, key, *args)
+        self._on_change(key)
+        return value
+
+    def popitem(self):
+        key, value = dict.popitem(self)
+        self._on_change(key)
+        return key, value
+
+    def clear(self):
+        keys = self.keys()
+        dict.clear(self)
+        for key in keys:
+            self._on_change(key)
+
+
+class _EntityView(dict):
+    """ All entities of the mocked world model by id. Unknown ids yield a random entity, which is not stored. """
+    def __missing__(self, key):
+        return ED.generate_random_entity()
+
+
 class ED(MockedRobotPart):
+    """
+    Mocked world model. The static and dynamic entities are kept in a persistent store that is indexed by id, type and
+    grid cell, so queries don't have to walk over all entities. This allows for load testing with large worlds, see
+    populate.
+    """
     @staticmethod
-    def generate_random_entity(id=None, type=None):
+    def generate_random_entity(id=None, type=None, rng=random):
             entity_info = EntityInfo()
 
             if not id:
                 entity_info.id = str(hash(entity_info))
             else:
                 entity_info.id = id
-            entity_info.type = random.choice(["random_from_magicmock", "human", "coke", "fanta"])
+            entity_info.type = rng.choice(["random_from_magicmock", "human", "coke", "fanta"])
             # entity.data = mock.MagicMock()
             entity_info.data = ""
 
@@ -234,12 +297,15 @@ class ED(MockedRobotPart):
 
     def __init__(self, robot_name, tf_listener, *args, **kwargs):
         super(ED, self).__init__(robot_name, tf_listener)
-        self._dynamic_entities = defaultdict(self.generate_random_entity,
-                                     {e.id: e for e in [self.generate_random_entity() for _ in range(5)]})
+        self._index = EntityCache(max_age=float('inf'), cell_size=1.0)
+        self._all_entities = _EntityView()
+        self._static_store = _EntityDict(self._reindex)
+        self._dynamic_store = _EntityDict(self._reindex)
+        self.statistics = defaultdict(int)  # Counts the queries by kind and the number of returned entities
 
+        self._dynamic_entities = {e.id: e for e in [self.generate_random_entity() for _ in range(5)]}
         self._dynamic_entities['john'] = self.generate_random_entity(id='john', type='person')
-        self._static_entities = defaultdict(self.generate_random_entity,
-                                     {e.id: e for e in [self.generate_random_entity() for _ in range(5)]})
+        self._static_entities = {e.id: e for e in [self.generate_random_entity() for _ in range(5)]}
         self._static_entities['test_waypoint_1'] = self.generate_random_entity(id='test_waypoint_1', type='waypoint')
         self._static_entities['cabinet'] = self.generate_random_entity(id='cabinet')
 
@@ -249,6 +315,8 @@ class ED(MockedRobotPart):
         self.navigation = mock.MagicMock()
         self.navigation.get_position_constraint = mock.MagicMock()
         self.update_entity = mock.MagicMock()
+        self.update_entities = mock.MagicMock()
+        self.remove_entities = mock.MagicMock()
         self.get_closest_possible_person_entity = lambda *args, **kwargs: self.generate_random_entity()
         self.get_closest_laser_entity = lambda *args, **kwargs: self.generate_random_entity()
         self.get_entity_info = mock.MagicMock()
@@ -256,26 +324,84 @@ class ED(MockedRobotPart):
 
         self._person_names = []
 
+    @property
+    def _dynamic_entities(self):
+        return self._dynamic_store
+
+    @_dynamic_entities.setter
+    def _dynamic_entities(self, entities):
+        old_ids = self._dynamic_store.keys()
+        self._dynamic_store = _EntityDict(self._reindex)
+        for identifier in old_ids:
+            self._reindex(identifier)
+        self._dynamic_store.update(entities)
+
+    @property
+    def _static_entities(self):
+        return self._static_store
+
+    @_static_entities.setter
+    def _static_entities(self, entities):
+        old_ids = self._static_store.keys()
+        self._static_store = _EntityDict(self._reindex)
+        for identifier in old_ids:
+            self._reindex(identifier)
+        self._static_store.update(entities)
+
+    def _reindex(self, identifier):
+        """ Updates the index for an id of which the static or dynamic entity changed, static entities prevail """
+        entity = dict.get(self._static_store, identifier)
+        if entity is None:
+            entity = dict.get(self._dynamic_store, identifier)
+
+        self._index.remove([identifier])
+        self._all_entities.pop(identifier, None)
+        if entity is not None:
+            self._index.update([entity], stamp=0.0)
+            self._all_entities[identifier] = entity
+
+    def populate(self, count, seed=0, size=(20.0, 20.0), types=("table", "cabinet", "coke", "fanta", "person"),
+                 dynamic=False):
+        """
+        Adds a large synthetic world to the world model. The same seed always results in the same world.
+
+        :param count: (int) number of entities to add
+        :param seed: seed of the random generator
+        :param size: (tuple) size [m] of the area in which the entities are placed, starting at the origin of the map
+        :param types: types of the entities, the entity ids are '<type>_<number>'
+        :param dynamic: (bool) whether the entities are dynamic (removed on reset) or static
+        """
+        rng = random.Random(seed)
+        entities = {}
+        for i in range(count):
+            entity_type = rng.choice(types)
+            entity = self.generate_random_entity(id="{}_{}".format(entity_type, i), type=entity_type, rng=rng)
+            entity._pose = kdl.Frame(kdl.Rotation.RPY(0, 0, rng.uniform(-math.pi, math.pi)),
+                                     kdl.Vector(rng.uniform(0, size[0]), rng.uniform(0, size[1]), rng.uniform(0, 1.5)))
+            entities[entity.id] = entity
+        (self._dynamic_entities if dynamic else self._static_entities).update(entities)
+
     def get_entities(self, type="", center_point=VectorStamped(), radius=0, id="", ignore_z=False):
 
         center_point_in_map = center_point.projectToFrame("/map", self.tf_listener)
 
-        entities = self._entities.values()
-        if type:
-            entities = [e for e in entities if e.is_a(type)]
-        if radius:
-            if ignore_z:
-                entities = [e for e in entities if e.distance_to_2d(center_point_in_map.vector) <= radius]
-            else:
-                entities = [e for e in entities if e.distance_to_3d(center_point_in_map.vector) <= radius]
+        self.statistics["queries"] += 1
         if id:
-            entities = [e for e in entities if e.id == id]
+            self.statistics["id_queries"] += 1
+        elif type:
+            self.statistics["type_queries"] += 1
+        elif radius:
+            self.statistics["radius_queries"] += 1
+
+        entities = self._index.select(type=type, center_point=center_point_in_map.vector,
+                                      radius=radius if radius else float('inf'), id=id, ignore_z=ignore_z)
 
+        self.statistics["returned_entities"] += len(entities)
         return entities
 
     @property
     def _entities(self):
-        return defaultdict(ED.generate_random_entity, self._dynamic_entities.items() + self._static_entities.items())
+        return self._all_entities
 
     def segment_kinect(self, *args, **kwargs):
         self._dynamic_entities = {e.id: e for e in [ED.generate_random_entity() for _ in range(5)]}
@@ -287,7 +413,7 @@ class ED(MockedRobotPart):
 
         res = UpdateResponse()
         res.new_ids = [e.id for e in new_entities.values()]
-        res.updated_ids = [random.choice(self._dynamic_entities).id for _ in range(2)]
+        res.updated_ids = [random.choice(self._dynamic_entities.values()).id for _ in range(2)]
         res.deleted_ids = []
         return res
 
@@ -331,6 +457,7 @@ class Mockbot(robot.Robot):
 
         self.publish_target = mock.MagicMock()
         self.tf_transform_pose = mock.MagicMock()
+        self.tf_transform_points = mock.MagicMock()
         self.close = mock.MagicMock()
         self.get_joint_states = mock.MagicMock()
 
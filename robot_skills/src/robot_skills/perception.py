@@ -1,5 +1,5 @@
 # System
-from threading import Condition, Event
+from threading import Condition, Lock
 
 # ROS
 import rospy
@@ -15,6 +15,7 @@ from rgbd_msgs.srv import Project2DTo3D
 from robot_skills.robot_part import RobotPart
 from robot_skills.util.kdl_conversions import VectorStamped
 from robot_skills.util.image_operations import img_recognitions_to_rois, img_cutout
+from robot_skills.util.stamped_buffer import StampedBuffer
 
 
 class Perception(RobotPart):
@@ -43,7 +44,11 @@ class Perception(RobotPart):
         self._clear_srv = self.create_service_client(
             '/' + robot_name + '/people_recognition/face_recognition/clear', Empty)
 
-        self._image_data = (None, None, None)
+        # Synchronized rgb, depth and depth camera info messages. The subscribers are created lazily and kept alive
+        self._rgbd_buffer = StampedBuffer(max_size=self.load_param('skills/perception/rgbd_buffer_size', 5))
+        self._rgbd_lock = Lock()
+        self._rgbd_subscribers = None
+        self._rgbd_synchronizer = None
 
         self._face_properties_srv = self.create_service_client(
             '/' + robot_name + '/people_recognition/face_recognition/get_face_properties', GetFaceProperties)
@@ -53,7 +58,7 @@ class Perception(RobotPart):
             self.create_service_client('/' + robot_name + '/people_recognition/detect_people_3d', RecognizePeople3D)
 
     def close(self):
-        pass
+        self._unsubscribe_rgbd()
 
     def _image_cb(self, image):
         self._camera_cv.acquire()
@@ -284,39 +289,72 @@ class Perception(RobotPart):
         rospy.loginfo('face_properties:%s', face_log)
         return face_properties
 
-    def get_rgb_depth_caminfo(self, timeout=5):
+    def get_rgb_depth_caminfo(self, timeout=5, newer_than=None, closest_to=None):
         """
         Get an rgb image and and depth image, along with camera info for the depth camera.
         The returned tuple can serve as input for world_model_ed.ED.detect_people.
 
+        The images come from a buffer with the most recent synchronized messages, which is filled as of the first call.
+        By default, only images that arrive after this call are returned. Arrival is measured on the local clock, so an
+        offset between the clocks of the camera PC and the local PC does not make every image look too old.
+
         :param timeout: How long to wait until the images are all collected.
+        :param newer_than: (rospy.Time) return the first images that arrived after this time on the local clock.
+            Defaults to now
+        :param closest_to: (rospy.Time) if provided, return the images with the header stamp closest to this stamp
+            instead
         :return: tuple(rgb, depth, depth_info) or a None if no images could be gathered.
         """
-        event = Event()
-
-        def callback(rgb, depth, depth_info):
-            rospy.loginfo('Received rgb, depth, cam_info')
-            self._image_data = (rgb, depth, depth_info)
-            event.set()
-
-        # camera topics
-        depth_info_sub = message_filters.Subscriber('{}/depth_registered/camera_info'.format(self._camera_base_ns),
-                                                    CameraInfo)
-        depth_sub = message_filters.Subscriber('{}/depth_registered/image'.format(self._camera_base_ns), Image)
-        rgb_sub = message_filters.Subscriber('{}/rgb/image_raw'.format(self._camera_base_ns), Image)
-
-        ts = message_filters.ApproximateTimeSynchronizer([rgb_sub, depth_sub, depth_info_sub],
-                                                         queue_size=1,
-                                                         slop=10)
-        ts.registerCallback(callback)
-        event.wait(timeout)
-        ts.callbacks.clear()
-        del ts, depth_info_sub, depth_sub, rgb_sub, callback
-
-        if any(self._image_data):
-            return self._image_data
-        else:
-            return None
+        if newer_than is None and closest_to is None:
+            newer_than = rospy.Time.now()
+        self._subscribe_rgbd()
+
+        if closest_to is not None:
+            return self._rgbd_buffer.closest_to(closest_to.to_sec(), timeout,
+                                                key=lambda images: images[0].header.stamp.to_sec())
+        return self._rgbd_buffer.newer_than(newer_than.to_sec(), timeout)
+
+    def get_latest_rgb_depth_caminfo(self, timeout=5):
+        """
+        Get the most recent rgb image, depth image and depth camera info, which may have been recorded before this call
+
+        :param timeout: How long to wait if no images are available yet
+        :return: tuple(rgb, depth, depth_info) or a None if no images could be gathered.
+        """
+        self._subscribe_rgbd()
+        return self._rgbd_buffer.latest(timeout)
+
+    def _rgbd_callback(self, rgb, depth, depth_info):
+        rospy.logdebug('Received rgb, depth, cam_info')
+        self._rgbd_buffer.add(rospy.get_time(), (rgb, depth, depth_info))
+
+    def _subscribe_rgbd(self):
+        with self._rgbd_lock:
+            if self._rgbd_synchronizer is not None:
+                return
+
+            # camera topics
+            depth_info_sub = message_filters.Subscriber(
+                '{}/depth_registered/camera_info'.format(self._camera_base_ns), CameraInfo)
+            depth_sub = message_filters.Subscriber('{}/depth_registered/image'.format(self._camera_base_ns), Image)
+            rgb_sub = message_filters.Subscriber('{}/rgb/image_raw'.format(self._camera_base_ns), Image)
+
+            self._rgbd_synchronizer = message_filters.ApproximateTimeSynchronizer(
+                [rgb_sub, depth_sub, depth_info_sub], queue_size=1, slop=10)
+            self._rgbd_synchronizer.registerCallback(self._rgbd_callback)
+            self._rgbd_subscribers = [rgb_sub, depth_sub, depth_info_sub]
+
+    def _unsubscribe_rgbd(self):
+        with self._rgbd_lock:
+            if self._rgbd_synchronizer is None:
+                return
+
+            self._rgbd_synchronizer.callbacks.clear()
+            for subscriber in self._rgbd_subscribers:
+                subscriber.unregister()
+            self._rgbd_synchronizer = None
+            self._rgbd_subscribers = None
+            self._rgbd_buffer.clear()
 
     def detect_person_3d(self, rgb, depth, depth_info):
         return self._person_recognition_3d_srv(image_rgb=rgb, image_depth=depth, camera_info_depth=depth_info).people
@@ -5,16 +5,20 @@ import rospy
 import tf
 import geometry_msgs
 from diagnostic_msgs.msg import DiagnosticArray
-from sensor_msgs.msg import Image, JointState
+from sensor_msgs.msg import Image
 from std_msgs.msg import String, ColorRGBA, Header
 
 # TU/e
 from robot_skills import arms
 from robot_skills.util import decorators
+from robot_skills.robot_part import wait_concurrently
+from robot_skills.util.geometry import transform_points
+from robot_skills.util.joint_state_cache import JointStateCache
 
 from collections import OrderedDict, Sequence
 
 CONNECTION_TIMEOUT = 10.0  # Timeout: all ROS connections must be alive within this duration
+JOINT_STATES_MAX_AGE = 0.1  # Joint states that arrived longer ago [s] are not used as the current joint states
 
 
 class Robot(object):
@@ -41,6 +45,9 @@ class Robot(object):
 
         self.configured = False
 
+        # Duration [s] until the connections of each part were alive (None if not connected in time), see configure
+        self.connection_durations = {}
+
         # Body parts
         self.parts = dict()
 
@@ -62,9 +69,19 @@ class Robot(object):
 
         self.laser_topic = "/"+self.robot_name+"/base_laser/scan"
 
-    def get_joint_states(self):
-        msg = rospy.wait_for_message("/{}/joint_states".format(self.robot_name), JointState)
-        return dict(zip(msg.name, msg.position))
+        # Single long lived subscriber to the joint states, shared by all parts
+        self.joint_states = JointStateCache("/{}/joint_states".format(self.robot_name))
+
+    def get_joint_states(self, max_age=JOINT_STATES_MAX_AGE, timeout=CONNECTION_TIMEOUT):
+        """
+        Returns the current joint positions from the joint state cache
+
+        :param max_age: (float) maximum time [s] since the arrival of the joint states, None to accept any age
+        :param timeout: (float) maximum time to wait for joint states that are recent enough [s]
+        :return: (dict) mapping from joint name to position
+        :raises: TimeOutException if no recent joint states were received in time
+        """
+        return self.joint_states.get_positions(max_age=max_age, timeout=timeout)
 
     def add_body_part(self, partname, bodypart):
         """
@@ -94,33 +111,30 @@ class Robot(object):
                       'used is the get_arm function. Change your code, you are invading private property!')
         return self._arms
 
-    def configure(self):
+    def configure(self, timeout=CONNECTION_TIMEOUT):
         """
         This should be run at the end of the constructor of a child class.
+
+        :param timeout: (float) all ROS connections of all parts must be alive within this duration [s]
         """
-        # Wait for connections
-        connected = False
-        s = rospy.Time.now()
-        r = rospy.Rate(1.0)
+        # Wait for the connections of all parts concurrently
         rospy.loginfo("Waiting for ROS connections")
-        while not connected and (rospy.Time.now() - s).to_sec() < CONNECTION_TIMEOUT:
-            connected_hypot = True
-            for bodypart in self.parts.values():
-                connected_hypot = connected_hypot and bodypart.wait_for_connections(0.1, log_failing_connections=False)
-            if connected_hypot:
-                connected = True
-                break
-            r.sleep()
-            rospy.loginfo("Will wait for another {} seconds".format(
-                CONNECTION_TIMEOUT - (rospy.Time.now() - s).to_sec()))
-
-        # If connected: log how low it took
-        if connected:
-            e = rospy.Time.now()
-            rospy.logdebug("Connecting took {} seconds".format((e-s).to_sec()))
+        durations = wait_concurrently(
+            {name: lambda t, part=bodypart: part.wait_for_connections(t, log_failing_connections=False)
+             for name, bodypart in self.parts.items()},
+            timeout)
+        self.connection_durations = durations
+
+        rospy.loginfo("Connection times per part:\n\t{}".format("\n\t".join(
+            "{:<20} {}".format(name, "{:.3f} s".format(duration) if duration is not None else "not connected")
+            for name, duration in sorted(durations.items(), key=lambda item: (item[1] is None, item[1])))))
+
+        not_connected_parts = [name for name, duration in durations.items() if duration is None]
+        if not not_connected_parts:
+            rospy.logdebug("Connecting took {} seconds".format(max(durations.values()) if durations else 0.0))
         else:  # Else: check again but now do log the errors
-            for bodypart in self.parts.values():
-                bodypart.wait_for_connections(0.1, log_failing_connections=True)
+            for name in not_connected_parts:
+                self.parts[name].wait_for_connections(0.1, log_failing_connections=True)
 
         if not self.operational:
             not_operational_parts = [name for name, part in self.parts.items() if not part.operational]
@@ -184,6 +198,19 @@ class Robot(object):
         output_pose = self.tf_listener.transformPose(frame, ps)
         return output_pose
 
+    def tf_transform_points(self, points, header, frame):
+        """
+        Transforms many points with a single transform lookup
+
+        :param points: Nx3 numpy array with points w.r.t. header.frame_id
+        :param header: std_msgs.msg.Header with the frame_id and stamp of the points
+        :param frame: frame to transform the points to
+        :return: Nx3 numpy array with the points w.r.t. frame
+        """
+        self.tf_listener.waitForTransform(frame, header.frame_id, header.stamp, rospy.Duration(2.0))
+        matrix = self.tf_listener.asMatrix(frame, header)
+        return transform_points(matrix, points)
+
     def get_arm(self, required_gripper_types=None, desired_gripper_types=None,
                 required_goals=None, desired_goals=None,
                 required_trajectories=None, desired_trajectories=None,
@@ -342,6 +369,7 @@ class Robot(object):
         return True
 
     def close(self):
+        self.joint_states.close()
         for partname, bodypart in self.parts.items():
             try:
                 bodypart.close()
@@ -2,6 +2,8 @@
 
 # System
 import os
+import threading
+import time
 
 # ROS
 import rospy
@@ -11,6 +13,38 @@ import actionlib
 SIM_MODE = os.environ.get("ROBOT_REAL", "false").lower() != "true"
 
 
+def wait_concurrently(waiters, timeout):
+    """
+    Calls all wait functions concurrently, each in its own thread, and waits until they are done or the timeout passed
+
+    :param waiters: dict mapping a name to a function that takes a timeout [s] and returns whether it succeeded
+    :param timeout: timeout in seconds
+    :return: dict mapping each name to the duration [s] until its wait function succeeded, or None if it did not
+        succeed in time
+    """
+    start = time.time()
+    durations = {name: None for name in waiters}
+
+    def wait(name, waiter):
+        if waiter(timeout):
+            durations[name] = time.time() - start
+
+    threads = []
+    for name, waiter in waiters.items():
+        thread = threading.Thread(target=wait, args=(name, waiter), name="wait_for_{}".format(name))
+        # Don't keep the process alive for connections that never come up
+        thread.daemon = True
+        thread.start()
+        threads.append(thread)
+
+    # Wait functions return at their own timeout, the margin prevents returning just before they do
+    deadline = start + timeout + 0.5
+    for thread in threads:
+        thread.join(max(0.0, deadline - time.time()))
+
+    return dict(durations)
+
+
 class RobotPart(object):
     """ Base class for robot parts """
 
@@ -54,56 +88,64 @@ class RobotPart(object):
             multiple robot parts in a loop
         :return: bool indicating whether all connections are connected
         """
-        start = rospy.Time.now()
-        t = rospy.Duration(timeout)
-        r = rospy.Rate(20)
+        # If shutdown: return immediately without any further checks or prints
+        if rospy.is_shutdown():
+            return False
 
-        # Loop until the timeout
-        while (rospy.Time.now() - start) < t:
+        # If everything is connected: return True
+        if len(self.__ros_connections) == 0:
+            return True
 
-            # If shutdown: return immediately without any further checks or prints
-            if rospy.is_shutdown():
-                return False
+        # Check all connections concurrently, so the wait is bounded by the slowest connection
+        connections = dict(self.__ros_connections)
+        durations = wait_concurrently({name: lambda t, c=connection: self._wait_for_connection(c, t)
+                                       for name, connection in connections.items()}, timeout)
 
-            # If everything is connected: return True
-            if len(self.__ros_connections) == 0:
-                return True
-            # Check all connections
-            new_connections = {}
-            for name, connection in self.__ros_connections.items():
-                rospy.logdebug("Checking {}".format(name))
-                connected = False
-                # Check actionlib connection
-                if isinstance(connection, actionlib.SimpleActionClient):
-                    connected = connection.wait_for_server(rospy.Duration(0.01))
-                elif isinstance(connection, rospy.ServiceProxy):
-                    # Check service connection
-                    # Need to use try-except in case of service since this throws an exception if not connected.
-                    try:
-                        connection.wait_for_service(timeout=0.01)
-                        connected = True
-                    except Exception:
-                        connected = False
-                elif isinstance(connection, rospy.Subscriber):
-                    connected = connection.get_num_connections() >= 1
-                else:
-                    rospy.logerr("Don't know what to do with a {}".format(type(connection)))
-                # If connected, remove from the list
-                if connected:
-                    rospy.logdebug("Connected to {}".format(name))
-                    # self.__ros_connections = {name: connection
-                    #                           for name, connection in self.__ros_connections.items() if name != k}
-                else:
-                    new_connections[name] = connection
-
-            self.__ros_connections = new_connections
-            r.sleep()
+        for name, duration in durations.items():
+            if duration is not None:
+                rospy.logdebug("Connected to {} after {:.3f} s".format(name, duration))
+        self.__ros_connections = {name: connection for name, connection in connections.items()
+                                  if durations[name] is None}
+
+        if not self.__ros_connections:
+            return True
 
         if log_failing_connections:
             for name, connection in self.__ros_connections.items():
                 rospy.logerr("{} not connected timely".format(name))
         return False
 
+    @staticmethod
+    def _wait_for_connection(connection, timeout):
+        """
+        Waits until a single connection is connected
+
+        :param connection: ServiceProxy, SimpleActionClient or Subscriber
+        :param timeout: timeout in seconds
+        :return: bool indicating whether the connection is connected
+        """
+        if isinstance(connection, actionlib.SimpleActionClient):
+            return connection.wait_for_server(rospy.Duration(timeout))
+        elif isinstance(connection, rospy.ServiceProxy):
+            # Need to use try-except in case of service since this throws an exception if not connected.
+            try:
+                connection.wait_for_service(timeout=timeout)
+                return True
+            except Exception:
+                return False
+        elif isinstance(connection, rospy.Subscriber):
+            deadline = time.time() + timeout
+            while not rospy.is_shutdown():
+                if connection.get_num_connections() >= 1:
+                    return True
+                if time.time() >= deadline:
+                    return False
+                time.sleep(0.05)
+            return False
+        else:
+            rospy.logerr("Don't know what to do with a {}".format(type(connection)))
+            return False
+
     def create_simple_action_client(self, name, action_type):
         """
         Creates a simple actionlib client and waits for the action server
@@ -1,4 +1,5 @@
 # System
+import numpy as np
 import yaml
 
 # ROS
@@ -7,7 +8,9 @@ import PyKDL as kdl
 
 # TU/e Robotics
 from ed_msgs.msg import EntityInfo
+from robot_skills.util.geometry import transform_points
 from robot_skills.util.kdl_conversions import pose_msg_to_kdl_frame, FrameStamped
+from robot_skills.util.logging_util import debug_enabled
 from robot_skills.util.shape import shape_from_entity_info
 from robot_skills.util.volume import volumes_from_entity_volumes_msg
 
@@ -15,9 +18,14 @@ from robot_skills.util.volume import volumes_from_entity_volumes_msg
 class Entity(object):
     """ Holds all data concerning entities
 
+    Entities are created in large numbers for every world model query, hence they use slots and only compute derived
+    data (the stamped pose, the inverse pose, the set of super types and the person properties) when it is needed.
     """
+    __slots__ = ("id", "type", "frame_id", "shape", "_frame", "_frame_stamped", "_frame_inverse", "_volumes",
+                 "_super_types", "_super_type_set", "_last_update_time", "_person_properties", "_person_data")
+
     def __init__(self, identifier, object_type, frame_id, pose, shape, volumes, super_types, last_update_time,
-                 person_properties=None):
+                 person_properties=None, person_data=None):
         """ Constructor
 
         :param identifier: str with the id of this entity
@@ -27,6 +35,9 @@ class Entity(object):
         :param shape: Shape of this entity
         :param volumes: dict mapping strings to Volume
         :param super_types: list with strings representing super types in an ontology of object types
+        :param last_update_time: float with the time [s] of the last update of this entity
+        :param person_properties: PersonProperties of this entity, if it is a person
+        :param person_data: str with the yaml data of a person, parsed into PersonProperties on first access
         """
         self.id = identifier
         self.type = object_type
@@ -38,6 +49,33 @@ class Entity(object):
         self._last_update_time = last_update_time
 
         self._person_properties = person_properties
+        self._person_data = person_data
+
+    @property
+    def _pose(self):
+        """ kdl.Frame with the pose of this entity w.r.t. its frame_id """
+        return self._frame
+
+    @_pose.setter
+    def _pose(self, frame):
+        self._frame = frame
+        self._frame_stamped = None
+        self._frame_inverse = None
+
+    def _inverse_pose(self):
+        """ Returns the (cached) inverse of the pose, to transform points to the frame of this entity """
+        if self._frame_inverse is None:
+            self._frame_inverse = self._frame.Inverse()
+        return self._frame_inverse
+
+    @property
+    def super_types(self):
+        return self._super_types
+
+    @super_types.setter
+    def super_types(self, super_types):
+        self._super_types = super_types
+        self._super_type_set = None
 
     @property
     def volumes(self):
@@ -63,7 +101,7 @@ class Entity(object):
                 point.frame_id, self.frame_id
             ))
             return False
-        vector = self._pose.Inverse() * point.vector
+        vector = self._inverse_pose() * point.vector
 
         # Check if the point is inside of the volume
         return self._volumes[volume_id].contains(vector)
@@ -79,10 +117,40 @@ class Entity(object):
         :return: entities that are both in the given volume and in the list 'entities'
         :rtype: List[Entities]
         """
+        if volume_id not in self._volumes:
+            rospy.logdebug("{} not a volume of {}".format(volume_id, self.id))
+            return []
+
+        # Only entities defined w.r.t. the same frame can be checked
+        fid = self.frame_id.lstrip("/")
+        dropped = [e.id for e in entities if e.frame_id.lstrip("/") != fid]
+        if dropped:
+            rospy.logerr("Cannot compute with volume and entities defined w.r.t. different frame: {} and {}".format(
+                dropped, self.frame_id
+            ))
+        entities = [e for e in entities if e.frame_id.lstrip("/") == fid]
+        if not entities:
+            return []
 
-        entities = [e for e in entities if self.in_volume(e.pose.extractVectorStamped(), volume_id)]
+        # Check all positions in a single batch
+        inside = self.points_in_volume([e._pose.p for e in entities], volume_id)
 
-        return entities
+        return [e for e, is_inside in zip(entities, inside) if is_inside]
+
+    def points_in_volume(self, points, volume_id):
+        """
+        Checks for all points whether they are in the volume identified by the volume id
+
+        :param points: Nx3 numpy array or list of kdl Vectors w.r.t. the same frame as this entity
+        :param volume_id: string with the volume
+        :return: boolean numpy array with shape (N,), all False if the volume does not exist
+        """
+        if volume_id not in self._volumes:
+            rospy.logdebug("{} not a volume of {}".format(volume_id, self.id))
+            return np.zeros(len(points), dtype=bool)
+
+        # Transform all points to the frame of this entity at once
+        return self._volumes[volume_id].contains_points(transform_points(self._inverse_pose(), points))
 
     @property
     def last_update_time(self):
@@ -132,23 +200,48 @@ class Entity(object):
         True
         >>> e.is_a("food")
         False
+        >>> e.super_types = ["coffee_table", "food"]
+        >>> e.is_a("food")
+        True
         """
-        return super_type in self.super_types
+        # The set is rebuilt when super_types is assigned, the list itself is not expected to be modified in place
+        if self._super_type_set is None:
+            self._super_type_set = frozenset(self._super_types)
+        return super_type in self._super_type_set
 
     @property
     def pose(self):
         """ Returns the pose of the Entity as a FrameStamped"""
-        return FrameStamped(frame=self._pose, frame_id=self.frame_id)
+        if self._frame_stamped is None or self._frame_stamped.frame_id != self.frame_id:
+            self._frame_stamped = FrameStamped(frame=self._frame, frame_id=self.frame_id)
+        return self._frame_stamped
 
     @pose.setter
     def pose(self, pose):
         """ Setter """
         self._pose = pose_msg_to_kdl_frame(pose)
 
+    def _parse_person_properties(self):
+        """ Parses the person data, if any, into PersonProperties
+
+        :return: PersonProperties or None
+        """
+        if self._person_properties is None and self._person_data is not None:
+            data, self._person_data = self._person_data, None
+            try:
+                pp_dict = yaml.load(data)
+                del pp_dict['position']
+                del pp_dict['header']
+                self._person_properties = PersonProperties(parent_entity=self, **pp_dict)
+            except TypeError as te:
+                rospy.logerr("Cannot instantiate PersonProperties from {}: {}".format(data, te))
+        return self._person_properties
+
     @property
     def person_properties(self):
-        if self._person_properties:
-            return self._person_properties
+        person_properties = self._parse_person_properties()
+        if person_properties:
+            return person_properties
         else:
             rospy.logwarn("{} is not a person".format(self))
             return None
@@ -156,10 +249,11 @@ class Entity(object):
     @person_properties.setter
     def person_properties(self, value):
         self._person_properties = value
+        self._person_data = None
 
     def __repr__(self):
         return "Entity(id='{id}', type='{type}', frame={frame}, person_properties={pp})"\
-            .format(id=self.id, type=self.type, frame=self.pose, pp=self._person_properties)
+            .format(id=self.id, type=self.type, frame=self.pose, pp=self._parse_person_properties())
 
 
 class PersonProperties(object):
@@ -230,9 +324,11 @@ def from_entity_info(e):
 
     # The data is a string but can be parsed as yaml, which then represent is a much more usable data structure
     volumes = volumes_from_entity_volumes_msg(e.volumes)
-    rospy.logdebug("Entity(id={id}) has volumes {vols} ".format(id=identifier, vols=volumes.keys()))
+    if debug_enabled():
+        rospy.logdebug("Entity(id={id}) has volumes {vols} ".format(id=identifier, vols=volumes.keys()))
 
-    super_types = e.types
+    # Copy, to leave the message untouched
+    super_types = list(e.types)
 
     # TODO: this must be part of the definition of the entity in ED.
     if e.has_shape and not any([name in e.id for name in ["amigo", "sergio", "hero"]])\
@@ -242,19 +338,12 @@ def from_entity_info(e):
     if 'possible_human' in e.flags:
         super_types += ["possible_human"]
 
-    entity = Entity(identifier=identifier, object_type=object_type, frame_id=frame_id, pose=pose, shape=shape,
-                  volumes=volumes, super_types=super_types, last_update_time=last_update_time)
-
-    if e.type == 'person':
-        try:
-            pp_dict = yaml.load(e.data)
-            del pp_dict['position']
-            del pp_dict['header']
-            entity.person_properties = PersonProperties(parent_entity=entity, **pp_dict)
-        except TypeError as te:
-            rospy.logerr("Cannot instantiate PersonProperties from {}: {}".format(e.data, te))
+    # The person data is only parsed when the person properties are used
+    person_data = e.data if e.type == 'person' else None
 
-    return entity
+    return Entity(identifier=identifier, object_type=object_type, frame_id=frame_id, pose=pose, shape=shape,
+                  volumes=volumes, super_types=super_types, last_update_time=last_update_time,
+                  person_data=person_data)
 
 
 if __name__ == "__main__":
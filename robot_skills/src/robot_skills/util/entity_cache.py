@@ -0,0 +1,215 @@
+# System
+from collections import defaultdict
+import math
+
+
+class EntityCache(object):
+    """ Time-bounded local mirror of the ED world model.
+
+    Entities are stored by id and indexed by (super) type and by a 2D grid cell of their position (in map frame), so
+    that type, id and center_point/radius queries can be answered without a round-trip to ED. The cache is only used
+    to answer queries if the last complete snapshot is not older than max_age.
+
+    >>> import PyKDL as kdl
+    >>> from robot_skills.util.entity import Entity
+    >>> def entity(identifier, x, y, types):
+    ...     return Entity(identifier, types[0], "/map", kdl.Frame(kdl.Vector(x, y, 0)), None, {}, types, 0)
+    >>> cache = EntityCache(max_age=1.0, cell_size=1.0)
+    >>> cache.query(now=0.0) is None
+    True
+    >>> cache.update([entity("table", 0.5, 0.5, ["table", "furniture"]), entity("coke", 3.0, 0.0, ["coke"])],
+    ...              stamp=0.0, complete=True)
+    >>> [e.id for e in cache.query(type="furniture", now=0.5)]
+    ['table']
+    >>> [e.id for e in cache.query(center_point=kdl.Vector(3.0, 0.2, 0.0), radius=0.5, now=0.5)]
+    ['coke']
+    >>> [e.id for e in cache.query(id="coke", now=0.5)]
+    ['coke']
+    >>> cache.query(now=2.0) is None
+    True
+    >>> cache.hits, cache.misses
+    (3, 2)
+    """
+    def __init__(self, max_age=0.0, cell_size=1.0):
+        """
+        Constructor
+
+        :param max_age: (float) maximum age [s] of the snapshot for queries to be answered from the cache. If zero or
+            negative, the cache is disabled and every query is a miss.
+        :param cell_size: (float) size [m] of the grid cells of the spatial index
+        """
+        self.max_age = max_age
+        self._cell_size = cell_size
+
+        self._entities = {}  # Maps id to Entity
+        self._cells = {}  # Maps id to grid cell
+        self._type_index = defaultdict(set)  # Maps (super) type to a set of ids
+        self._grid_index = defaultdict(set)  # Maps grid cell to a set of ids
+
+        self._stamp = None  # Time [s] of the last complete snapshot
+
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self):
+        return self.max_age > 0.0
+
+    @property
+    def statistics(self):
+        """ Returns a dict with the hit/miss counters and the hit ratio, useful for tuning max_age """
+        total = self.hits + self.misses
+        return {"hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": float(self.hits) / total if total else 0.0,
+                "size": len(self._entities)}
+
+    def is_fresh(self, now):
+        """ Checks whether the last complete snapshot is recent enough to answer queries
+
+        :param now: (float) current time [s]
+        :return: (bool)
+        """
+        return self.enabled and self._stamp is not None and now - self._stamp <= self.max_age
+
+    def update(self, entities, stamp, complete=False):
+        """ Inserts or replaces the provided entities
+
+        :param entities: list of Entity, all defined w.r.t. the map frame
+        :param stamp: (float) time [s] at which the entities were retrieved from ED
+        :param complete: (bool) if True, the entities represent the full world model and replace the current contents
+        """
+        if complete:
+            self.clear()
+            self._stamp = stamp
+
+        for entity in entities:
+            self._remove(entity.id)
+            self._insert(entity)
+
+    def remove(self, ids):
+        """ Removes the entities with the provided ids from the cache
+
+        :param ids: list of str
+        """
+        for identifier in ids:
+            self._remove(identifier)
+
+    def invalidate(self, ids=None):
+        """ Marks the cache stale, such that the next query is a miss. If ids are provided, these entities are
+        dropped as well.
+
+        :param ids: optional list of str
+        """
+        if ids:
+            self.remove(ids)
+        self._stamp = None
+
+    def clear(self):
+        """ Removes all entities and marks the cache stale """
+        self._entities.clear()
+        self._cells.clear()
+        self._type_index.clear()
+        self._grid_index.clear()
+        self._stamp = None
+
+    def query(self, type="", center_point=None, radius=float('inf'), id="", ignore_z=False, now=0.0):
+        """ Answers a query like ED's SimpleQuery from the cache
+
+        :param type: (str) type or super type of the entities
+        :param center_point: kdl.Vector in map frame from which the radius is measured
+        :param radius: (float) maximum distance [m] between center_point and the entity pose
+        :param id: (str) id of the entity
+        :param ignore_z: (bool) consider only the distance in the X,Y plane
+        :param now: (float) current time [s]
+        :return: list of Entity if the query could be answered, None if the cache is stale (miss)
+        """
+        if not self.is_fresh(now):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return self.select(type=type, center_point=center_point, radius=radius, id=id, ignore_z=ignore_z)
+
+    def select(self, type="", center_point=None, radius=float('inf'), id="", ignore_z=False):
+        """ Selects entities from the cache regardless of the age of the snapshot and without counting a hit or miss.
+        See query for the parameters.
+
+        :return: list of Entity
+        """
+        # Select the smallest candidate set using the indices
+        if id:
+            candidates = {id} if id in self._entities else set()
+        elif type:
+            candidates = self._type_index.get(type, set())
+        elif center_point is not None and not math.isinf(radius):
+            candidates = self._cells_in_range(center_point, radius)
+        else:
+            candidates = self._entities.keys()
+
+        entities = [self._entities[identifier] for identifier in candidates]
+        if type:
+            entities = [e for e in entities if e.type == type or e.is_a(type)]
+        if center_point is not None and not math.isinf(radius):
+            if ignore_z:
+                entities = [e for e in entities if e.distance_to_2d(center_point) <= radius]
+            else:
+                entities = [e for e in entities if e.distance_to_3d(center_point) <= radius]
+
+        return entities
+
+    def _cell(self, x, y):
+        return int(math.floor(x / self._cell_size)), int(math.floor(y / self._cell_size))
+
+    def _cells_in_range(self, center_point, radius):
+        min_i, min_j = self._cell(center_point.x() - radius, center_point.y() - radius)
+        max_i, max_j = self._cell(center_point.x() + radius, center_point.y() + radius)
+
+        # For very large radii, walking all grid cells is more expensive than walking all entities
+        if (max_i - min_i + 1) * (max_j - min_j + 1) > len(self._grid_index):
+            return self._entities.keys()
+
+        ids = set()
+        for i in range(min_i, max_i + 1):
+            for j in range(min_j, max_j + 1):
+                ids.update(self._grid_index.get((i, j), ()))
+        return ids
+
+    @staticmethod
+    def _types(entity):
+        return set(entity.super_types + [entity.type])
+
+    def _insert(self, entity):
+        self._entities[entity.id] = entity
+        for super_type in self._types(entity):
+            self._type_index[super_type].add(entity.id)
+        position = entity.pose.frame.p
+        cell = self._cell(position.x(), position.y())
+        self._cells[entity.id] = cell
+        self._grid_index[cell].add(entity.id)
+
+    def _remove(self, identifier):
+        entity = self._entities.pop(identifier, None)
+        if entity is None:
+            return
+
+        for super_type in self._types(entity):
+            ids = self._type_index.get(super_type)
+            if ids is not None:
+                ids.discard(identifier)
+                if not ids:
+                    del self._type_index[super_type]
+
+        cell = self._cells.pop(identifier)
+        ids = self._grid_index[cell]
+        ids.discard(identifier)
+        if not ids:
+            del self._grid_index[cell]
+
+    def __repr__(self):
+        return "EntityCache(max_age={}, size={}, hits={}, misses={})".format(
+            self.max_age, len(self._entities), self.hits, self.misses)
+
+
+if __name__ == "__main__":
+    import doctest
+    doctest.testmod()
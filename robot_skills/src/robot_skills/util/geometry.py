@@ -0,0 +1,124 @@
+# System
+import numpy as np
+
+# ROS
+import PyKDL as kdl
+
+
+def kdl_vectors_to_array(vectors):
+    """
+    Converts a sequence of kdl Vectors to an Nx3 array
+
+    :param vectors: sequence of kdl.Vector
+    :return: numpy array with shape (N, 3)
+
+    >>> kdl_vectors_to_array([kdl.Vector(1, 2, 3), kdl.Vector(4, 5, 6)]).tolist()
+    [[1.0, 2.0, 3.0], [4.0, 5.0, 6.0]]
+    >>> kdl_vectors_to_array([]).shape
+    (0, 3)
+    """
+    if len(vectors) == 0:
+        return np.zeros((0, 3))
+    return np.array([[v.x(), v.y(), v.z()] for v in vectors], dtype=float)
+
+
+def as_points_array(points):
+    """
+    Returns the points as an Nx3 array. Points can be an array, a sequence of kdl Vectors or a sequence of (x, y, z)
+
+    :param points: points to convert
+    :return: numpy array with shape (N, 3)
+    """
+    if isinstance(points, np.ndarray):
+        return points.reshape((-1, 3)).astype(float, copy=False)
+    if len(points) > 0 and isinstance(points[0], kdl.Vector):
+        return kdl_vectors_to_array(points)
+    return np.array(points, dtype=float).reshape((-1, 3))
+
+
+def kdl_frame_to_matrix(frame):
+    """
+    Converts a kdl Frame to a homogeneous 4x4 transformation matrix
+
+    :param frame: kdl.Frame
+    :return: numpy array with shape (4, 4)
+
+    >>> kdl_frame_to_matrix(kdl.Frame(kdl.Vector(1, 2, 3)))[:3, 3].tolist()
+    [1.0, 2.0, 3.0]
+    """
+    matrix = np.identity(4)
+    for i in range(3):
+        for j in range(3):
+            matrix[i, j] = frame.M[i, j]
+        matrix[i, 3] = frame.p[i]
+    return matrix
+
+
+def transform_points(frame, points):
+    """
+    Applies a transformation to all points
+
+    :param frame: kdl.Frame or 4x4 homogeneous transformation matrix
+    :param points: Nx3 array (or anything accepted by as_points_array)
+    :return: Nx3 array with the transformed points
+
+    >>> transform_points(kdl.Frame(kdl.Vector(1, 0, 0)), [(0, 0, 0), (1, 1, 1)]).tolist()
+    [[1.0, 0.0, 0.0], [2.0, 1.0, 1.0]]
+    """
+    matrix = frame if isinstance(frame, np.ndarray) else kdl_frame_to_matrix(frame)
+    points = as_points_array(points)
+    return points.dot(matrix[:3, :3].T) + matrix[:3, 3]
+
+
+def points_in_boxes(points, min_corners, max_corners):
+    """
+    Checks for all points whether they are inside at least one of the axis aligned boxes (bounds included)
+
+    :param points: Nx3 array (or anything accepted by as_points_array)
+    :param min_corners: Mx3 array with the minimum corners of the boxes
+    :param max_corners: Mx3 array with the maximum corners of the boxes
+    :return: boolean array with shape (N,)
+
+    >>> points_in_boxes([(0.5, 0.5, 0.5), (1.5, 0.5, 0.5), (3, 3, 3)], [(0, 0, 0), (1, 0, 0)], [(1, 1, 1), (2, 1, 1)])
+    array([ True,  True, False])
+    """
+    points = as_points_array(points)
+    min_corners = np.asarray(min_corners, dtype=float).reshape((-1, 3))
+    max_corners = np.asarray(max_corners, dtype=float).reshape((-1, 3))
+    # Broadcast to N x M x 3
+    inside = (points[:, np.newaxis, :] >= min_corners[np.newaxis, :, :]) & \
+             (points[:, np.newaxis, :] <= max_corners[np.newaxis, :, :])
+    return inside.all(axis=2).any(axis=1)
+
+
+def points_in_convex_hull(points, convex_hull):
+    """
+    Checks for all points whether they are inside the convex hull. Only x and y are evaluated. As in
+    robot_smach_states.util.geometry_helpers.isPointInsideHull, the vertices of the convex hull are supposed to be
+    ordered anti-clockwise and points on the boundary are considered outside.
+
+    :param points: Nx3 array (or anything accepted by as_points_array)
+    :param convex_hull: Mx3 array (or anything accepted by as_points_array) with the vertices of the convex hull
+    :return: boolean array with shape (N,)
+
+    >>> square = [(0, 0, 0), (1, 0, 0), (1, 1, 0), (0, 1, 0)]
+    >>> points_in_convex_hull([(0.5, 0.5, 10), (1.5, 0.5, 0), (1, 0.5, 0)], square)
+    array([ True, False, False])
+    """
+    points = as_points_array(points)
+    hull = as_points_array(convex_hull)
+    if len(hull) == 0:
+        return np.zeros(len(points), dtype=bool)
+
+    a = hull[:, :2]
+    b = np.roll(hull, -1, axis=0)[:, :2]
+    edge = b - a  # M x 2
+    # Cross product of each edge with the vector from the start of the edge to each point: N x M
+    rel = points[:, np.newaxis, :2] - a[np.newaxis, :, :]
+    cross = edge[np.newaxis, :, 0] * rel[:, :, 1] - edge[np.newaxis, :, 1] * rel[:, :, 0]
+    return (cross > 0).all(axis=1)
+
+
+if __name__ == "__main__":
+    import doctest
+    doctest.testmod()
@@ -0,0 +1,219 @@
+# System
+from collections import OrderedDict
+import copy
+import hashlib
+import inspect
+import os
+import pickle
+import sys
+import tempfile
+import threading
+
+# ROS
+from grammar_parser.cfgparser import CFGParser
+import rospy
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "robot_skills", "grammars")
+CACHE_FORMAT = 1  # Increment if the way the parsers are stored changes
+
+
+def grammar_hash(grammar):
+    """
+    Identifies a grammar by its content
+
+    >>> grammar_hash("T -> yes | no")
+    '43ea1c4d667cff692d7e7d66f7103d268c69e325'
+
+    :param grammar: (str) grammar
+    :return: (str) sha1 hex digest of the grammar
+    """
+    return hashlib.sha1(grammar.encode("utf-8")).hexdigest()
+
+
+def parser_version():
+    """
+    Identifies the implementation the parsers are pickled with: the cache format, the Python version and the
+    modification time of the grammar_parser module. Pickled parsers of another implementation may fail to load or
+    behave differently, so they are not used.
+
+    :return: (str) version, e.g. 'v1-py2-1562331234'
+    """
+    try:
+        mtime = int(os.path.getmtime(inspect.getsourcefile(CFGParser) or inspect.getfile(CFGParser)))
+    except (TypeError, IOError, OSError):
+        mtime = 0
+    return "v{}-py{}-{}".format(CACHE_FORMAT, sys.version_info[0], mtime)
+
+
+class GrammarCache(object):
+    """
+    Caches the parsed grammars (CFGParser objects) in memory and on disk, keyed by the hash of the grammar and the
+    parser version, so large grammars only have to be parsed once. Parse results of sentences are cached as well, so a sentence that was
+    recognized (and parsed) by the HMI does not have to be parsed again.
+    """
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_parses=1024):
+        """
+        Constructor
+
+        :param cache_dir: (str) directory to store the parsed grammars in. If None, grammars are only cached in memory
+        :param max_parses: (int) maximum number of parse results that are kept
+        """
+        self.cache_dir = cache_dir
+        self.max_parses = max_parses
+        self.version = parser_version()
+
+        self._parsers = {}  # Maps grammar hash to CFGParser
+        self._parses = OrderedDict()  # Maps (grammar hash, target, sentence) to semantics, least recently used first
+        self._lock = threading.RLock()
+
+        self.hits = 0
+        self.misses = 0
+
+    def get_parser(self, grammar):
+        """
+        Returns the parser of a grammar, from memory, from disk or by parsing the grammar
+
+        :param grammar: (str) grammar
+        :return: CFGParser
+        """
+        key = grammar_hash(grammar)
+        with self._lock:
+            parser = self._parsers.get(key)
+            if parser is None:
+                parser = self._load(key)
+                if parser is None:
+                    parser = CFGParser.fromstring(grammar)
+                    self._store(key, parser)
+                self._parsers[key] = parser
+            return parser
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, "{}-{}.pickle".format(key, self.version))
+
+    def _load(self, key):
+        if self.cache_dir is None or not os.path.exists(self._path(key)):
+            return None
+        try:
+            with open(self._path(key), "rb") as f:
+                return pickle.load(f)
+        except Exception as e:
+            rospy.logwarn("Could not load cached grammar {}: {}".format(self._path(key), e))
+            return None
+
+    def _store(self, key, parser):
+        if self.cache_dir is None:
+            return
+        try:
+            if not os.path.isdir(self.cache_dir):
+                os.makedirs(self.cache_dir)
+            # Write to a temporary file first, other processes may read the cache at the same time
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir)
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(parser, f, pickle.HIGHEST_PROTOCOL)
+            os.rename(tmp_path, self._path(key))
+        except Exception as e:
+            rospy.logwarn("Could not cache grammar {}: {}".format(self._path(key), e))
+
+    @staticmethod
+    def _sentence_key(sentence):
+        return " ".join(sentence) if isinstance(sentence, (list, tuple)) else sentence
+
+    def parse(self, grammar, target, sentence):
+        """
+        Parses a sentence, the result is cached
+
+        :param grammar: (str) grammar
+        :param target: (str) target of the grammar
+        :param sentence: (str) sentence
+        :return: semantics of the sentence, False if the sentence cannot be parsed
+        """
+        return self._parse(grammar_hash(grammar), lambda: self.get_parser(grammar), target, sentence)
+
+    def _parse(self, key, get_parser, target, sentence):
+        parse_key = (key, target, self._sentence_key(sentence))
+        with self._lock:
+            if parse_key in self._parses:
+                self.hits += 1
+                semantics = self._parses.pop(parse_key)
+                self._parses[parse_key] = semantics
+                # Callers may modify the semantics
+                return copy.deepcopy(semantics)
+            self.misses += 1
+
+        semantics = get_parser().parse(target, sentence)
+        self.store_parse_result(key, target, sentence, semantics)
+        return semantics
+
+    def store_parse_result(self, key, target, sentence, semantics):
+        """
+        Stores the semantics of a sentence, e.g. the result of an HMI query
+
+        :param key: (str) hash of the grammar, see grammar_hash
+        :param target: (str) target of the grammar
+        :param sentence: (str) sentence
+        :param semantics: semantics of the sentence
+        """
+        with self._lock:
+            self._parses[(key, target, self._sentence_key(sentence))] = copy.deepcopy(semantics)
+            while len(self._parses) > self.max_parses:
+                self._parses.popitem(last=False)
+
+    def random_sentence(self, grammar, target):
+        """
+        Generates a random sentence of the grammar
+
+        :param grammar: (str) grammar
+        :param target: (str) target of the grammar
+        :return: (str) sentence
+        """
+        return self.get_parser(grammar).get_random_sentence(target)
+
+    def cached_parser(self, grammar, parser=None):
+        """
+        Wraps a parser, so that its parse results are cached
+
+        :param grammar: (str) grammar of the parser
+        :param parser: CFGParser, if not provided it is retrieved from the cache
+        :return: CachedParser
+        """
+        return CachedParser(self, grammar_hash(grammar), parser if parser is not None else self.get_parser(grammar))
+
+
+class CachedParser(object):
+    """
+    Parser of which the parse results are cached by a GrammarCache. All other methods are those of the wrapped parser.
+    """
+    def __init__(self, cache, key, parser):
+        self._cache = cache
+        self._key = key
+        self._parser = parser
+
+    def parse(self, target, sentence, *args, **kwargs):
+        if args or kwargs:
+            return self._parser.parse(target, sentence, *args, **kwargs)
+        return self._cache._parse(self._key, lambda: self._parser, target, sentence)
+
+    def store_parse_result(self, target, sentence, semantics):
+        """ Stores the semantics of a sentence of this grammar, see GrammarCache.store_parse_result """
+        self._cache.store_parse_result(self._key, target, sentence, semantics)
+
+    def __getattr__(self, name):
+        return getattr(self._parser, name)
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_grammar_cache():
+    """ Returns the grammar cache that is shared within this process """
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = GrammarCache()
+        return _default_cache
+
+
+if __name__ == "__main__":
+    import doctest
+    doctest.testmod()
@@ -0,0 +1,209 @@
+# System
+from collections import deque
+import os
+import subprocess
+import threading
+import time
+
+# ROS
+import rospy
+
+# Command to convert the .rgbd file to a .png file. The path of the .rgbd file is appended
+RGBD_TO_PNG_COMMAND = ["rosrun", "rgbd", "rgbd_to_rgb_png"]
+
+
+class ImageWriter(object):
+    """ Writes rgbd images to disk in background threads.
+
+    Images are put in a bounded queue and written, including the conversion to png, by worker threads. If the queue
+    is full, the drop policy determines what happens:
+
+    - "drop_oldest": the oldest queued image is discarded to make room for the new one
+    - "drop_newest": the new image is discarded
+    - "block": the caller waits (at most block_timeout) until there is room, otherwise the new image is discarded
+    """
+    DROP_OLDEST = "drop_oldest"
+    DROP_NEWEST = "drop_newest"
+    BLOCK = "block"
+
+    def __init__(self, max_queue_size=10, num_workers=1, drop_policy=DROP_OLDEST, block_timeout=1.0,
+                 convert_command=None):
+        """
+        Constructor
+
+        :param max_queue_size: (int) maximum number of images waiting to be written
+        :param num_workers: (int) number of worker threads
+        :param drop_policy: (str) one of "drop_oldest", "drop_newest" or "block"
+        :param block_timeout: (float) maximum time [s] submit waits for room in the queue with the "block" policy
+        :param convert_command: list with the command to convert the .rgbd file to png. Defaults to
+            RGBD_TO_PNG_COMMAND. If an empty list is provided, no conversion is done.
+        """
+        assert drop_policy in [self.DROP_OLDEST, self.DROP_NEWEST, self.BLOCK], \
+            "Unknown drop policy: {}".format(drop_policy)
+        self._max_queue_size = max_queue_size
+        self._drop_policy = drop_policy
+        self._block_timeout = block_timeout
+        self._convert_command = RGBD_TO_PNG_COMMAND if convert_command is None else convert_command
+
+        self._queue = deque()
+        self._condition = threading.Condition()
+        self._in_progress = 0
+        self._shutdown = False
+
+        # Metrics
+        self.submitted = 0
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self.max_queue_depth = 0
+        self._latency_sum = 0.0
+        self._latency_max = 0.0
+
+        self._workers = []
+        for i in range(num_workers):
+            worker = threading.Thread(target=self._work, name="image_writer_{}".format(i))
+            worker.daemon = True
+            worker.start()
+            self._workers.append(worker)
+
+    @property
+    def queue_depth(self):
+        """ Number of images waiting to be written """
+        with self._condition:
+            return len(self._queue)
+
+    @property
+    def statistics(self):
+        """ Returns a dict with the queue and write latency metrics. Latency is the time between submitting an image
+        and the moment it is written and converted """
+        with self._condition:
+            return {"submitted": self.submitted,
+                    "written": self.written,
+                    "dropped": self.dropped,
+                    "failed": self.failed,
+                    "queue_depth": len(self._queue),
+                    "max_queue_depth": self.max_queue_depth,
+                    "mean_latency": self._latency_sum / self.written if self.written else 0.0,
+                    "max_latency": self._latency_max}
+
+    def submit(self, fname, rgbd_data, json_meta_data):
+        """
+        Queues an image to be written to fname.rgbd and fname.json, and converted to png
+
+        :param fname: (str) path of the files without extension
+        :param rgbd_data: the serialized rgbd image
+        :param json_meta_data: (str) the meta data of the image
+        :return: (bool) whether the image was queued
+        """
+        with self._condition:
+            if self._shutdown:
+                rospy.logwarn("ImageWriter is shut down, not writing {}".format(fname))
+                return False
+
+            self.submitted += 1
+            if len(self._queue) >= self._max_queue_size:
+                if self._drop_policy == self.DROP_OLDEST:
+                    dropped = self._queue.popleft()
+                    rospy.logwarn("ImageWriter queue full, dropping {}".format(dropped[0]))
+                    self.dropped += 1
+                elif self._drop_policy == self.BLOCK:
+                    deadline = time.time() + self._block_timeout
+                    while len(self._queue) >= self._max_queue_size and time.time() < deadline:
+                        self._condition.wait(deadline - time.time())
+
+                if len(self._queue) >= self._max_queue_size:
+                    rospy.logwarn("ImageWriter queue full, dropping {}".format(fname))
+                    self.dropped += 1
+                    return False
+
+            self._queue.append((fname, rgbd_data, json_meta_data, time.time()))
+            self.max_queue_depth = max(self.max_queue_depth, len(self._queue))
+            self._condition.notify_all()
+            return True
+
+    def flush(self, timeout=None):
+        """
+        Waits until all queued images are written
+
+        :param timeout: (float) maximum time to wait [s]. If None, wait until done
+        :return: (bool) whether all images have been written
+        """
+        deadline = None if timeout is None else time.time() + timeout
+        with self._condition:
+            while self._queue or self._in_progress:
+                if deadline is None:
+                    self._condition.wait(1.0)
+                else:
+                    remaining = deadline - time.time()
+                    if remaining <= 0.0:
+                        return False
+                    self._condition.wait(remaining)
+            return True
+
+    def shutdown(self, timeout=10.0):
+        """
+        Writes the remaining images and stops the worker threads
+
+        :param timeout: (float) maximum time to wait for the remaining images [s]
+        :return: (bool) whether all images have been written
+        """
+        flushed = self.flush(timeout)
+        with self._condition:
+            self._shutdown = True
+            if not flushed:
+                rospy.logwarn("ImageWriter: {} images not written at shutdown".format(len(self._queue)))
+                self.dropped += len(self._queue)
+                self._queue.clear()
+            self._condition.notify_all()
+        for worker in self._workers:
+            worker.join(1.0)
+        return flushed
+
+    def _work(self):
+        while True:
+            with self._condition:
+                while not self._queue and not self._shutdown:
+                    self._condition.wait(1.0)
+                if not self._queue:
+                    return
+                fname, rgbd_data, json_meta_data, stamp = self._queue.popleft()
+                self._in_progress += 1
+                self._condition.notify_all()
+
+            success = self._write(fname, rgbd_data, json_meta_data)
+
+            with self._condition:
+                self._in_progress -= 1
+                if success:
+                    latency = time.time() - stamp
+                    self.written += 1
+                    self._latency_sum += latency
+                    self._latency_max = max(self._latency_max, latency)
+                else:
+                    self.failed += 1
+                self._condition.notify_all()
+
+    def _write(self, fname, rgbd_data, json_meta_data):
+        try:
+            path = os.path.dirname(fname)
+            if path and not os.path.exists(path):
+                try:
+                    os.makedirs(path)
+                except OSError:
+                    # Another worker might have created the directory in the meantime
+                    if not os.path.isdir(path):
+                        raise
+
+            with open(fname + ".rgbd", "wb") as f:
+                f.write(bytearray(rgbd_data))
+
+            with open(fname + ".json", "w") as f:
+                f.write(json_meta_data)
+
+            if self._convert_command:
+                subprocess.call(self._convert_command + [fname + ".rgbd"])
+        except Exception as e:
+            rospy.logerr("ImageWriter could not write {}: {}".format(fname, e))
+            return False
+
+        return True
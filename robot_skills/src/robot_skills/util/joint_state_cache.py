@@ -0,0 +1,98 @@
+# System
+import time
+
+# ROS
+import rospy
+from sensor_msgs.msg import JointState
+
+# TU/e Robotics
+from robot_skills.util.exceptions import TimeOutException
+from robot_skills.util.stamped_buffer import StampedBuffer
+
+
+class JointStateCache(object):
+    """ Keeps a single subscriber to the joint states of a robot alive and caches the most recent messages, so callers
+    get the current joint positions without creating a subscriber and waiting for the next message.
+
+    Samples are stamped with the header stamp of the message or, if that is not set, with the time of arrival. Reads
+    can be constrained to a maximum age; a read waits for a new message if the latest sample is too old. The age is
+    measured from the time of arrival on the local clock, so an offset between the clocks of the publishing and the
+    local PC does not make every sample look too old (or too new).
+    """
+    def __init__(self, topic, history_size=50, subscribe=True, clock=None):
+        """
+        Constructor
+
+        :param topic: (str) joint states topic
+        :param history_size: (int) number of messages kept in the history
+        :param subscribe: (bool) whether to subscribe to the topic, if False messages are supposed to be passed to
+            add_message
+        :param clock: function that returns the current time [s], defaults to rospy.get_time
+        """
+        self._clock = clock if clock is not None else rospy.get_time
+        self._buffer = StampedBuffer(max_size=history_size)
+        self._subscriber = rospy.Subscriber(topic, JointState, self.add_message, queue_size=1) if subscribe else None
+
+    def close(self):
+        """ Unsubscribes from the joint states """
+        if self._subscriber is not None:
+            self._subscriber.unregister()
+            self._subscriber = None
+
+    def add_message(self, msg):
+        """
+        Adds a joint state message to the cache and wakes up the callers waiting for it
+
+        :param msg: (JointState) message
+        """
+        arrival = self._clock()
+        stamp = msg.header.stamp.to_sec() or arrival
+        self._buffer.add(stamp, (stamp, arrival, msg))
+
+    def get_sample(self, max_age=None, timeout=5.0):
+        """
+        Returns the most recent sample that is not older than max_age
+
+        :param max_age: (float) maximum time [s] since the arrival of the sample, None to accept any age
+        :param timeout: (float) maximum time to wait for a (fresh) sample [s]
+        :return: (float, dict) stamp of the sample and mapping from joint name to position
+        :raises: TimeOutException if no sample was received in time
+        """
+        deadline = time.time() + timeout
+        sample = self._buffer.latest(timeout=timeout)
+        if sample is not None and max_age is not None:
+            stamp, arrival, _ = sample
+            if arrival < self._clock() - max_age:
+                # Nothing in the buffer is fresh, so the first sample that arrives after the latest one is fresh
+                sample = self._buffer.newer_than(stamp, timeout=max(0.0, deadline - time.time()))
+
+        if sample is None:
+            raise TimeOutException("No joint states with a maximum age of {} received within {} seconds".format(
+                max_age, timeout))
+        stamp, _, msg = sample
+        return stamp, dict(zip(msg.name, msg.position))
+
+    def get_positions(self, max_age=None, timeout=5.0):
+        """
+        Returns the most recent joint positions that are not older than max_age
+
+        :param max_age: (float) maximum time [s] since the arrival of the positions, None to accept any age
+        :param timeout: (float) maximum time to wait for (fresh) positions [s]
+        :return: (dict) mapping from joint name to position
+        :raises: TimeOutException if no positions were received in time
+        """
+        return self.get_sample(max_age=max_age, timeout=timeout)[1]
+
+    def get_closest(self, stamp, timeout=0.0):
+        """
+        Returns the joint positions closest to the provided stamp, e.g. to relate them to a camera image
+
+        :param stamp: (float) stamp [s]
+        :param timeout: (float) maximum time to wait if the stamp lies in the future [s]
+        :return: (dict) mapping from joint name to position or None if no message was received yet
+        """
+        sample = self._buffer.closest_to(stamp, timeout=timeout)
+        if sample is None:
+            return None
+        msg = sample[2]
+        return dict(zip(msg.name, msg.position))
@@ -0,0 +1,11 @@
+# System
+import logging
+
+
+def debug_enabled():
+    """ Whether rospy debug messages are emitted, to avoid formatting them otherwise. rospy logs through the rosout
+    logger, so its level follows the verbosity of the node.
+
+    :return: (bool)
+    """
+    return logging.getLogger("rosout").isEnabledFor(logging.DEBUG)
@@ -0,0 +1,169 @@
+# System
+import math
+import threading
+
+# ROS
+import rospy
+
+
+class LoopTiming(object):
+    """ Timing statistics of a control loop: the number of iterations, the overruns (iterations that took longer than
+    the period) and the jitter (how late the loop woke up with respect to its deadline).
+
+    >>> timing = LoopTiming()
+    >>> timing.add_tick(0.002); timing.add_tick(0.004); timing.add_overrun(0.15); timing.add_wakeup()
+    >>> timing.iterations, timing.overruns, timing.wakeups
+    (4, 1, 1)
+    >>> round(timing.jitter_mean, 4), timing.jitter_max, timing.overrun_max
+    (0.003, 0.004, 0.15)
+    >>> other = LoopTiming(); other.add_tick(0.01)
+    >>> timing.merge(other)
+    >>> timing.iterations, timing.jitter_max
+    (5, 0.01)
+    """
+    def __init__(self):
+        self.iterations = 0
+        self.ticks = 0  # Iterations that started at their deadline
+        self.wakeups = 0  # Iterations that started early because of an event
+        self.overruns = 0  # Iterations that started late because the previous one took too long
+        self.jitter_total = 0.0
+        self.jitter_max = 0.0
+        self.overrun_max = 0.0
+
+    @property
+    def jitter_mean(self):
+        """ Mean delay [s] of the iterations that started at their deadline """
+        return self.jitter_total / self.ticks if self.ticks else 0.0
+
+    def add_tick(self, jitter):
+        """
+        Counts an iteration that started at its deadline
+
+        :param jitter: (float) delay [s] with respect to the deadline
+        """
+        self.iterations += 1
+        self.ticks += 1
+        self.jitter_total += jitter
+        self.jitter_max = max(self.jitter_max, jitter)
+
+    def add_wakeup(self):
+        """ Counts an iteration that started early because of an event """
+        self.iterations += 1
+        self.wakeups += 1
+
+    def add_overrun(self, lateness):
+        """
+        Counts an iteration that started late because the previous iteration took longer than the period
+
+        :param lateness: (float) time [s] the deadline was exceeded
+        """
+        self.iterations += 1
+        self.overruns += 1
+        self.overrun_max = max(self.overrun_max, lateness)
+
+    def merge(self, other):
+        """
+        Adds the statistics of another loop, e.g. of another execution of the same state
+
+        :param other: (LoopTiming) statistics to add
+        """
+        self.iterations += other.iterations
+        self.ticks += other.ticks
+        self.wakeups += other.wakeups
+        self.overruns += other.overruns
+        self.jitter_total += other.jitter_total
+        self.jitter_max = max(self.jitter_max, other.jitter_max)
+        self.overrun_max = max(self.overrun_max, other.overrun_max)
+
+    def as_dict(self):
+        """ Returns the statistics as a dict, e.g. to write them as JSON """
+        return {"iterations": self.iterations,
+                "wakeups": self.wakeups,
+                "overruns": self.overruns,
+                "overrun_max": self.overrun_max,
+                "jitter_mean": self.jitter_mean,
+                "jitter_max": self.jitter_max}
+
+
+class LoopScheduler(object):
+    """ Runs a control loop, e.g. the loop of a state that monitors the robot, at a fixed rate without drift: the
+    deadlines are multiples of the period after the start, so the time spent in an iteration does not shift the next
+    ones. If an iteration takes longer than the period, the missed deadlines are skipped and the overrun is counted.
+
+    Other threads, e.g. the callbacks of action clients, can call notify to start the next iteration right away instead
+    of at the next deadline. This does not shift the deadlines either.
+
+    The deadlines are on the rospy clock by default, so the loop follows the simulated time like rospy.Rate does.
+
+    >>> now = [0.0]
+    >>> scheduler = LoopScheduler(rate=10, clock=lambda: now[0])
+    >>> scheduler.notify()
+    >>> scheduler.sleep()
+    True
+    >>> now[0] = 0.35
+    >>> scheduler.sleep()
+    False
+    >>> scheduler.timing.iterations, scheduler.timing.wakeups, scheduler.timing.overruns
+    (2, 1, 1)
+    """
+    def __init__(self, rate, max_wake_latency=0.01, clock=None):
+        """
+        Constructor
+
+        :param rate: (float) rate [Hz] of the loop
+        :param max_wake_latency: (float) the loop waits in slices of at most this (wall) duration [s] and checks the
+            clock after every slice. On Python 2, a timed wait on a threading.Event polls with a granularity that
+            grows to 50 ms, which is too coarse for the deadlines.
+        :param clock: function that returns the current time [s], defaults to rospy.get_time
+        """
+        self.period = 1.0 / rate
+        self.clock = clock if clock is not None else rospy.get_time
+        self.timing = LoopTiming()
+        self._max_wake_latency = max_wake_latency
+        self._event = threading.Event()
+        self._deadline = None
+
+    def reset(self):
+        """ Restarts the deadlines at the current time, e.g. after the loop was paused """
+        self._deadline = None
+
+    def notify(self):
+        """ Makes the loop start its next iteration right away, may be called from any thread """
+        self._event.set()
+
+    def sleep(self):
+        """
+        Waits until the next deadline or until notify is called
+
+        :return: (bool) True if woken up by notify, False if the deadline was reached
+        """
+        now = self.clock()
+        if self._deadline is None:
+            self._deadline = now + self.period
+
+        if now > self._deadline:
+            # The previous iteration overran: skip the deadlines that were missed
+            self.timing.add_overrun(now - self._deadline)
+            self._deadline += self.period * math.ceil((now - self._deadline) / self.period)
+            if self._deadline <= now:
+                self._deadline += self.period
+            self._event.clear()
+            return False
+
+        while True:
+            remaining = self._deadline - self.clock()
+            if remaining <= 0.0:
+                break
+            if self._event.wait(min(remaining, self._max_wake_latency)):
+                self._event.clear()
+                self.timing.add_wakeup()
+                return True
+
+        self.timing.add_tick(self.clock() - self._deadline)
+        self._deadline += self.period
+        return False
+
+
+if __name__ == "__main__":
+    import doctest
+    doctest.testmod()
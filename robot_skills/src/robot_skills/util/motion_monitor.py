@@ -0,0 +1,167 @@
+# System
+import bisect
+import threading
+import time
+
+
+class DeadTimeHistogram(object):
+    """ Histogram of dead times: the time between the end of a motion and the moment the waiting caller continues.
+
+    >>> histogram = DeadTimeHistogram(bins=[0.001, 0.01, 0.1])
+    >>> for dead_time in [0.0005, 0.002, 0.003, 0.5]:
+    ...     histogram.add(dead_time)
+    >>> histogram.counts
+    [1, 2, 0, 1]
+    >>> histogram.count, round(histogram.total, 4)
+    (4, 0.5055)
+    >>> histogram
+    DeadTimeHistogram(<1ms: 1, <10ms: 2, <100ms: 0, >=100ms: 1)
+    """
+    def __init__(self, bins=(0.001, 0.002, 0.005, 0.01, 0.02, 0.05, 0.1, 0.2, 0.5)):
+        """
+        Constructor
+
+        :param bins: (list) upper bounds [s] of the bins, one bin is added for the larger dead times
+        """
+        self.bins = list(bins)
+        self.counts = [0] * (len(self.bins) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self._lock = threading.Lock()
+
+    def add(self, dead_time):
+        """
+        Adds a dead time to the histogram
+
+        :param dead_time: (float) dead time [s]
+        """
+        with self._lock:
+            self.counts[bisect.bisect_right(self.bins, dead_time)] += 1
+            self.count += 1
+            self.total += dead_time
+            self.max = max(self.max, dead_time)
+
+    def __repr__(self):
+        labels = ["<{:g}ms".format(bound * 1000) for bound in self.bins] + [">={:g}ms".format(self.bins[-1] * 1000)]
+        return "DeadTimeHistogram({})".format(", ".join("{}: {}".format(label, count)
+                                                        for label, count in zip(labels, self.counts)))
+
+
+class MotionMonitor(object):
+    """ Signals the completion of the motions of a robot part, e.g. from the done and feedback callbacks of its action
+    clients, so callers waiting for a motion are woken up as soon as it is done instead of polling.
+
+    A motion is identified by a key, e.g. the name of the action client that executes it. Starting a motion with the
+    same key replaces the previous one. The dead time of every successful wait is recorded in a histogram.
+
+    >>> monitor = MotionMonitor()
+    >>> monitor.start("joint_trajectory")
+    >>> monitor.wait(timeout=0.01)
+    False
+    >>> timer = threading.Timer(0.05, monitor.set_done, args=("joint_trajectory",))
+    >>> timer.start()
+    >>> monitor.wait(timeout=5.0)
+    True
+    >>> monitor.dead_times.count
+    1
+    >>> monitor.start("joint_trajectory")
+    >>> monitor.set_done("joint_trajectory", succeeded=False)
+    >>> monitor.wait(timeout=5.0), monitor.succeeded
+    (True, False)
+    """
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._active = set()  # Keys of the motions that are not done yet
+        self._failed = set()  # Keys of the motions that ended without success
+        self._done_time = None  # Wall time at which the last motion was done
+        self.dead_times = DeadTimeHistogram()
+
+    def start(self, key):
+        """
+        Marks a motion as started
+
+        :param key: identifies the motion, e.g. the name of the action client
+        """
+        with self._condition:
+            self._active.add(key)
+            self._failed.discard(key)
+
+    def set_done(self, key, succeeded=True):
+        """
+        Marks a motion as done and wakes up all callers waiting for the motions of this part
+
+        :param key: identifies the motion
+        :param succeeded: (bool) whether the motion succeeded
+        """
+        with self._condition:
+            if key not in self._active:
+                return
+            self._active.discard(key)
+            if not succeeded:
+                self._failed.add(key)
+            if not self._active:
+                self._done_time = time.time()
+            self._condition.notify_all()
+
+    def cancel(self):
+        """ Marks all motions as done without success """
+        with self._condition:
+            for key in list(self._active):
+                self.set_done(key, succeeded=False)
+
+    def is_done(self):
+        """ Returns True if no motion is active """
+        with self._condition:
+            return not self._active
+
+    @property
+    def succeeded(self):
+        """ Returns True if none of the motions that are done failed """
+        with self._condition:
+            return not self._failed
+
+    def wait(self, timeout):
+        """
+        Waits until all motions are done
+
+        :param timeout: (float) maximum time to wait [s]
+        :return: (bool) True if all motions are done, False if the timeout was exceeded. See succeeded for their
+            outcome.
+        """
+        with self._condition:
+            # Only a caller that had to wait for a motion experiences dead time
+            waited = bool(self._active)
+            if waited and timeout <= 0.0:
+                return False
+
+            # On Python 2, a timed wait on a Condition polls with a granularity that grows to 50 ms. Hence, the caller
+            # waits without a timeout and a timer wakes it up at the deadline.
+            timed_out = []
+            timer = None
+            if waited:
+                timer = threading.Timer(timeout, self._expire, args=(timed_out,))
+                timer.daemon = True
+                timer.start()
+            try:
+                while self._active:
+                    if timed_out:
+                        return False
+                    self._condition.wait()
+            finally:
+                if timer is not None:
+                    timer.cancel()
+
+            if waited:
+                self.dead_times.add(max(0.0, time.time() - self._done_time))
+            return True
+
+    def _expire(self, timed_out):
+        with self._condition:
+            timed_out.append(True)
+            self._condition.notify_all()
+
+
+if __name__ == "__main__":
+    import doctest
+    doctest.testmod()
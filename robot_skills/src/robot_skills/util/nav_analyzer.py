@@ -1,9 +1,14 @@
 # System
+from collections import deque
 import datetime
+import json
+import logging
+import logging.handlers
 import os
 import signal
 import subprocess
-import xml.etree.ElementTree as ET
+import threading
+import time
 
 # ROS
 import nav_msgs.msg
@@ -12,32 +17,56 @@ import rospy
 
 # TU/e Robotics
 from robot_skills.util.kdl_conversions import point_msg_to_kdl_vector
-
-
-class NavAnalyzer:
-
-    def __init__(self, robot_name):
-
+from robot_skills.util.loop_scheduler import LoopTiming
+
+
+class NavAnalyzer(object):
+    """
+    Records metrics of the navigation goals of a robot: the distance driven, the duration, the number of (re)plans,
+    the time the robot was blocked and the timing of the control loops of the navigation states. Records are appended
+    as JSON lines to a log file, which is rotated when it gets too large:
+
+        {"type":"goal","robot":"hero","stamp":1571...,"goal":"1571..._3","result":"succeeded","duration":12.3,
+         "distance":8.1,"plans":2,"replans":1,"blocked_time":1.5,"startpose":[0.0,0.0,0.0],"endpose":[...],
+         "loops":{"execute_plan":{"iterations":118,"wakeups":1,"overruns":0,"jitter_mean":0.001,...}}}
+
+    While a goal is active, a 'progress' record with the statistics so far is written periodically. After every goal,
+    a 'rolling' record summarizes the most recent goals. Use robot_skills/scripts/query_nav_metrics to aggregate the
+    records of many runs.
+    """
+    def __init__(self, robot_name, path=None, period=5.0, window=20, max_bytes=10 * 1024 * 1024, backup_count=20):
+        """
+        Constructor
+
+        :param robot_name: (str) name of the robot
+        :param path: (str) directory of the log files, defaults to ~/ros/data/private/recorded/nav_data
+        :param period: (float) period [s] of the progress records, no progress records are written if zero
+        :param window: (int) number of goals summarized by the rolling records
+        :param max_bytes: (int) size [bytes] at which the log file is rotated
+        :param backup_count: (int) number of rotated log files that are kept
+        """
         self._robot_name = robot_name
         self.rosbag = False
         rospy.logdebug("Nav_analyser: Bagging = {0}".format(self.rosbag))
 
         ''' Path '''
-        # ToDo: make easier
-        date = datetime.datetime.now()
-        datestr = "{0}".format(date.year)
-        if date.month < 10:
-            datestr += "0"
-        datestr += "{0}".format(date.month)
-        if date.day < 10:
-            datestr += "0"
-        datestr += "{0}".format(date.day)
-
-        self.path = os.environ["HOME"]+"/ros/data/private/recorded/rosbags/nav_data/"+datestr
+        if path is None:
+            path = os.path.join(os.environ["HOME"], "ros/data/private/recorded/nav_data")
+        self.path = path
         if not os.path.isdir(self.path):
             os.makedirs(self.path)
 
-        self.filename = self.path+'/Summary.xml'
+        self.filename = os.path.join(self.path, "nav_metrics.jsonl")
+
+        ''' Metrics log, separate from the ROS logging '''
+        self._log = logging.getLogger("robot_skills.nav_analyzer.{}".format(robot_name))
+        self._log.propagate = False
+        self._log.setLevel(logging.INFO)
+        if not self._log.handlers:
+            handler = logging.handlers.RotatingFileHandler(self.filename, maxBytes=max_bytes,
+                                                           backupCount=backup_count)
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            self._log.addHandler(handler)
 
         ''' Odometry subscriber '''
         self.odom_sub = rospy.Subscriber("/"+self._robot_name+"/base/measurements", nav_msgs.msg.Odometry, self.odomCallback)
@@ -66,174 +95,182 @@ class NavAnalyzer:
                       "/cb_base_navigation/local_planner_interface/dwa_planner/cost_cloud",
                       "/cb_base_navigation/local_planner_interface/action_server/goal"]
 
-            #plantopic = "/move_base"
-            #if os.environ["AMIGO_NAV"] == "3d":
-            #    plantopic += "_3d"
-            #plantopic += "/AStarPlannerROS/plan"
-            #topics.append(plantopic)
-
             self.base_cmd = "rosbag record "
             for topic in topics:
                 self.base_cmd += (topic + " ")
+            self.pro = None
 
         ''' Initialize variables '''
+        # The odometry and local planner feedback arrive on other threads
+        self._lock = threading.Lock()
+        self._run = "{:.3f}".format(time.time())
+        self._goal_count = 0
+        self._goal = None
+        self._startpose = None
         self.previous_position = kdl.Vector(0.0, 0.0, 0.0)
-        self.distance_traveled   = 0.0
-        self.nr_plan             = 0
-        self.nr_clear_costmap    = 0
-        self.nr_reset_costmap    = 0
-        self.starttime = rospy.Time.now()
-
-    def start_measurement(self, startpose):
-
-        ''' The distance traveled concerns this specific goal '''
         self.distance_traveled = 0.0
-        self.nr_plan             = 0
-        self.nr_clear_costmap    = 0
-        self.nr_reset_costmap    = 0
-
-        ''' Set time stamp '''
+        self.nr_plan = 0
+        self._blocked_since = None
+        self._blocked_time = 0.0
+        self._loop_timing = {}
         self.starttime = rospy.Time.now()
-        stamp          = self.getTimeStamp()
+        self._recent_goals = deque(maxlen=window)
 
-        ''' Initialize XML element '''
-        self.logitem = ET.Element("item")
-        self.logitem.set("stamp", stamp)
-        self.planitems = ET.SubElement(self.logitem, "plans")
-        self.clearitems= ET.SubElement(self.logitem, "clears")
-        self.resetitems= ET.SubElement(self.logitem, "resets")
+        if period > 0.0:
+            self._progress_timer = rospy.Timer(rospy.Duration(period), self._progress_callback)
 
-        ''' Log startpose '''
-        startposeitem = ET.SubElement(self.logitem, "startpose")
-        self.kdl_frame_to_sub_element(startpose, startposeitem)
+    def start_measurement(self, startpose):
+        """
+        Starts measuring a navigation goal
+
+        :param startpose: kdl.Frame with the pose of the robot
+        """
+        with self._lock:
+            ''' The metrics concern this specific goal '''
+            self._goal_count += 1
+            self._goal = "{}_{}".format(self._run, self._goal_count)
+            self._startpose = self._pose_to_list(startpose)
+            self.distance_traveled = 0.0
+            self.nr_plan = 0
+            self._blocked_since = None
+            self._blocked_time = 0.0
+            self._loop_timing = {}
+            self.starttime = rospy.Time.now()
+
+            ''' Make active '''
+            self.active = True
 
         ''' Start bagging '''
         # The os.setsid() is passed in the argument preexec_fn so
         # it's run after the fork() and before  exec() to run the shell.
-        #cmd = self.base_cmd + "-O ~/ros/data/recorded/rosbags/nav_data/" + "{0}".format(stamp)
         if self.rosbag:
-            cmd = self.base_cmd + "-O " + self.path + "/" + stamp
+            cmd = self.base_cmd + "-O " + self.path + "/" + self.getTimeStamp()
             self.pro = subprocess.Popen(cmd, stdout=subprocess.PIPE, shell=True, preexec_fn=os.setsid)
             rospy.logwarn("Logging with PID {0}".format(self.pro.pid))
 
-        ''' Make active '''
-        self.active = True
-
     def stop_measurement(self, endpose, result):
-
-        ''' Stop rosbagging '''
-        if self.rosbag:
-            os.killpg(self.pro.pid, signal.SIGINT)  # Send the signal to all the process groups
-
-        ''' Compute duration '''
-        endtime = rospy.Time.now()
-        duration = endtime.to_sec() - self.starttime.to_sec()
-
-        ''' Log endpose '''
-        endposeitem = ET.SubElement(self.logitem, "endpose")
-        self.kdl_frame_to_sub_element(endpose, endposeitem)
-
-        ''' Make inactive '''
-        self.active = False
-
-        ''' Write data to file '''
-        datafile = open(self.filename, 'a')
-
-        ''' With data string '''
-        #datastring = "{0}\t{1}\t{2}\t{3}\t{4}\t{5}\t{6}\n".format(self.stamp,
-        #                                                       duration,
-        #                                                        self.distance_traveled,
-        #                                                        result,
-        #                                                        self.nr_plan,
-        #                                                        self.nr_clear_costmap,
-        #                                                        self.nr_reset_costmap)
-        #datafile.write(datastring)
-
-        ''' Alternative: xml '''
-        self.logitem.set("duration", "{0}".format(duration))
-        #duritem = ET.SubElement(self.logitem, "duration")
-        #duritem.text = "{0}".format(duration)
-
-        self.logitem.set("distance", "{0}".format(self.distance_traveled))
-        #distitem = ET.SubElement(self.logitem, "distance")
-        #distitem.text = "{0}".format(self.distance_traveled)
-
-        self.logitem.set("result", "{0}".format(result))
-        #resultitem = ET.SubElement(self.logitem, "result")
-        #resultitem.text = "{0}".format(result)
-
-        self.indent(self.logitem)
-        #tree = ET.ElementTree(self.logitem)
-        #tree.write(self.filename)
-
-        ''' Writing is not done using tree.write: this will overwrite this. It is also possible to
-        load the tree from the datafile and put this item in the tree, but this will probably become inefficient
-        if the file grows '''
-        datafile.write(ET.tostring(self.logitem, 'utf-8', method="xml"))
-        #open(self.filename, 'a') as output
-        #output.write(tree)
+        """
+        Stops measuring the current goal and writes its record and the rolling statistics of the recent goals
+
+        :param endpose: kdl.Frame with the pose of the robot
+        :param result: (str) result of the goal, e.g. 'succeeded' or 'unreachable'
+        """
+        self._stop_rosbag()
+
+        with self._lock:
+            if not self.active:
+                return
+            record = self._statistics(rospy.Time.now().to_sec())
+            self.active = False
+        record.update({"type": "goal", "result": str(result), "startpose": self._startpose,
+                       "endpose": self._pose_to_list(endpose)})
+        self._recent_goals.append(record)
+        self._write(record)
+        self._write(self._rolling_statistics())
 
         ''' Display results '''
-        rospy.logdebug("\n\nNavigation summary:\nCovered {0} meters in {1} seconds ({2}) m/s avg.\nResult = {3} with {4} plans, {5} clears and {6} resets\n\n".format(self.distance_traveled,
-        duration,
-        self.distance_traveled/duration,
-        result,
-        self.nr_plan,
-        self.nr_clear_costmap,
-        self.nr_reset_costmap))
-
-        datafile.close()
+        rospy.logdebug("\n\nNavigation summary:\nCovered {0} meters in {1} seconds ({2}) m/s avg.\nResult = {3} with {4} plans and {5} seconds blocked\n\n".format(
+            record["distance"],
+            record["duration"],
+            record["distance"] / record["duration"] if record["duration"] > 0 else 0.0,
+            result,
+            record["plans"],
+            record["blocked_time"]))
 
     def abort_measurement(self):
-        self.active = False
+        """ Stops measuring the current goal without writing a record """
+        self._stop_rosbag()
+        with self._lock:
+            self.active = False
+
+    def count_plan(self):
+        """ Counts a request for a (new) global plan for the current goal """
+        with self._lock:
+            if self.active:
+                self.nr_plan += 1
+
+    def set_blocked(self, blocked):
+        """
+        Keeps track of the time the robot is blocked while driving to the current goal
+
+        :param blocked: (bool) whether the local planner reports that the path is blocked
+        """
+        with self._lock:
+            now = rospy.Time.now().to_sec()
+            if blocked and self._blocked_since is None:
+                self._blocked_since = now
+            elif not blocked and self._blocked_since is not None:
+                if self.active:
+                    self._blocked_time += now - self._blocked_since
+                self._blocked_since = None
+
+    def add_loop_timing(self, name, timing):
+        """
+        Adds the timing of a control loop, e.g. of an execution of a navigation state, to the current goal
+
+        :param name: (str) name of the loop
+        :param timing: (LoopTiming) timing statistics of the loop
+        """
+        with self._lock:
+            if self.active:
+                self._loop_timing.setdefault(name, LoopTiming()).merge(timing)
 
     def odomCallback(self, odom_msg):
         current_position = point_msg_to_kdl_vector(odom_msg.pose.pose.position)
-        if self.active:
-            self.distance_traveled += kdl.diff(current_position, self.previous_position).Norm()
-
-        self.previous_position = current_position
+        with self._lock:
+            if self.active:
+                self.distance_traveled += kdl.diff(current_position, self.previous_position).Norm()
+
+            self.previous_position = current_position
+
+    def _statistics(self, now):
+        """ Statistics of the current goal so far, must be called with the lock acquired """
+        blocked_time = self._blocked_time
+        if self._blocked_since is not None:
+            blocked_time += now - max(self._blocked_since, self.starttime.to_sec())
+        return {"goal": self._goal,
+                "duration": now - self.starttime.to_sec(),
+                "distance": self.distance_traveled,
+                "plans": self.nr_plan,
+                "replans": max(0, self.nr_plan - 1),
+                "blocked_time": blocked_time,
+                "loops": {name: timing.as_dict() for name, timing in self._loop_timing.items()}}
+
+    def _rolling_statistics(self):
+        """ Summary of the most recent goals """
+        goals = list(self._recent_goals)
+        duration = sum(goal["duration"] for goal in goals)
+        distance = sum(goal["distance"] for goal in goals)
+        return {"type": "rolling",
+                "goals": len(goals),
+                "success_ratio": float(sum(goal["result"] == "succeeded" for goal in goals)) / len(goals),
+                "mean_duration": duration / len(goals),
+                "mean_distance": distance / len(goals),
+                "mean_speed": distance / duration if duration > 0 else 0.0,
+                "mean_replans": float(sum(goal["replans"] for goal in goals)) / len(goals),
+                "mean_blocked_time": sum(goal["blocked_time"] for goal in goals) / len(goals)}
+
+    def _progress_callback(self, _):
+        with self._lock:
+            if not self.active:
+                return
+            record = self._statistics(rospy.Time.now().to_sec())
+        record["type"] = "progress"
+        self._write(record)
+
+    def _write(self, record):
+        record.update({"robot": self._robot_name, "stamp": time.time()})
+        self._log.info(json.dumps(record, separators=(",", ":"), sort_keys=True))
+
+    def _stop_rosbag(self):
+        if self.rosbag and self.pro is not None:
+            os.killpg(self.pro.pid, signal.SIGINT)  # Send the signal to all the process groups
+            self.pro = None
 
-    def kdl_frame_to_sub_element(self, kdl_frame, element):
-        x   = kdl_frame.p.x()
-        y   = kdl_frame.p.y()
-        phi = kdl_frame.M.GetRPY()[2]  # Get the yaw
-        element.set("x", "{0}".format(x))
-        element.set("y", "{0}".format(y))
-        element.set("phi", "{0}".format(phi))
+    @staticmethod
+    def _pose_to_list(kdl_frame):
+        """ Returns x, y and yaw of the frame """
+        return [kdl_frame.p.x(), kdl_frame.p.y(), kdl_frame.M.GetRPY()[2]]
 
     def getTimeStamp(self):
-        stamp = datetime.datetime.now()
-        datestr = "{0}".format(stamp.year)
-        if stamp.month < 10:
-            datestr += "0"
-        datestr += "{0}".format(stamp.month)
-        if stamp.day < 10:
-            datestr += "0"
-        datestr += "{0}_".format(stamp.day)
-        if stamp.hour < 10:
-            datestr += "0"
-        datestr += "{0}".format(stamp.hour)
-        if stamp.minute < 10:
-            datestr += "0"
-        datestr += "{0}".format(stamp.minute)
-        if stamp.second < 10:
-            datestr += "0"
-        datestr += "{0}_{1}".format(stamp.second, stamp.microsecond)
-        return datestr
-
-    def indent(self, elem, level=0):
-        i = "\n" + level*"  "
-        if len(elem):
-            if not elem.text or not elem.text.strip():
-                elem.text = i + "  "
-            if not elem.tail or not elem.tail.strip():
-                elem.tail = i
-            for elem in elem:
-                self.indent(elem, level+1)
-            if not elem.tail or not elem.tail.strip():
-                elem.tail = i
-        else:
-            if level and (not elem.tail or not elem.tail.strip()):
-                elem.tail = i
-
+        return datetime.datetime.now().strftime("%Y%m%d_%H%M%S_%f")
@@ -0,0 +1,210 @@
+# System
+import math
+
+import numpy as np
+
+# ROS
+import geometry_msgs.msg
+
+# TU/e Robotics
+from .geometry import as_points_array
+
+
+class Plan(object):
+    """ Path of the robot, e.g. a global plan, as an Nx3 array of positions. The poses are converted once, so the
+    length, resampling, room labelling and nearest point queries work on all points at once instead of walking the plan
+    point by point. Only x and y are considered in distances and lengths.
+
+    >>> plan = Plan([(0, 0, 0), (3, 0, 0), (3, 4, 0)])
+    >>> plan.length
+    7.0
+    >>> plan.cumulative_lengths.tolist()
+    [0.0, 3.0, 7.0]
+    >>> plan.resample(2.0).points[:, :2].tolist()
+    [[0.0, 0.0], [2.0, 0.0], [3.0, 1.0], [3.0, 3.0]]
+    >>> index, distance = plan.nearest((2.8, 1.0, 0.0))
+    >>> index, round(distance, 4)
+    (1, 1.0198)
+    """
+    def __init__(self, points, frame_id="/map"):
+        """
+        Constructor
+
+        :param points: Nx3 array (or anything accepted by as_points_array) with the positions
+        :param frame_id: (str) frame w.r.t. which the positions are defined
+        """
+        self.points = as_points_array(points)
+        self.frame_id = frame_id
+        self._cumulative_lengths = None
+
+    @classmethod
+    def from_pose_stamped_msgs(cls, poses):
+        """
+        Converts a plan as returned by the global planner
+
+        :param poses: list(PoseStamped)
+        :return: (Plan) with the positions of the poses, defined w.r.t. the frame of the first pose
+        """
+        frame_id = poses[0].header.frame_id if poses else "/map"
+        return cls([(p.pose.position.x, p.pose.position.y, p.pose.position.z) for p in poses], frame_id)
+
+    def __len__(self):
+        return len(self.points)
+
+    @property
+    def segment_lengths(self):
+        """ Length [m] of the segments between consecutive points, array with shape (N - 1,) """
+        return np.diff(self.cumulative_lengths)
+
+    @property
+    def cumulative_lengths(self):
+        """ Distance [m] along the plan from the first point to every point, array with shape (N,) """
+        if self._cumulative_lengths is None:
+            segments = np.hypot(*np.diff(self.points[:, :2], axis=0).T) if len(self) > 1 else np.zeros(0)
+            self._cumulative_lengths = np.concatenate(([0.0], np.cumsum(segments)))
+        return self._cumulative_lengths
+
+    @property
+    def length(self):
+        """ Length [m] of the plan """
+        return float(self.cumulative_lengths[-1]) if len(self) else 0.0
+
+    @property
+    def yaws(self):
+        """
+        Direction [rad] of the plan at every point, i.e., of the segment that starts at the point. The last point gets
+        the direction of the last segment.
+
+        >>> Plan([(0, 0, 0), (1, 0, 0), (1, 1, 0)]).yaws.round(4).tolist()
+        [0.0, 1.5708, 1.5708]
+        """
+        if len(self) < 2:
+            return np.zeros(len(self))
+        diff = np.diff(self.points[:, :2], axis=0)
+        yaws = np.arctan2(diff[:, 1], diff[:, 0])
+        return np.append(yaws, yaws[-1])
+
+    def resample(self, spacing, include_end=False):
+        """
+        Returns a plan with points at equal distances along this plan, e.g. to turn a few waypoints into a dense plan.
+        The points are interpolated on the segments of this plan and get z = 0.
+
+        :param spacing: (float) distance [m] between consecutive points
+        :param include_end: (bool) whether to add the last point of this plan
+        :return: (Plan) resampled plan
+        """
+        if len(self) < 2:
+            return Plan(self.points.copy(), self.frame_id)
+
+        # Points before the end, with a tolerance for the rounding of length / spacing
+        distances = spacing * np.arange(int(math.ceil(self.length / spacing - 1e-9)))
+        if include_end:
+            distances = np.append(distances, self.length)
+
+        # The segment of every new point, zero length segments are never selected
+        cumulative = self.cumulative_lengths
+        segments = np.clip(np.searchsorted(cumulative, distances, side="right") - 1, 0, len(self) - 2)
+        segment_lengths = cumulative[segments + 1] - cumulative[segments]
+        fractions = np.divide(distances - cumulative[segments], segment_lengths,
+                              out=np.zeros_like(distances), where=segment_lengths > 0)
+
+        starts = self.points[segments, :2]
+        ends = self.points[segments + 1, :2]
+        points = np.zeros((len(distances), 3))
+        points[:, :2] = starts + fractions[:, np.newaxis] * (ends - starts)
+        return Plan(points, self.frame_id)
+
+    def distances(self, point):
+        """
+        Distance [m] from every point of the plan to a point
+
+        :param point: kdl Vector or (x, y, z) w.r.t. the frame of the plan
+        :return: array with shape (N,)
+        """
+        point = as_points_array([point])[0]
+        return np.hypot(self.points[:, 0] - point[0], self.points[:, 1] - point[1])
+
+    def nearest(self, point):
+        """
+        Returns the point of the plan that is nearest to a point
+
+        :param point: kdl Vector or (x, y, z) w.r.t. the frame of the plan
+        :return: (int, float) index of the nearest point and its distance [m]
+        :raises: (ValueError) if the plan is empty
+        """
+        if not len(self):
+            raise ValueError("Cannot find the nearest point of an empty plan")
+        distances = self.distances(point)
+        index = int(np.argmin(distances))
+        return index, float(distances[index])
+
+    def nearest_many(self, points, chunk_size=1000):
+        """
+        Returns for many points the nearest point of the plan. The points are processed in chunks to bound the memory
+        of the M x N distance matrix.
+
+        :param points: Mx3 array (or anything accepted by as_points_array) w.r.t. the frame of the plan
+        :param chunk_size: (int) number of points per chunk
+        :return: (array, array) with shape (M,): the indices of the nearest points and their distances [m]
+        :raises: (ValueError) if the plan is empty
+
+        >>> Plan([(0, 0, 0), (1, 0, 0), (2, 0, 0)]).nearest_many([(1.9, 0.1, 0), (-1, 0, 0)])[0].tolist()
+        [2, 0]
+        """
+        if not len(self):
+            raise ValueError("Cannot find the nearest point of an empty plan")
+        points = as_points_array(points)
+        indices = np.zeros(len(points), dtype=int)
+        distances = np.zeros(len(points))
+        for begin in range(0, len(points), chunk_size):
+            chunk = points[begin:begin + chunk_size, np.newaxis, :2]
+            chunk_distances = np.hypot(*(chunk - self.points[np.newaxis, :, :2]).transpose(2, 0, 1))
+            chunk_indices = chunk_distances.argmin(axis=1)
+            indices[begin:begin + chunk_size] = chunk_indices
+            distances[begin:begin + chunk_size] = chunk_distances[np.arange(len(chunk_indices)), chunk_indices]
+        return indices, distances
+
+    def room_indices(self, rooms, volume_id="in"):
+        """
+        Labels every point of the plan with the room it is in. As get_room in
+        robot_smach_states.human_interaction.give_directions, the first room of the list that contains a point is used.
+        Rooms defined w.r.t. another frame are skipped.
+
+        :param rooms: list(Entity) with the rooms
+        :param volume_id: (str) volume of the rooms that is checked
+        :return: int array with shape (N,) with the index in rooms of the room of every point, -1 if not in any room
+        """
+        labels = np.full(len(self), -1, dtype=int)
+        frame_id = self.frame_id.lstrip("/")
+        for index, room in enumerate(rooms):
+            unlabelled = labels < 0
+            if not unlabelled.any():
+                break
+            if room.frame_id.lstrip("/") != frame_id:
+                continue
+            inside = room.points_in_volume(self.points[unlabelled], volume_id)
+            labels[np.flatnonzero(unlabelled)[inside]] = index
+        return labels
+
+    def to_pose_stamped_msgs(self):
+        """
+        Converts the plan to messages, e.g. to send it to the local planner. The orientation of every pose is the
+        direction of the plan at its point.
+
+        :return: list(PoseStamped)
+        """
+        yaws = self.yaws
+        poses = []
+        for (x, y, z), yaw in zip(self.points.tolist(), yaws.tolist()):
+            pose = geometry_msgs.msg.PoseStamped()
+            pose.header.frame_id = self.frame_id
+            pose.pose.position.x, pose.pose.position.y, pose.pose.position.z = x, y, z
+            pose.pose.orientation.z = math.sin(0.5 * yaw)
+            pose.pose.orientation.w = math.cos(0.5 * yaw)
+            poses.append(pose)
+        return poses
+
+
+if __name__ == "__main__":
+    import doctest
+    doctest.testmod()
@@ -1,5 +1,9 @@
+# System
+import numpy as np
+
 # Robot skills
 import PyKDL as kdl
+from robot_skills.util.geometry import as_points_array, kdl_vectors_to_array, points_in_convex_hull
 from robot_skills.util.kdl_conversions import point_msg_to_kdl_vector
 
 
@@ -91,17 +95,34 @@ class RightPrism(Shape):
         self._z_min = z_min
         self._z_max = z_max
 
+        # The convex hull as array and its bounds are computed once, on first use
+        self._convex_hull_array = None
+        self._bounds = None
+
+    @property
+    def convex_hull_array(self):
+        """ The vertices of the convex hull as Nx3 numpy array """
+        if self._convex_hull_array is None:
+            self._convex_hull_array = kdl_vectors_to_array(self._convex_hull)
+        return self._convex_hull_array
+
+    def _calc_bounds(self):
+        if self._bounds is None:
+            hull = self.convex_hull_array
+            self._bounds = tuple(float(v) for v in np.concatenate((hull[:, :2].min(axis=0), hull[:, :2].max(axis=0))))
+        return self._bounds
+
     def _calc_x_max(self):
-        return max(ch.x() for ch in self._convex_hull)
+        return self._calc_bounds()[2]
 
     def _calc_x_min(self):
-        return min(ch.x() for ch in self._convex_hull)
+        return self._calc_bounds()[0]
 
     def _calc_y_max(self):
-        return max(ch.y() for ch in self._convex_hull)
+        return self._calc_bounds()[3]
 
     def _calc_y_min(self):
-        return min(ch.y() for ch in self._convex_hull)
+        return self._calc_bounds()[1]
 
     def _calc_z_max(self):
         return self._z_max
@@ -126,6 +147,22 @@ class RightPrism(Shape):
         size_z = abs(self.z_max - self.z_min)
         return size_x * size_y * size_z
 
+    def contains_points(self, points):
+        """ Checks for all points whether they are inside this prism, i.e., inside the convex hull and between z_min
+        and z_max. As in the convex hull checks of geometry_helpers, the convex hull is supposed to be ordered
+        anti-clockwise and points on the boundary are considered outside.
+
+        :param points: Nx3 numpy array or list of kdl Vectors w.r.t. the frame of the corresponding Entity
+        :return: boolean numpy array with shape (N,)
+
+        >>> prism = RightPrism([kdl.Vector(0, 0, 0), kdl.Vector(1, 0, 0), kdl.Vector(1, 1, 0), kdl.Vector(0, 1, 0)], z_min=0, z_max=1)
+        >>> prism.contains_points([kdl.Vector(0.5, 0.5, 0.5), kdl.Vector(0.5, 0.5, 1.5), kdl.Vector(1.5, 0.5, 0.5)])
+        array([ True, False, False])
+        """
+        points = as_points_array(points)
+        in_height = (points[:, 2] >= self._z_min) & (points[:, 2] <= self._z_max)
+        return in_height & points_in_convex_hull(points, self.convex_hull_array)
+
 
 def shape_from_entity_info(e):
     """ Creates a shape from the convex_hull, z_min and z_max of the EntityInfo object. If no convex hull is present,
@@ -0,0 +1,118 @@
+# System
+from collections import deque
+import threading
+import time
+
+
+class StampedBuffer(object):
+    """ Thread safe ring buffer with the most recent stamped items, e.g., synchronized rgb, depth and camera info
+    messages. The memory is bounded by the maximum size: if the buffer is full, the oldest item is discarded.
+
+    Items are supposed to be added in chronological order. Stamps are in seconds.
+
+    >>> buffer = StampedBuffer(max_size=2)
+    >>> buffer.add(1.0, "a"); buffer.add(2.0, "b"); buffer.add(3.0, "c")
+    >>> buffer.latest()
+    'c'
+    >>> buffer.closest_to(1.9)
+    'b'
+    >>> buffer.newer_than(3.0, timeout=0.0) is None
+    True
+    >>> len(buffer)
+    2
+    """
+    def __init__(self, max_size=5):
+        """
+        Constructor
+
+        :param max_size: (int) maximum number of items kept in the buffer
+        """
+        self._items = deque(maxlen=max_size)
+        self._condition = threading.Condition()
+
+    def __len__(self):
+        with self._condition:
+            return len(self._items)
+
+    def add(self, stamp, item):
+        """
+        Adds an item to the buffer and wakes up all callers waiting for a new item
+
+        :param stamp: (float) stamp of the item [s]
+        :param item: item to store
+        """
+        with self._condition:
+            self._items.append((stamp, item))
+            self._condition.notify_all()
+
+    def clear(self):
+        """ Removes all items from the buffer """
+        with self._condition:
+            self._items.clear()
+
+    def latest(self, timeout=0.0):
+        """
+        Returns the most recent item. If the buffer is empty, waits at most timeout for an item
+
+        :param timeout: (float) maximum time to wait [s]
+        :return: the most recent item or None if there is none
+        """
+        return self._wait_for(lambda items: items[-1][1] if items else None, timeout)
+
+    def newer_than(self, stamp, timeout=0.0):
+        """
+        Returns the oldest item with a stamp newer than the provided stamp. Waits at most timeout for such an item
+
+        :param stamp: (float) stamp [s]
+        :param timeout: (float) maximum time to wait [s]
+        :return: the item or None if there is none
+        """
+        def find(items):
+            for item_stamp, item in items:
+                if item_stamp > stamp:
+                    return item
+            return None
+
+        return self._wait_for(find, timeout)
+
+    def closest_to(self, stamp, timeout=0.0, key=None):
+        """
+        Returns the item with the stamp closest to the provided stamp. If the stamp lies in the future, waits at most
+        timeout until an item at or after the stamp is available.
+
+        :param stamp: (float) stamp [s]
+        :param timeout: (float) maximum time to wait [s]
+        :param key: optional function that returns the stamp [s] to compare of an item, e.g. the header stamp of
+            items that are added with their time of arrival. Defaults to the stamp with which the item was added
+        :return: the item or None if the buffer is empty
+        """
+        def item_stamp(stamped_item):
+            return stamped_item[0] if key is None else key(stamped_item[1])
+
+        self._wait_for(lambda items: True if items and item_stamp(items[-1]) >= stamp else None, timeout)
+        with self._condition:
+            if not self._items:
+                return None
+            return min(self._items, key=lambda stamped_item: abs(item_stamp(stamped_item) - stamp))[1]
+
+    def _wait_for(self, find, timeout):
+        """
+        Waits until find returns something else than None
+
+        :param find: function that takes the deque with (stamp, item) tuples and returns the result or None
+        :param timeout: (float) maximum time to wait [s]
+        :return: the result of find, None if timed out
+        """
+        deadline = time.time() + timeout
+        with self._condition:
+            while True:
+                result = find(self._items)
+                remaining = deadline - time.time()
+                if result is not None or remaining <= 0.0:
+                    return result
+                self._condition.wait(remaining)
+
+
+if __name__ == "__main__":
+    import doctest
+    doctest.testmod()
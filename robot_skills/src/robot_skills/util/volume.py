@@ -1,9 +1,13 @@
 from __future__ import absolute_import
 
+# System
+import numpy as np
+from numpy import abs
+
 # ROS
 import PyKDL as kdl
+from .geometry import as_points_array, points_in_boxes
 from .kdl_conversions import point_msg_to_kdl_vector
-from numpy import abs
 
 
 class Volume(object):
@@ -36,6 +40,15 @@ class Volume(object):
         raise NotImplementedError("contains must be implemented by subclasses. "
                                   "Class {cls} has no implementation".format(cls=self.__class__.__name__))
 
+    def contains_points(self, points):
+        """ Checks for all points whether they are inside this volume
+
+        :param points: Nx3 numpy array or list of kdl Vectors w.r.t. the same frame as this volume
+        :return: boolean numpy array with shape (N,)
+        """
+        points = as_points_array(points)
+        return np.array([self.contains(kdl.Vector(*p)) for p in points], dtype=bool)
+
     @property
     def size(self):
         return self._calc_size()
@@ -64,6 +77,10 @@ class BoxVolume(Volume):
         self._min_corner = min_corner
         self._max_corner = max_corner
 
+        # Bounds as arrays for the batch point checks
+        self._min_array = np.array([min_corner.x(), min_corner.y(), min_corner.z()])
+        self._max_array = np.array([max_corner.x(), max_corner.y(), max_corner.z()])
+
     def _calc_center_point(self):
         """Calculate where the center of the box is located
 
@@ -116,6 +133,19 @@ class BoxVolume(Volume):
                 self._min_corner.y() <= point.y() <= self._max_corner.y() and
                 self._min_corner.z() <= point.z() <= self._max_corner.z())
 
+    def contains_points(self, points):
+        """ Checks for all points whether they are inside this volume
+
+        :param points: Nx3 numpy array or list of kdl Vectors w.r.t. the same frame as this volume
+        :return: boolean numpy array with shape (N,)
+
+        >>> b = BoxVolume(kdl.Vector(0, 0, 0), kdl.Vector(1, 1, 1))
+        >>> b.contains_points([kdl.Vector(0.5, 0.5, 0.5), kdl.Vector(1.5, 0.5, 0.5)])
+        array([ True, False])
+        """
+        points = as_points_array(points)
+        return ((points >= self._min_array) & (points <= self._max_array)).all(axis=1)
+
     def __repr__(self):
         return "BoxVolume(min_corner={}, max_corner={})".format(self.min_corner, self.max_corner)
 
@@ -140,6 +170,12 @@ class CompositeBoxVolume(Volume):
         self._min_corners = zip(*boxes)[0]
         self._max_corners = zip(*boxes)[1]
 
+        # Corners as arrays for the batch point checks. The bounds are computed once since the boxes do not change
+        self._min_array = np.array([[v.x(), v.y(), v.z()] for v in self._min_corners])
+        self._max_array = np.array([[v.x(), v.y(), v.z()] for v in self._max_corners])
+        self._bounds_min = self._min_array.min(axis=0)
+        self._bounds_max = self._max_array.max(axis=0)
+
     def _calc_center_point(self):
         """Calculate where the center of the box is located
 
@@ -147,37 +183,20 @@ class CompositeBoxVolume(Volume):
         >>> b.center_point
         [         0.5,         0.5,         0.5]
         """
-        min_x = min([v.x() for v in self._min_corners])
-        min_y = min([v.y() for v in self._min_corners])
-        min_z = min([v.z() for v in self._min_corners])
-        max_x = max([v.x() for v in self._max_corners])
-        max_y = max([v.y() for v in self._max_corners])
-        max_z = max([v.z() for v in self._max_corners])
-        return kdl.Vector(0.5 * (min_x + max_x),
-                          0.5 * (min_y + max_y),
-                          0.5 * (min_z + max_z))
+        return kdl.Vector(*(0.5 * (self._bounds_min + self._bounds_max)))
 
     @property
     def min_corner(self):
-        min_x = min([v.x() for v in self._min_corners])
-        min_y = min([v.y() for v in self._min_corners])
-        min_z = min([v.z() for v in self._min_corners])
-        return kdl.Vector(min_x, min_y, min_z)
+        return kdl.Vector(*self._bounds_min)
 
     @property
     def max_corner(self):
-        max_x = max([v.x() for v in self._max_corners])
-        max_y = max([v.y() for v in self._max_corners])
-        max_z = max([v.z() for v in self._max_corners])
-        return kdl.Vector(max_x, max_y, max_z)
+        return kdl.Vector(*self._bounds_max)
 
     @property
     def bottom_area(self):
-        min_x = min([v.x() for v in self._min_corners])
-        min_y = min([v.y() for v in self._min_corners])
-        min_z = min([v.z() for v in self._min_corners])
-        max_x = max([v.x() for v in self._max_corners])
-        max_y = max([v.y() for v in self._max_corners])
+        min_x, min_y, min_z = self._bounds_min
+        max_x, max_y, _ = self._bounds_max
         convex_hull = [kdl.Vector(min_x, min_y, min_z), kdl.Vector(max_x, min_y, min_z),
                        kdl.Vector(max_x, max_y, min_z), kdl.Vector(min_x, max_y, min_z)]
         return convex_hull
@@ -196,6 +215,18 @@ class CompositeBoxVolume(Volume):
 
         return False
 
+    def contains_points(self, points):
+        """ Checks for all points whether they are inside this volume
+
+        :param points: Nx3 numpy array or list of kdl Vectors w.r.t. the same frame as this volume
+        :return: boolean numpy array with shape (N,)
+
+        >>> b = CompositeBoxVolume([(kdl.Vector(0, 0, 0), kdl.Vector(1, 1, 1)), (kdl.Vector(1, 0, 0), kdl.Vector(2, 1, 1))])
+        >>> b.contains_points([kdl.Vector(0.5, 0.5, 0.5), kdl.Vector(1.5, 0.5, 0.5), kdl.Vector(2.5, 0.5, 0.5)])
+        array([ True,  True, False])
+        """
+        return points_in_boxes(points, self._min_array, self._max_array)
+
     def __repr__(self):
         description = "CompositeBoxVolume:\n"
         for min_corner, max_corner in zip(self._min_corners, self._max_corners):
@@ -24,7 +24,9 @@ from robot_skills.util.decorators import deprecated
 from robot_skills.util.kdl_conversions import VectorStamped, kdl_vector_to_point_msg
 from robot_skills.classification_result import ClassificationResult
 from robot_skills.util.entity import from_entity_info
-from robot_skills.robot_part import RobotPart
+from robot_skills.util.entity_cache import EntityCache
+from robot_skills.util.image_writer import ImageWriter
+from robot_skills.robot_part import RobotPart, wait_concurrently
 
 
 class Navigation(RobotPart):
@@ -76,6 +78,16 @@ class ED(RobotPart):
 
         self.robot_name = robot_name
 
+        # Local mirror of the world model. Disabled (max_age 0.0) unless configured
+        self._entity_cache = EntityCache(max_age=self.load_param('skills/ed/entity_cache/max_age', 0.0),
+                                         cell_size=self.load_param('skills/ed/entity_cache/cell_size', 1.0))
+
+        # Writes the images of update_kinect to disk in the background
+        self._image_writer = ImageWriter(max_queue_size=self.load_param('skills/ed/image_writer/queue_size', 10),
+                                         num_workers=self.load_param('skills/ed/image_writer/workers', 1),
+                                         drop_policy=self.load_param('skills/ed/image_writer/drop_policy',
+                                                                     ImageWriter.DROP_OLDEST))
+
     def wait_for_connections(self, timeout, log_failing_connections=True):
         """
         Waits for the connections until they are connected
@@ -85,9 +97,11 @@ class ED(RobotPart):
             multiple robot parts in a loop
         :return: bool indicating whether all connections are connected
         """
-        return (super(ED, self).wait_for_connections(timeout, log_failing_connections) and
-                self.navigation.wait_for_connections(timeout, log_failing_connections)
-                )
+        durations = wait_concurrently(
+            {"ed": lambda t: super(ED, self).wait_for_connections(t, log_failing_connections),
+             "navigation": lambda t: self.navigation.wait_for_connections(t, log_failing_connections)},
+            timeout)
+        return all(duration is not None for duration in durations.values())
 
     # ----------------------------------------------------------------------------------------------------
     #                                             QUERYING
@@ -106,6 +120,11 @@ class ED(RobotPart):
         self._publish_marker(center_point, radius)
 
         center_point_in_map = center_point.projectToFrame("/map", self.tf_listener)
+
+        if self._entity_cache.enabled:
+            return self._get_entities_from_cache(type=type, center_point=center_point_in_map.vector, radius=radius,
+                                                 id=id, ignore_z=ignore_z)
+
         query = SimpleQueryRequest(id=id, type=type, center_point=kdl_vector_to_point_msg(center_point_in_map.vector),
                                    radius=radius, ignore_z=ignore_z)
 
@@ -120,6 +139,32 @@ class ED(RobotPart):
 
         return entities
 
+    @property
+    def entity_cache(self):
+        """ The local mirror of the world model. Its statistics can be used to tune the maximum age """
+        return self._entity_cache
+
+    def _get_entities_from_cache(self, type, center_point, radius, id, ignore_z):
+        """
+        Answers a query from the entity cache. If the cache is stale, it is refreshed with a single query for all
+        entities. See get_entities for the parameters, the center_point is a kdl.Vector in map frame.
+        """
+        now = rospy.Time.now().to_sec()
+        entities = self._entity_cache.query(type=type, center_point=center_point, radius=radius, id=id,
+                                            ignore_z=ignore_z, now=now)
+        if entities is not None:
+            return entities
+
+        try:
+            entity_infos = self._ed_simple_query_srv(SimpleQueryRequest(radius=float('inf'))).entities
+        except Exception as e:
+            rospy.logerr("ERROR: robot.ed.get_entities could not refresh the entity cache: {}".format(e))
+            return []
+
+        self._entity_cache.update(map(from_entity_info, entity_infos), stamp=now, complete=True)
+        return self._entity_cache.select(type=type, center_point=center_point, radius=radius, id=id,
+                                         ignore_z=ignore_z)
+
     def get_closest_entity(self, type="", center_point=None, radius=float('inf')):
         if not center_point:
             center_point = VectorStamped(x=0, y=0, z=0, frame_id="/" + self.robot_name + "/base_link")
@@ -199,6 +244,7 @@ class ED(RobotPart):
     # ----------------------------------------------------------------------------------------------------
 
     def reset(self, keep_all_shapes=True):
+        self._entity_cache.clear()
         try:
             return self._ed_reset_srv(keep_all_shapes=keep_all_shapes)
         except rospy.ServiceException as e:
@@ -219,6 +265,57 @@ class ED(RobotPart):
         :param remove_flags: list of flags which will removed from the specified entity
         :param action: update_action, e.g. remove
         """
+        return self.update_entities([dict(id=id, type=type, frame_stamped=frame_stamped, flags=flags,
+                                          add_flags=add_flags, remove_flags=remove_flags, action=action)])
+
+    def update_entities(self, updates):
+        """
+        Updates multiple entities with a single request to ED
+
+        :param updates: list of dicts. Each dict contains the keyword arguments of update_entity for one entity, e.g.,
+            [{"id": "coke", "add_flags": ["locked"]}, {"id": "fanta", "action": "remove"}]
+        :return: response of the update service, False if one of the updates is invalid, None if there are no updates
+        """
+        if not updates:
+            return None
+
+        json_entities = []
+        for update in updates:
+            json_entity = self._entity_update_to_json(**update)
+            if json_entity is None:
+                return False
+            json_entities.append(json_entity)
+
+        json = '{"entities":[%s]}' % ','.join(json_entities)
+        rospy.logdebug(json)
+
+        result = self._ed_update_srv(request=json)
+        self._update_entity_cache(updates)
+        return result
+
+    def _update_entity_cache(self, updates):
+        """
+        Feeds updates to the entity cache: removed entities are dropped and the updated entities are dropped together
+        with the snapshot, so the next query refreshes the complete snapshot with a single request instead of reading
+        back every updated entity
+
+        :param updates: list of dicts, see update_entities
+        """
+        if not self._entity_cache.enabled:
+            return
+
+        self._entity_cache.remove([update["id"] for update in updates if update.get("action") == "remove"])
+        updated_ids = [update["id"] for update in updates if update.get("action") != "remove"]
+        if updated_ids:
+            self._entity_cache.invalidate(updated_ids)
+
+    def _entity_update_to_json(self, id, type=None, frame_stamped=None, flags=None, add_flags=None, remove_flags=None,
+                               action=None):
+        """
+        Serializes the update of a single entity to a json object. See update_entity for the parameters.
+
+        :return: str with the json object or None if the flags are invalid
+        """
         if add_flags is None:
             add_flags = []
         if remove_flags is None:
@@ -251,7 +348,7 @@ class ED(RobotPart):
                 for flag in flags:
                     if not isinstance(flag, dict):
                         print("update_entity - Error: flags need to be a list of dicts or a dict")
-                        return False
+                        return None
                     for k, v in flag.iteritems():
                         if not first:
                             json_entity += ','
@@ -272,10 +369,7 @@ class ED(RobotPart):
 
             json_entity += ']'
 
-        json = '{"entities":[{%s}]}' % json_entity
-        rospy.logdebug(json)
-
-        return self._ed_update_srv(request=json)
+        return '{%s}' % json_entity
 
     # - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
 
@@ -286,14 +380,18 @@ class ED(RobotPart):
         """
         return self.update_entity(id=id, action="remove")
 
+    def remove_entities(self, ids):
+        """ Removes the entities with the provided ids from the world model with a single request
+
+        :param ids: list of strings with the IDs of the entities to remove
+        """
+        return self.update_entities([dict(id=eid, action="remove") for eid in ids])
+
     # - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
 
     def lock_entities(self, lock_ids, unlock_ids):
-        for eid in lock_ids:
-            self.update_entity(id=eid, add_flags=['locked'])
-
-        for eid in unlock_ids:
-            self.update_entity(id=eid, remove_flags=['locked'])
+        self.update_entities([dict(id=eid, add_flags=['locked']) for eid in lock_ids] +
+                             [dict(id=eid, remove_flags=['locked']) for eid in unlock_ids])
 
     # - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
 
@@ -346,6 +444,9 @@ class ED(RobotPart):
         # Save the image (logging)
         self.save_image(path_suffix=area_description.replace(" ", "_"))
 
+        # Segmentation adds and updates entities, so the local mirror is outdated
+        self._entity_cache.invalidate()
+
         res = self._ed_kinect_update_srv(area_description=area_description, background_padding=background_padding)
         if res.error_msg:
             rospy.logerr("Could not segment objects: %s" % res.error_msg)
@@ -383,7 +484,15 @@ class ED(RobotPart):
     # - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
 
     def save_image(self, path="", path_suffix="", filename=""):
-        import os
+        """
+        Gets the current rgbd image from ED and queues it to be written to disk (.rgbd, .json and .png). Writing
+        happens in the background, use image_writer.flush() to wait until all images are on disk.
+
+        :param path: directory of the image. Defaults to ~/ed/kinect/<date>[/<path_suffix>]
+        :param path_suffix: appended to the default path
+        :param filename: filename without extension. Defaults to the current time
+        :return: (bool) whether the image was queued
+        """
         import time
 
         if not path:
@@ -392,9 +501,6 @@ class ED(RobotPart):
             if path_suffix:
                 path += "/" + path_suffix
 
-        if not os.path.exists(path):
-            os.makedirs(path)
-
         if not filename:
             filename = time.strftime("%Y-%m-%d-%H-%M-%S")
 
@@ -404,14 +510,16 @@ class ED(RobotPart):
         if res.error_msg:
             rospy.logerr("Could not save image: %s" % res.error_msg)
 
-        with open(fname + ".rgbd", "wb") as f:
-            f.write(bytearray(res.rgbd_data))
+        return self._image_writer.submit(fname, res.rgbd_data, res.json_meta_data)
 
-        with open(fname + ".json", "w") as f:
-            f.write(res.json_meta_data)
+    @property
+    def image_writer(self):
+        """ The background writer of the images. Its statistics contain the queue depth and write latency """
+        return self._image_writer
 
-        # rgbd to png
-        os.system('rosrun rgbd rgbd_to_rgb_png %s' % (fname + ".rgbd"))  # ToDo: very very very ugly
+    def close(self):
+        """ Writes the remaining queued images to disk """
+        self._image_writer.shutdown()
 
     # - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
 
@@ -0,0 +1,118 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import mock
+
+from robot_skills.util import grammar_cache
+from robot_skills.util.grammar_cache import GrammarCache, CachedParser
+
+GRAMMAR = "T[A] -> ANSWER[A]\nANSWER['yes'] -> yes\nANSWER['no'] -> no"
+
+
+class FakeParser(object):
+    """ Stands in for CFGParser, it must be defined at module level to be pickled """
+    grammars_parsed = 0
+    sentences_parsed = 0
+
+    def __init__(self, grammar):
+        self.grammar = grammar
+
+    @classmethod
+    def fromstring(cls, grammar):
+        cls.grammars_parsed += 1
+        return cls(grammar)
+
+    def parse(self, target, sentence, debug=False):
+        FakeParser.sentences_parsed += 1
+        words = sentence.split() if not isinstance(sentence, list) else sentence
+        return {"target": target, "answers": words} if words[0] in ["yes", "no"] else False
+
+    def get_random_sentence(self, target):
+        return "yes"
+
+
+class TestGrammarCache(unittest.TestCase):
+    def setUp(self):
+        patcher = mock.patch.object(grammar_cache, "CFGParser", FakeParser)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        FakeParser.grammars_parsed = 0
+        FakeParser.sentences_parsed = 0
+
+        self.cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.cache_dir)
+
+    def test_disk_round_trip(self):
+        """
+        Check that a grammar parsed by one cache is loaded from disk by another one, unless the version changed
+        """
+        parser = GrammarCache(cache_dir=self.cache_dir).get_parser(GRAMMAR)
+        self.assertEqual(FakeParser.grammars_parsed, 1)
+
+        cache = GrammarCache(cache_dir=self.cache_dir)
+        loaded = cache.get_parser(GRAMMAR)
+        self.assertEqual(FakeParser.grammars_parsed, 1)
+        self.assertEqual(loaded.grammar, parser.grammar)
+        self.assertIs(cache.get_parser(GRAMMAR), loaded)
+        self.assertEqual(os.listdir(self.cache_dir),
+                         ["{}-{}.pickle".format(grammar_cache.grammar_hash(GRAMMAR), cache.version)])
+
+        with mock.patch.object(grammar_cache, "parser_version", return_value="v0-py2-0"):
+            GrammarCache(cache_dir=self.cache_dir).get_parser(GRAMMAR)
+        self.assertEqual(FakeParser.grammars_parsed, 2)
+
+    def test_lru_eviction(self):
+        """
+        Check that the least recently used parse result is dropped once max_parses is exceeded
+        """
+        cache = GrammarCache(cache_dir=None, max_parses=2)
+        cache.parse(GRAMMAR, "T", "yes")
+        cache.parse(GRAMMAR, "T", "no")
+        cache.parse(GRAMMAR, "T", "yes")  # Hit, "no" is the least recently used now
+        cache.parse(GRAMMAR, "T", "yes yes")
+        self.assertEqual((cache.hits, cache.misses, FakeParser.sentences_parsed), (1, 3, 3))
+
+        cache.parse(GRAMMAR, "T", "yes")
+        cache.parse(GRAMMAR, "T", "no")
+        self.assertEqual((cache.hits, cache.misses, FakeParser.sentences_parsed), (2, 4, 4))
+
+    def test_deepcopy_on_hit(self):
+        """
+        Check that modifying the returned semantics does not modify the cached semantics
+        """
+        cache = GrammarCache(cache_dir=None)
+        semantics = cache.parse(GRAMMAR, "T", "yes")
+        semantics["answers"].append("no")
+
+        self.assertEqual(cache.parse(GRAMMAR, "T", "yes"), {"target": "T", "answers": ["yes"]})
+        cache.parse(GRAMMAR, "T", "yes")["target"] = "U"
+        self.assertEqual(cache.parse(GRAMMAR, "T", "yes")["target"], "T")
+        self.assertEqual(FakeParser.sentences_parsed, 1)
+
+    def test_cached_parser(self):
+        """
+        Check that a CachedParser caches parse results and delegates everything else to the wrapped parser
+        """
+        cache = GrammarCache(cache_dir=None)
+        parser = cache.cached_parser(GRAMMAR)
+        self.assertIsInstance(parser, CachedParser)
+
+        self.assertEqual(parser.parse("T", "no"), {"target": "T", "answers": ["no"]})
+        self.assertEqual(parser.parse("T", ["no"]), {"target": "T", "answers": ["no"]})
+        self.assertIs(cache.parse(GRAMMAR, "T", "maybe not"), False)
+        self.assertEqual(FakeParser.sentences_parsed, 2)
+
+        # Parses with extra arguments are not cached
+        parser.parse("T", "no", debug=True)
+        self.assertEqual(FakeParser.sentences_parsed, 3)
+
+        parser.store_parse_result("T", "maybe", {"answers": ["maybe"]})
+        self.assertEqual(cache.parse(GRAMMAR, "T", "maybe"), {"answers": ["maybe"]})
+        self.assertEqual(parser.get_random_sentence("T"), "yes")
+        self.assertEqual(parser.grammar, GRAMMAR)
+
+
+if __name__ == '__main__':
+    unittest.main()
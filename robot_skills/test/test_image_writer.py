@@ -0,0 +1,61 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from robot_skills.util.image_writer import ImageWriter
+
+
+class TestImageWriter(unittest.TestCase):
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def test_write(self):
+        """
+        Check that queued images end up on disk after a flush
+        """
+        writer = ImageWriter(convert_command=[])
+        fname = os.path.join(self.path, "sub", "image")
+        self.assertTrue(writer.submit(fname, [1, 2, 3], "{}"))
+        self.assertTrue(writer.flush(timeout=5.0))
+        self.assertTrue(os.path.exists(fname + ".rgbd"))
+        self.assertTrue(os.path.exists(fname + ".json"))
+        self.assertEqual(writer.statistics["written"], 1)
+        writer.shutdown()
+
+    def test_drop_newest(self):
+        """
+        Check that new images are discarded if the queue is full
+        """
+        writer = ImageWriter(max_queue_size=1, num_workers=0, drop_policy=ImageWriter.DROP_NEWEST, convert_command=[])
+        results = [writer.submit(os.path.join(self.path, str(i)), [], "{}") for i in range(4)]
+        self.assertEqual(results, [True, False, False, False])
+        self.assertEqual(writer.statistics["dropped"], 3)
+        self.assertEqual(writer.statistics["queue_depth"], 1)
+        self.assertEqual(writer._queue[0][0], os.path.join(self.path, "0"))
+
+    def test_drop_oldest(self):
+        """
+        Check that the oldest queued image is discarded if the queue is full
+        """
+        writer = ImageWriter(max_queue_size=1, num_workers=0, drop_policy=ImageWriter.DROP_OLDEST, convert_command=[])
+        results = [writer.submit(os.path.join(self.path, str(i)), [], "{}") for i in range(4)]
+        self.assertTrue(all(results))
+        self.assertEqual(writer.statistics["dropped"], 3)
+        self.assertEqual(writer.statistics["queue_depth"], 1)
+        self.assertEqual(writer._queue[0][0], os.path.join(self.path, "3"))
+
+    def test_shutdown(self):
+        """
+        Check that images are no longer accepted after shutdown
+        """
+        writer = ImageWriter(convert_command=[])
+        writer.shutdown()
+        self.assertFalse(writer.submit(os.path.join(self.path, "image"), [], "{}"))
+
+
+if __name__ == '__main__':
+    unittest.main()
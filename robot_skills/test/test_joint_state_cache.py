@@ -0,0 +1,72 @@
+import threading
+import unittest
+
+import rospy
+from sensor_msgs.msg import JointState
+from std_msgs.msg import Header
+
+from robot_skills.util.exceptions import TimeOutException
+from robot_skills.util.joint_state_cache import JointStateCache
+
+
+def joint_state(stamp, position):
+    return JointState(header=Header(stamp=rospy.Time(stamp)), name=["torso_joint", "arm_joint"],
+                      position=[position, -position])
+
+
+class TestJointStateCache(unittest.TestCase):
+    def setUp(self):
+        self.now = 1000.0
+        self.cache = JointStateCache("/robot/joint_states", history_size=10, subscribe=False, clock=lambda: self.now)
+
+    def test_latest(self):
+        """
+        Check that the latest positions are returned without waiting for a new message
+        """
+        for i in range(3):
+            self.cache.add_message(joint_state(self.now - 0.02 + 0.01 * i, float(i)))
+
+        self.assertEqual(self.cache.get_positions(max_age=1.0, timeout=0.0), {"torso_joint": 2.0, "arm_joint": -2.0})
+        self.assertEqual(self.cache.get_closest(self.now - 0.019), {"torso_joint": 0.0, "arm_joint": -0.0})
+
+    def test_freshness(self):
+        """
+        Check that a read with a maximum age waits for a new message if the latest one arrived too long ago
+        """
+        self.cache.add_message(joint_state(self.now, 1.0))
+        self.now += 10.0
+        self.assertEqual(self.cache.get_positions(timeout=0.0)["torso_joint"], 1.0)
+        with self.assertRaises(TimeOutException):
+            self.cache.get_positions(max_age=0.5, timeout=0.05)
+
+        threading.Timer(0.05, lambda: self.cache.add_message(joint_state(self.now, 2.0))).start()
+        self.assertEqual(self.cache.get_positions(max_age=0.5, timeout=5.0)["torso_joint"], 2.0)
+
+    def test_clock_offset(self):
+        """
+        Check that the age is measured from the arrival, such that the clock of the publisher does not matter
+        """
+        self.cache.add_message(joint_state(self.now - 5.0, 1.0))
+        self.assertEqual(self.cache.get_sample(max_age=0.1, timeout=0.0), (self.now - 5.0, {"torso_joint": 1.0,
+                                                                                            "arm_joint": -1.0}))
+        self.cache.add_message(joint_state(self.now + 5.0, 2.0))
+        self.assertEqual(self.cache.get_positions(max_age=0.1, timeout=0.0)["torso_joint"], 2.0)
+
+    def test_unstamped(self):
+        """
+        Check that messages without a header stamp are stamped with their arrival
+        """
+        self.cache.add_message(joint_state(0.0, 1.0))
+        self.assertEqual(self.cache.get_sample(max_age=0.1, timeout=0.0)[0], self.now)
+
+    def test_empty(self):
+        """
+        Check that reading an empty cache times out
+        """
+        with self.assertRaises(TimeOutException):
+            self.cache.get_positions(timeout=0.01)
+        self.assertIsNone(self.cache.get_closest(0.0))
+
+
+if __name__ == '__main__':
+    unittest.main()
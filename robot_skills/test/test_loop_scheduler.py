@@ -0,0 +1,76 @@
+import threading
+import unittest
+
+from robot_skills.util.loop_scheduler import LoopScheduler
+
+
+class FakeClock(object):
+    """ Advances by a fixed step every time it is read, so the scheduler never waits for the wall clock """
+    def __init__(self, step=0.001):
+        self.now = 0.0
+        self.step = step
+
+    def __call__(self):
+        self.now += self.step
+        return self.now
+
+
+class TestLoopScheduler(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.scheduler = LoopScheduler(rate=100, max_wake_latency=0.0, clock=self.clock)
+
+    def test_no_drift(self):
+        """
+        Check that the deadlines are multiples of the period after the start, regardless of the time spent in an
+        iteration
+        """
+        start = self.clock.now
+        for i in range(1, 6):
+            self.clock.now += 0.004  # Work done in the iteration
+            self.assertFalse(self.scheduler.sleep())
+            self.assertAlmostEqual(self.clock.now - start, 0.01 * i + 0.004, delta=0.0025)
+
+        self.assertEqual((self.scheduler.timing.iterations, self.scheduler.timing.wakeups), (5, 0))
+        self.assertLessEqual(self.scheduler.timing.jitter_max, 0.0015)
+
+    def test_overrun(self):
+        """
+        Check that the deadlines missed by a long iteration are skipped and the overrun is counted
+        """
+        self.assertFalse(self.scheduler.sleep())
+        deadline = self.clock.now
+        self.clock.now += 0.025
+        self.assertFalse(self.scheduler.sleep())
+        self.assertFalse(self.scheduler.sleep())
+        self.assertAlmostEqual(self.clock.now, deadline + 0.03, delta=0.0025)
+
+        self.assertEqual(self.scheduler.timing.overruns, 1)
+        self.assertAlmostEqual(self.scheduler.timing.overrun_max, 0.015, delta=0.0025)
+
+    def test_notify(self):
+        """
+        Check that notify starts the next iteration right away without shifting the deadlines
+        """
+        self.assertFalse(self.scheduler.sleep())
+        deadline = self.clock.now
+        self.scheduler.notify()
+        self.assertTrue(self.scheduler.sleep())
+        self.assertLess(self.clock.now, deadline + 0.005)
+        self.assertFalse(self.scheduler.sleep())
+        self.assertAlmostEqual(self.clock.now, deadline + 0.01, delta=0.0025)
+
+        self.assertEqual((self.scheduler.timing.iterations, self.scheduler.timing.wakeups), (3, 1))
+
+    def test_notify_from_other_thread(self):
+        """
+        Check that a loop waiting on the wall clock is woken up by a notify from another thread
+        """
+        scheduler = LoopScheduler(rate=0.01, clock=FakeClock(step=0.0))
+        threading.Timer(0.05, scheduler.notify).start()
+        self.assertTrue(scheduler.sleep())
+        self.assertEqual(scheduler.timing.wakeups, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+import unittest
+
+import PyKDL as kdl
+
+from robot_skills.mockbot import ED, MockedTfListener
+from robot_skills.util.entity import Entity
+from robot_skills.util.kdl_conversions import VectorStamped
+
+
+class TestMockedED(unittest.TestCase):
+    def setUp(self):
+        self.ed = ED("mockbot", MockedTfListener())
+        self.ed._static_entities = {}
+        self.ed._dynamic_entities = {}
+        self.ed.populate(500, seed=1)
+
+    def test_deterministic(self):
+        """
+        Check that the same seed results in the same world
+        """
+        other = ED("mockbot", MockedTfListener())
+        other._static_entities = {}
+        other._dynamic_entities = {}
+        other.populate(500, seed=1)
+
+        self.assertEqual(sorted(self.ed._entities.keys()), sorted(other._entities.keys()))
+        for identifier, entity in self.ed._entities.items():
+            self.assertEqual(entity.pose.frame.p, other._entities[identifier].pose.frame.p)
+
+    def test_queries(self):
+        """
+        Check that the indexed queries return the same entities as filtering all entities
+        """
+        entities = self.ed._entities.values()
+        center = kdl.Vector(10.0, 10.0, 0.0)
+
+        self.assertEqual(len(self.ed.get_entities()), 500)
+        self.assertEqual(sorted(e.id for e in self.ed.get_entities(type="coke")),
+                         sorted(e.id for e in entities if e.type == "coke"))
+        self.assertEqual(sorted(e.id for e in self.ed.get_entities(center_point=VectorStamped(vector=center),
+                                                                   radius=2.0, ignore_z=True)),
+                         sorted(e.id for e in entities if e.distance_to_2d(center) <= 2.0))
+        self.assertEqual([e.id for e in self.ed.get_entities(id="coke_3")],
+                         [e.id for e in entities if e.id == "coke_3"])
+        self.assertEqual(self.ed.statistics["queries"], 4)
+
+    def test_changes(self):
+        """
+        Check that the index follows changes of the static and dynamic entities
+        """
+        entity = Entity("cup", "cup", "/map", kdl.Frame(kdl.Vector(50.0, 50.0, 0.0)), None, {}, [], 0)
+        self.ed._dynamic_entities["cup"] = entity
+        self.assertEqual(self.ed.get_entities(type="cup"), [entity])
+
+        self.ed.reset()
+        self.assertEqual(self.ed.get_entities(type="cup"), [])
+
+        self.ed._static_entities = {"cup": entity}
+        self.assertEqual(len(self.ed.get_entities()), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,182 @@
+import collections
+import threading
+import time
+import unittest
+
+from actionlib import GoalStatus
+import mock
+
+from robot_skills import robot_part
+from robot_skills.arms import Arm, ForceSensingArm
+from robot_skills.head import Head
+from robot_skills.util.kdl_conversions import VectorStamped
+from robot_skills.util.motion_monitor import MotionMonitor
+
+HeadFeedback = collections.namedtuple("HeadFeedback", ["at_setpoint"])
+
+ARM_PARAMS = {
+    "skills/arm/left/grasp_offset/": {"x": 0.0, "y": 0.0, "z": 0.0, "roll": 0.0, "pitch": 0.0, "yaw": 0.0},
+    "skills/arm/left/marker_to_grippoint": 0.0,
+    "skills/arm/left/base_offset": {"x": 0.0, "y": 0.0, "z": 0.0},
+    "skills/arm/joint_names": ["arm_lift_joint", "arm_flex_joint"],
+    "skills/torso/joint_names": ["torso_joint"],
+    "skills/arm/default_configurations": {"reset": [0.1, 0.2]},
+    "skills/arm/default_trajectories": {},
+}
+
+
+class MockedActionClient(object):
+    """
+    Stands in for actionlib.SimpleActionClient: after the duration of the motion, the feedback callback is called with
+    the feedback (if any) and the done callback with the terminal state (if any), from another thread
+    """
+    def __init__(self, name=None, action_type=None, duration=0.1, terminal_state=GoalStatus.SUCCEEDED, feedback=None):
+        self.duration = duration
+        self.terminal_state = terminal_state
+        self.feedback = feedback
+        self.done_time = None
+        self.goals = []
+        self._timer = None
+
+    def send_goal(self, goal, done_cb=None, active_cb=None, feedback_cb=None):
+        self.goals.append(goal)
+
+        def finish():
+            self.done_time = time.time()
+            if feedback_cb is not None and self.feedback is not None:
+                feedback_cb(self.feedback)
+            if done_cb is not None and self.terminal_state is not None:
+                done_cb(self.terminal_state, None)
+        self._timer = threading.Timer(self.duration, finish)
+        self._timer.start()
+
+    def cancel_goal(self):
+        # Like the SimpleActionClient, the callbacks of a goal that is cancelled or replaced are not called anymore
+        if self._timer is not None:
+            self._timer.cancel()
+
+    cancel_all_goals = cancel_goal
+
+
+class TestMotionMonitor(unittest.TestCase):
+    def setUp(self):
+        self.monitor = MotionMonitor()
+
+    def _done_callback(self, key):
+        return lambda terminal_state, result: self.monitor.set_done(key, terminal_state == GoalStatus.SUCCEEDED)
+
+    def test_wake_up_latency(self):
+        """
+        Check that a waiting caller continues right after the done callback instead of at the next poll
+        """
+        client = MockedActionClient(duration=0.1)
+        for _ in range(5):
+            self.monitor.start("joint_trajectory")
+            client.send_goal(None, done_cb=self._done_callback("joint_trajectory"))
+            self.assertTrue(self.monitor.wait(timeout=5.0))
+            self.assertLess(time.time() - client.done_time, 0.02)
+
+        self.assertTrue(self.monitor.succeeded)
+        self.assertEqual(self.monitor.dead_times.count, 5)
+        self.assertLess(self.monitor.dead_times.max, 0.02)
+
+    def test_multiple_motions(self):
+        """
+        Check that the waiter continues when all motions are done and reports a failed motion
+        """
+        self.monitor.start("grasp_precompute")
+        self.monitor.start("joint_trajectory")
+        MockedActionClient(duration=0.05, terminal_state=GoalStatus.ABORTED).send_goal(
+            None, done_cb=self._done_callback("grasp_precompute"))
+        self.assertFalse(self.monitor.wait(timeout=0.1))
+
+        self.monitor.set_done("joint_trajectory")
+        self.assertTrue(self.monitor.wait(timeout=0.1))
+        self.assertFalse(self.monitor.succeeded)
+
+    def test_cancel(self):
+        """
+        Check that cancelling wakes up the waiters and that waiting without motions does not record dead time
+        """
+        self.monitor.start("head_ref")
+        threading.Timer(0.05, self.monitor.cancel).start()
+        self.assertTrue(self.monitor.wait(timeout=5.0))
+        self.assertFalse(self.monitor.succeeded)
+
+        self.assertTrue(self.monitor.wait(timeout=5.0))
+        self.assertEqual(self.monitor.dead_times.count, 1)
+
+
+class TestRobotPartMotions(unittest.TestCase):
+    """ Waits for the motions of robot parts of which the action clients are mocked """
+    def setUp(self):
+        def load_param(part, param_name, default=None):
+            return ARM_PARAMS.get(param_name, default)
+
+        for patcher in [mock.patch.object(robot_part.actionlib, "SimpleActionClient", MockedActionClient),
+                        mock.patch.object(robot_part.RobotPart, "load_param", load_param),
+                        mock.patch.object(robot_part.RobotPart, "subscribe_hardware_status"),
+                        mock.patch("rospy.Subscriber"),
+                        mock.patch("rospy.Publisher")]:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        self.joint_states = {"torso_joint": 0.3, "arm_lift_joint": 0.1, "arm_lift_joint_left": 0.1,
+                             "arm_flex_joint_left": 0.0}
+
+    def _arm(self, arm_type=Arm):
+        return arm_type("robot", None, get_joint_states=lambda: dict(self.joint_states), side="left")
+
+    def test_head(self):
+        """
+        Check that Head.wait_for_motion_done returns when the feedback reports the setpoint and fails on a preempt
+        """
+        head = Head("robot", None)
+        self.assertEqual(head._settle_time, 0.3)
+        head._settle_time = 0.0
+
+        client = head._ac_head_ref_action
+        client.terminal_state = None  # The head keeps tracking the target
+        client.feedback = HeadFeedback(at_setpoint=True)
+        head.look_at_point(VectorStamped(1.0, 0.0, 1.0, frame_id="/robot/base_link"))
+        self.assertTrue(head.wait_for_motion_done(timeout=5.0))
+        self.assertLess(time.time() - client.done_time, 0.02)
+
+        client.terminal_state = GoalStatus.PREEMPTED
+        client.feedback = None
+        head.look_at_point(VectorStamped(1.0, 0.0, 1.0, frame_id="/robot/base_link"))
+        self.assertFalse(head.wait_for_motion_done(timeout=5.0))
+        self.assertFalse(head.wait_for_motion_done(timeout=5.0))  # No goal anymore
+
+    def test_arm(self):
+        """
+        Check that Arm.wait_for_motion_done returns when the joint trajectory is done and cancels on a timeout
+        """
+        arm = self._arm()
+        arm._ac_joint_traj.duration = 0.1
+        self.assertFalse(arm.send_joint_goal("reset", timeout=0.0))
+        self.assertTrue(arm.wait_for_motion_done(timeout=5.0))
+        self.assertLess(time.time() - arm._ac_joint_traj.done_time, 0.02)
+
+        arm._ac_joint_traj.duration = 5.0
+        arm.send_joint_goal("reset", timeout=0.0)
+        self.assertFalse(arm.wait_for_motion_done(timeout=0.05, cancel=True))
+        self.assertTrue(arm.wait_for_motion_done(timeout=0.0))
+
+    def test_force_sensing_arm(self):
+        """
+        Check that waiting after move_down_until_force_sensor_edge_up waits for the retract motion
+        """
+        arm = self._arm(ForceSensingArm)
+        arm.force_sensor.wait_for_edge_up = mock.MagicMock()
+        arm._ac_joint_traj.duration = 0.1
+
+        arm.move_down_until_force_sensor_edge_up(timeout=1.0)
+        self.assertEqual(len(arm._ac_joint_traj.goals), 2)
+        self.assertFalse(arm.wait_for_motion_done(timeout=0.0))
+        self.assertTrue(arm.wait_for_motion_done(timeout=5.0))
+        self.assertLess(time.time() - arm._ac_joint_traj.done_time, 0.02)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,112 @@
+import imp
+import os
+import shutil
+import tempfile
+import unittest
+
+import mock
+from geometry_msgs.msg import Point, Pose, PoseWithCovariance
+from nav_msgs.msg import Odometry
+import PyKDL as kdl
+import rospy
+
+from robot_skills.util.loop_scheduler import LoopTiming
+from robot_skills.util.nav_analyzer import NavAnalyzer
+
+query_nav_metrics = imp.load_source(
+    "query_nav_metrics", os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripts",
+                                      "query_nav_metrics"))
+
+
+def odometry(x, y):
+    return Odometry(pose=PoseWithCovariance(pose=Pose(position=Point(x, y, 0.0))))
+
+
+def setUpModule():
+    # The analyzer uses the rospy clock, which follows the wall clock once initialized without a node
+    rospy.rostime.set_rostime_initialized(True)
+
+
+class TestNavAnalyzer(unittest.TestCase):
+    def setUp(self):
+        patcher = mock.patch("rospy.Subscriber")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.path)
+
+    def _analyzer(self, robot_name, **kwargs):
+        analyzer = NavAnalyzer(robot_name, path=self.path, period=0.0, **kwargs)
+
+        def close():
+            for handler in list(analyzer._log.handlers):
+                handler.close()
+                analyzer._log.removeHandler(handler)
+        self.addCleanup(close)
+        return analyzer
+
+    def _drive(self, analyzer, index, result):
+        """ Drives 2 meters along the x axis with two plans, one tick and one wakeup of the control loop """
+        analyzer.odomCallback(odometry(0.0, 0.0))
+        analyzer.start_measurement(kdl.Frame(kdl.Vector(0.0, float(index), 0.0)))
+        analyzer.count_plan()
+        analyzer.odomCallback(odometry(1.0, 0.0))
+        analyzer.count_plan()
+        analyzer.odomCallback(odometry(2.0, 0.0))
+
+        timing = LoopTiming()
+        timing.add_tick(0.001)
+        timing.add_wakeup()
+        analyzer.add_loop_timing("execute_plan", timing)
+        analyzer.stop_measurement(kdl.Frame(kdl.Vector(2.0, float(index), 0.0)), result)
+
+    def test_rotation(self):
+        """
+        Check that all goal records can be read back by query_nav_metrics after the log has been rotated
+        """
+        analyzer = self._analyzer("rotating_robot", max_bytes=4096, backup_count=100)
+        goals = 40
+        for index in range(goals):
+            self._drive(analyzer, index, "succeeded" if index % 4 else "unreachable")
+
+        files = query_nav_metrics.log_files([self.path])
+        self.assertGreater(len(files), 1)
+        self.assertTrue(all(os.path.getsize(log_file) <= 4096 for log_file in files))
+
+        records = list(query_nav_metrics.read_goals(files))
+        self.assertEqual(len(records), goals)
+        self.assertEqual(sorted(record["startpose"][1] for record in records), [float(i) for i in range(goals)])
+        for record in records:
+            self.assertEqual(record["type"], "goal")
+            self.assertEqual(record["robot"], "rotating_robot")
+            self.assertAlmostEqual(record["distance"], 2.0)
+            self.assertEqual((record["plans"], record["replans"]), (2, 1))
+            self.assertEqual(record["endpose"][0], 2.0)
+            self.assertEqual(record["loops"]["execute_plan"]["iterations"], 2)
+
+        groups = query_nav_metrics.aggregate(records, "result")
+        self.assertEqual(len(groups["succeeded"]["duration"]), 30)
+        self.assertEqual(len(groups["unreachable"]["duration"]), 10)
+        self.assertAlmostEqual(groups["succeeded"]["distance"].sum(), 60.0)
+        self.assertEqual(query_nav_metrics.aggregate(records, None)["all"]["succeeded"].mean(), 0.75)
+
+    def test_filters(self):
+        """
+        Check that goals can be selected by robot and by time and that aborted goals are not recorded
+        """
+        self._drive(self._analyzer("robot_a"), 0, "succeeded")
+        analyzer = self._analyzer("robot_b")
+        analyzer.start_measurement(kdl.Frame())
+        analyzer.abort_measurement()
+        self._drive(analyzer, 1, "succeeded")
+
+        files = query_nav_metrics.log_files([self.path])
+        self.assertEqual([record["robot"] for record in query_nav_metrics.read_goals(files, robot="robot_b")],
+                         ["robot_b"])
+        self.assertEqual(len(list(query_nav_metrics.read_goals(files))), 2)
+        self.assertEqual(list(query_nav_metrics.read_goals(files, since=query_nav_metrics.parse_since("-1h"))), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
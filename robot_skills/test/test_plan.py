@@ -0,0 +1,77 @@
+import math
+import random
+import unittest
+
+import PyKDL as kdl
+from geometry_msgs.msg import Point, Pose, PoseStamped
+
+from robot_skills.util.entity import Entity
+from robot_skills.util.kdl_conversions import VectorStamped
+from robot_skills.util.plan import Plan
+from robot_skills.util.volume import BoxVolume
+
+
+def random_walk(size, seed=0):
+    rng = random.Random(seed)
+    points = [(0.0, 0.0, 0.0)]
+    for _ in range(size - 1):
+        x, y, _ = points[-1]
+        points.append((x + rng.uniform(-0.1, 0.1), y + rng.uniform(-0.1, 0.1), 0.0))
+    return points
+
+
+class TestPlan(unittest.TestCase):
+    def setUp(self):
+        self.points = random_walk(1000)
+        self.plan = Plan(self.points)
+
+    def test_length(self):
+        """
+        Check the length against summing the segments one by one, also for a plan of pose messages
+        """
+        length = sum(math.hypot(b[0] - a[0], b[1] - a[1]) for a, b in zip(self.points[:-1], self.points[1:]))
+        self.assertAlmostEqual(self.plan.length, length)
+
+        poses = [PoseStamped(pose=Pose(position=Point(x, y, z))) for x, y, z in self.points]
+        self.assertAlmostEqual(Plan.from_pose_stamped_msgs(poses).length, length)
+        self.assertEqual(Plan([]).length, 0.0)
+
+    def test_resample(self):
+        """
+        Check that the resampled points lie on the plan at the requested spacing
+        """
+        plan = Plan([(0, 0, 0), (1, 0, 0), (1, 0, 0), (1, 2, 0)]).resample(0.1, include_end=True)
+        self.assertEqual(len(plan), 31)
+        for i, (x, y, z) in enumerate(plan.points):
+            self.assertAlmostEqual(x, min(0.1 * i, 1.0))
+            self.assertAlmostEqual(y, max(0.1 * i - 1.0, 0.0))
+        self.assertAlmostEqual(plan.length, 3.0)
+        self.assertEqual(len(Plan(self.points).resample(0.05)), int(self.plan.length / 0.05) + 1)
+
+    def test_nearest(self):
+        """
+        Check the bulk nearest point queries against a per point search
+        """
+        queries = random_walk(50, seed=1)
+        indices, distances = self.plan.nearest_many(queries, chunk_size=16)
+        for query, index, distance in zip(queries, indices, distances):
+            expected = min(range(len(self.points)), key=lambda i: math.hypot(self.points[i][0] - query[0],
+                                                                             self.points[i][1] - query[1]))
+            self.assertEqual(self.plan.nearest(query), (expected, distance))
+            self.assertEqual(index, expected)
+
+    def test_room_indices(self):
+        """
+        Check the room labels against checking every point with Entity.in_volume
+        """
+        box = BoxVolume(kdl.Vector(0, 0, -1), kdl.Vector(1, 1, 1))
+        rooms = [Entity("room_{}".format(i), "room", "/map", kdl.Frame(kdl.Vector(x, y, 0)), None, {"in": box}, [], 0)
+                 for i, (x, y) in enumerate([(-1, -1), (-1, 0), (0, -1), (0, 0), (-0.5, -0.5)])]
+        labels = self.plan.room_indices(rooms)
+        for point, label in zip(self.points, labels):
+            inside = [i for i, room in enumerate(rooms) if room.in_volume(VectorStamped(*point, frame_id="/map"), "in")]
+            self.assertEqual(label, inside[0] if inside else -1)
+
+
+if __name__ == '__main__':
+    unittest.main()
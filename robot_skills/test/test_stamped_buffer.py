@@ -0,0 +1,59 @@
+import threading
+import unittest
+
+from robot_skills.util.stamped_buffer import StampedBuffer
+
+
+class TestStampedBuffer(unittest.TestCase):
+    def setUp(self):
+        self.buffer = StampedBuffer(max_size=3)
+        for stamp in range(5):
+            self.buffer.add(float(stamp), stamp)
+
+    def test_bounded(self):
+        """
+        Check that only the most recent items are kept
+        """
+        self.assertEqual(len(self.buffer), 3)
+        self.assertEqual(self.buffer.closest_to(0.0), 2)
+
+    def test_lookups(self):
+        """
+        Check the latest, newer than and closest to lookups
+        """
+        self.assertEqual(self.buffer.latest(), 4)
+        self.assertEqual(self.buffer.newer_than(2.5), 3)
+        self.assertEqual(self.buffer.closest_to(3.4), 3)
+        self.assertIsNone(self.buffer.newer_than(4.0))
+
+    def test_closest_to_key(self):
+        """
+        Check that closest to compares the stamps returned by the key, e.g. header stamps of items added on arrival
+        """
+        buffer = StampedBuffer()
+        for arrival, header_stamp in [(10.0, 1.0), (11.0, 2.0), (12.0, 3.0)]:
+            buffer.add(arrival, (header_stamp, arrival))
+        self.assertEqual(buffer.closest_to(2.1, key=lambda item: item[0]), (2.0, 11.0))
+        self.assertEqual(buffer.closest_to(10.9), (2.0, 11.0))
+        self.assertEqual(buffer.newer_than(11.0), (3.0, 12.0))
+
+    def test_wait(self):
+        """
+        Check that callers waiting for a newer item are woken up when it is added
+        """
+        timer = threading.Timer(0.1, self.buffer.add, args=(5.0, 5))
+        timer.start()
+        self.assertEqual(self.buffer.newer_than(4.0, timeout=5.0), 5)
+        timer.join()
+
+    def test_empty(self):
+        """
+        Check that an empty buffer returns None
+        """
+        buffer = StampedBuffer()
+        self.assertIsNone(buffer.latest())
+        self.assertIsNone(buffer.closest_to(1.0))
+
+
+if __name__ == '__main__':
+    unittest.main()
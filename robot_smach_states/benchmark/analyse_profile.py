@@ -0,0 +1,107 @@
+#! /usr/bin/env python
+
+# System
+import argparse
+from collections import defaultdict
+import json
+
+# ROS
+import numpy as np
+
+
+def read_records(log_files):
+    """
+    Reads the records written by robot_smach_states.util.profiler.StateProfiler
+
+    :param log_files: list of paths
+    :return: list of dicts
+    """
+    records = []
+    for log_file in log_files:
+        with open(log_file) as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    records.append(json.loads(line))
+    return records
+
+
+def aggregate(records):
+    """
+    Aggregates the records of all runs per state path
+
+    :param records: list of records
+    :return: dict mapping paths to dicts with the durations, outcomes and calls
+    """
+    states = defaultdict(lambda: {"durations": [], "outcomes": defaultdict(int), "calls": defaultdict(int)})
+    for record in records:
+        state = states[record["path"]]
+        state["durations"].append(record["exit"] - record["enter"])
+        state["outcomes"][str(record["outcome"])] += 1
+        for call, count in record["calls"].items():
+            state["calls"][call] += count
+    return states
+
+
+def folded_stacks(states):
+    """
+    Computes the self time of each state, i.e., its total time minus the total time of its children, in the folded
+    stack format used by flame graph tools (e.g. flamegraph.pl or speedscope): 'SM;STATE;CHILD <milliseconds>'
+
+    :param states: result of aggregate
+    :return: list of lines
+    """
+    totals = {path: sum(state["durations"]) for path, state in states.items()}
+    children_totals = defaultdict(float)
+    for path, total in totals.items():
+        if "/" in path:
+            children_totals[path.rsplit("/", 1)[0]] += total
+
+    lines = []
+    for path in sorted(totals):
+        # Children of a Concurrence overlap, so their total time can exceed the time of the parent
+        self_time = max(0.0, totals[path] - children_totals[path])
+        lines.append("{} {}".format(path.replace("/", ";"), int(round(self_time * 1000))))
+    return lines
+
+
+def print_summary(states, runs, sort):
+    print("{} runs, {} states".format(runs, len(states)))
+    print("{:<60} {:>6} {:>10} {:>10} {:>10} {:>10} {:>10} {:>6}".format(
+        "state", "count", "total [s]", "p50 [s]", "p90 [s]", "p99 [s]", "max [s]", "calls"))
+
+    def total(item):
+        return sum(item[1]["durations"])
+
+    items = sorted(states.items(), key=total if sort == "total" else lambda item: item[0],
+                   reverse=sort == "total")
+    for path, state in items:
+        durations = np.array(state["durations"])
+        p50, p90, p99 = np.percentile(durations, [50, 90, 99])
+        print("{:<60} {:>6} {:>10.3f} {:>10.3f} {:>10.3f} {:>10.3f} {:>10.3f} {:>6}".format(
+            path, len(durations), durations.sum(), p50, p90, p99, durations.max(), sum(state["calls"].values())))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Aggregates the state machine profiles of one or more runs, see "
+                                                 "robot_smach_states.util.profiler")
+    parser.add_argument("log_files", nargs="+", help="Log files written by the StateProfiler")
+    parser.add_argument("--sort", choices=["total", "path"], default="total")
+    parser.add_argument("--folded", help="Write the self time per state in folded stack format to this file, to "
+                                         "create a flame graph")
+    parser.add_argument("--calls", action="store_true", help="Also list the service calls and action goals per state")
+    args = parser.parse_args()
+
+    records = read_records(args.log_files)
+    states = aggregate(records)
+    print_summary(states, len(set(record["run"] for record in records)), args.sort)
+
+    if args.calls:
+        print("")
+        for path in sorted(states):
+            for call, count in sorted(states[path]["calls"].items()):
+                print("{:<60} {:<60} {:>6}".format(path, call, count))
+
+    if args.folded:
+        with open(args.folded, "w") as f:
+            f.write("\n".join(folded_stacks(states)) + "\n")
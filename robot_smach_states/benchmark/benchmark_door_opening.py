@@ -0,0 +1,134 @@
+#! /usr/bin/env python
+
+# System
+import argparse
+import math
+import time
+
+# ROS
+from geometry_msgs.msg import Point, Pose, PoseStamped
+import mock
+import numpy as np
+import PyKDL as kdl
+from sensor_msgs.msg import LaserScan
+
+# TU/e Robotics
+from robot_skills.robot import Robot
+from robot_skills.util.geometry import kdl_frame_to_matrix
+from robot_smach_states.navigation.door_opening import ForceDriveToTouchDoor
+
+
+class SimulatedTfListener(object):
+    """ Applies a fixed laser to base_link transform. Every transform lookup costs 'latency' seconds """
+    def __init__(self, frame, latency):
+        self._frame = frame
+        self._matrix = kdl_frame_to_matrix(frame)
+        self._latency = latency
+        self.lookups = 0
+
+    def waitForTransform(self, *args, **kwargs):
+        self.lookups += 1
+        time.sleep(self._latency)
+
+    def transformPose(self, frame_id, pose_stamped):
+        p = pose_stamped.pose.position
+        v = self._frame * kdl.Vector(p.x, p.y, p.z)
+        return PoseStamped(pose_stamped.header, Pose(position=Point(v.x(), v.y(), v.z())))
+
+    def asMatrix(self, frame_id, header):
+        return self._matrix
+
+
+class BenchmarkRobot(Robot):
+    """ Only provides the tf functionality of the Robot """
+    def __init__(self, tf_listener):
+        self.robot_name = "benchmark"
+        self.tf_listener = tf_listener
+
+
+def synthetic_scan(beams, wall_distance=0.8, door_width=0.9):
+    """ Scan of a wall in front of the robot with a slightly opened door at the left """
+    scan = LaserScan()
+    scan.header.frame_id = "benchmark/base_laser"
+    scan.angle_min, scan.angle_max = -2.0, 2.0
+    angles = np.linspace(scan.angle_min, scan.angle_max, beams)
+    ranges = wall_distance / np.abs(np.cos(angles))
+    ranges[(angles > 0.1) & (angles < 0.1 + door_width)] *= 1.1
+    scan.ranges = np.minimum(ranges, 10.0).tolist()
+    return scan
+
+
+def per_point_scan_to_base_link(robot, scan):
+    """ Reference implementation: one tf lookup per laser point """
+    angles = np.linspace(scan.angle_min, scan.angle_max, len(scan.ranges))
+    X = scan.ranges * np.cos(angles)
+    Y = scan.ranges * np.sin(angles)
+    posestampeds = [PoseStamped(scan.header, Pose(position=Point(x, y, 0))) for (x, y) in zip(X, Y)]
+    in_baselink = [robot.tf_transform_pose(ps, 'benchmark/base_link') for ps in posestampeds]
+    return np.array([[ps.pose.position.x for ps in in_baselink], [ps.pose.position.y for ps in in_baselink]]).T
+
+
+def sweep_drive_distance(footprint_points, scan_points, stepsize):
+    """ Reference implementation: brute force sweep over the forward travels """
+    def calc(forward_travel):
+        shifted = footprint_points + np.array([forward_travel, 0])
+        best = None
+        for point in shifted:
+            distances = np.hypot(scan_points[:, 0] - point[0], scan_points[:, 1] - point[1])
+            index = np.argmin(distances)
+            if best is None or distances[index] < best[1]:
+                best = (point - np.array([forward_travel, 0]), distances[index], scan_points[index])
+        return best
+
+    forward_travels = np.arange(0, 1, stepsize)
+    results = map(calc, forward_travels)
+    index = np.argmin([r[1] for r in results])
+    return results[index][0], forward_travels[index], results[index][2]
+
+
+def timed(func, repeat):
+    start = time.time()
+    for _ in range(repeat):
+        result = func()
+    return result, (time.time() - start) / repeat
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare per point and batched laser scan transformation and the "
+                                                 "brute force and vectorized drive distance computation of "
+                                                 "ForceDriveToTouchDoor on synthetic scans")
+    parser.add_argument("--beams", type=int, nargs="+", default=[180, 600, 1080])
+    parser.add_argument("--tf-latency", type=float, default=0.0005, help="Simulated duration of a tf lookup [s]")
+    parser.add_argument("--stepsize", type=float, default=0.01)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    tf_listener = SimulatedTfListener(kdl.Frame(kdl.Rotation.RPY(0, 0, 0.01), kdl.Vector(0.3, 0.0, 0.2)),
+                                      args.tf_latency)
+    robot = BenchmarkRobot(tf_listener)
+    with mock.patch("rospy.Publisher"):
+        state = ForceDriveToTouchDoor(robot)
+
+    footprint = np.array([[0.3, 0.25], [0.35, 0.0], [0.3, -0.25], [-0.3, -0.25], [-0.3, 0.25]])
+    footprint = state.select_frontside_of_footprint(footprint)
+
+    print("{:>6} {:>12} {:>12} {:>12} {:>12} {:>12} {:>12}".format(
+        "beams", "tf_single", "tf_batch", "lookups", "sweep", "vectorized", "speedup"))
+    for beams in args.beams:
+        scan = synthetic_scan(beams)
+
+        tf_listener.lookups = 0
+        single, single_time = timed(lambda: per_point_scan_to_base_link(robot, scan), args.repeat)
+        single_lookups = tf_listener.lookups / args.repeat
+        batch, batch_time = timed(lambda: state.scan_to_base_link_points(scan), args.repeat)
+        assert np.allclose(single, batch), "Transformed scans differ"
+
+        scan_points = state.select_scanpoints_in_front_of_footprint(batch, footprint)
+        sweep, sweep_time = timed(lambda: sweep_drive_distance(footprint, scan_points, args.stepsize), args.repeat)
+        vectorized, vectorized_time = timed(
+            lambda: state.find_drive_distance_to_first_obstacle(footprint, scan_points, args.stepsize), args.repeat)
+        assert math.fabs(sweep[1] - vectorized[1]) < 1e-9, "Drive distances differ"
+
+        print("{:>6} {:>12.4f} {:>12.4f} {:>12} {:>12.4f} {:>12.4f} {:>11.1f}x".format(
+            beams, single_time, batch_time, "{}/1".format(single_lookups), sweep_time, vectorized_time,
+            sweep_time / vectorized_time))
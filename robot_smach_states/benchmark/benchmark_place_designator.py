@@ -0,0 +1,121 @@
+#! /usr/bin/env python
+
+# System
+import argparse
+from collections import defaultdict
+import random
+import time
+
+# ROS
+import PyKDL as kdl
+import rospy
+
+# TU/e Robotics
+from robot_skills.mockbot import Mockbot
+from robot_skills.util.entity import Entity
+from robot_skills.util.kdl_conversions import FrameStamped
+from robot_skills.util.shape import RightPrism
+from robot_smach_states.manipulation.place_designator import EmptySpotDesignator
+from robot_smach_states.util import designators as ds
+
+
+def create_table(length, width):
+    """ Returns a table entity of the given size [m], its edges provide the candidate spots """
+    hull = [kdl.Vector(-length / 2, -width / 2, 0), kdl.Vector(length / 2, -width / 2, 0),
+            kdl.Vector(length / 2, width / 2, 0), kdl.Vector(-length / 2, width / 2, 0)]
+    return Entity("table", "table", "/map", kdl.Frame(kdl.Vector(2.0, 0.0, 0.0)), RightPrism(hull, 0.0, 0.75), {},
+                  [], 0)
+
+
+def create_items(table, count, seed):
+    """ Returns entities scattered over the table and around it """
+    rng = random.Random(seed)
+    hull = table.shape.convex_hull
+    half_length, half_width = hull[2].x() + 0.2, hull[2].y() + 0.2
+    return [Entity("item_{}".format(i), "coke", "/map",
+                   kdl.Frame(table._pose.p + kdl.Vector(rng.uniform(-half_length, half_length),
+                                                        rng.uniform(-half_width, half_width), 0.8)),
+                   None, {}, [], 0)
+            for i in range(count)]
+
+
+def setup_robot(table, items, ed_latency, planner_latency, failure_rate, seed, calls):
+    """
+    Creates a Mockbot of which ED returns the table and the items and of which the planner fails for a fraction of
+    the spots. Both sleep to emulate their service latency.
+    """
+    robot = Mockbot()
+    robot.base.get_location = lambda: FrameStamped(kdl.Frame(), "/map")
+    entities = [table] + items
+    rng = random.Random(seed)
+    unreachable = {}
+
+    def get_entities(type="", center_point=None, radius=float('inf'), id="", ignore_z=False):
+        calls["ed.get_entities"] += 1
+        time.sleep(ed_latency)
+        if center_point is None or radius == float('inf'):
+            return list(entities)
+        return [e for e in entities if e.distance_to_3d(center_point.vector) <= radius]
+
+    def get_plan(position_constraint):
+        calls["base.global_planner.getPlan"] += 1
+        time.sleep(planner_latency)
+        constraint = position_constraint.constraint
+        if constraint not in unreachable:
+            unreachable[constraint] = rng.random() < failure_rate
+        return None if unreachable[constraint] else ["pose"] * 10
+
+    robot.ed.get_entities = get_entities
+    robot.base.global_planner.getPlan = get_plan
+    return robot
+
+
+def per_spot_snapshot(designator):
+    """ Makes the designator query ED for every spot, as it did before the scene snapshot """
+    designator._scene_snapshot = lambda frames_stamped, surface_entity: None
+
+
+def benchmark(table_length, args, cached):
+    """ Resolves the designator twice from the same pose and returns the durations and the service calls """
+    calls = defaultdict(int)
+    table = create_table(table_length, 0.6)
+    items = create_items(table, args.items, args.seed)
+    robot = setup_robot(table, items, args.ed_latency, args.planner_latency, args.failure_rate, args.seed, calls)
+    arm = ds.ArmDesignator(robot, {'required_arm_name': 'leftArm'})
+
+    designator = EmptySpotDesignator(robot, ds.Designator(table), arm)
+    if not cached:
+        per_spot_snapshot(designator)
+
+    candidates = len(designator._determine_points_of_interest(table._pose, 0.75, table.shape.convex_hull))
+    durations = []
+    for _ in range(2):
+        if not cached:
+            designator._plan_lengths = {}
+        start = time.time()
+        designator.resolve()
+        durations.append(time.time() - start)
+    return candidates, durations, calls
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measures the resolve time of the EmptySpotDesignator versus the "
+                                                 "number of candidate spots, with mocked ED and planner latencies")
+    parser.add_argument("--table-lengths", type=float, nargs="+", default=[0.6, 1.2, 2.4, 4.8])
+    parser.add_argument("--items", type=int, default=20, help="Number of items on and around the table")
+    parser.add_argument("--ed-latency", type=float, default=0.01, help="Duration [s] of an ED query")
+    parser.add_argument("--planner-latency", type=float, default=0.05, help="Duration [s] of a plan request")
+    parser.add_argument("--failure-rate", type=float, default=0.5, help="Fraction of the spots that is unreachable")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rospy.init_node("benchmark_place_designator", anonymous=True)
+
+    print("{:>10} {:>10} {:>12} {:>12} {:>8} {:>8}".format(
+        "variant", "candidates", "first [ms]", "second [ms]", "ed", "plans"))
+    for table_length in args.table_lengths:
+        for name, cached in [("per_spot", False), ("snapshot", True)]:
+            candidates, durations, calls = benchmark(table_length, args, cached)
+            print("{:>10} {:>10} {:>12.1f} {:>12.1f} {:>8} {:>8}".format(
+                name, candidates, durations[0] * 1000, durations[1] * 1000,
+                calls["ed.get_entities"], calls["base.global_planner.getPlan"]))
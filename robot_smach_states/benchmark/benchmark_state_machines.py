@@ -0,0 +1,282 @@
+#! /usr/bin/env python
+
+# System
+import argparse
+from collections import defaultdict
+import importlib
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+# ROS
+import rospy
+import smach
+
+# TU/e Robotics
+from robot_skills import arms
+from robot_skills.classification_result import ClassificationResult
+from robot_skills.mockbot import Mockbot
+from robot_smach_states.human_interaction import Say
+from robot_smach_states.manipulation import Grab, HandoverToHuman
+from robot_smach_states.navigation import NavigateToWaypoint
+from robot_smach_states.util import designators as ds
+from robot_smach_states.util.profiler import StateProfiler
+from robot_smach_states.world_model import Inspect
+
+# Benchmark
+from analyse_profile import aggregate, read_records
+
+
+# Deterministic latencies [s] of mocked robot calls, 'part.method' or 'part.attribute.method'
+DEFAULT_LATENCIES = {
+    "ed.get_entities": 0.002,
+    "ed.update_kinect": 0.05,
+    "ed.classify": 0.02,
+    "base.global_planner.getPlan": 0.01,
+    "speech.speak": 0.001,
+}
+
+# World model calls that are counted
+ED_CALLS = ["get_entities", "get_entity", "get_closest_entity", "get_closest_possible_person_entity",
+            "get_closest_laser_entity", "get_entity_info", "update_entity", "update_entities", "remove_entities",
+            "update_kinect", "segment_kinect", "classify", "detect_people", "reset"]
+
+
+class BenchmarkTimeout(Exception):
+    pass
+
+
+def gpsr_sequence(robot):
+    """ GPSR-style sequence: go to a waypoint, inspect a cabinet, grab an item and hand it over """
+    arm = ds.UnoccupiedArmDesignator(robot, arm_properties={"required_trajectories": ["prepare_grasp"],
+                                                            "required_goals": ["carrying_pose", "handover_to_human"],
+                                                            "required_gripper_types": [arms.GripperTypes.GRASPING]},
+                                     name="arm")
+    waypoint = ds.EntityByIdDesignator(robot, id="test_waypoint_1", name="waypoint")
+    cabinet = ds.EntityByIdDesignator(robot, id="cabinet", name="cabinet")
+    segmented = ds.VariableDesignator([], resolve_type=[ClassificationResult], name="segmented")
+    item = ds.EdEntityDesignator(robot, type="coke", name="item")
+
+    sm = smach.StateMachine(outcomes=["Done", "Aborted"])
+    with sm:
+        smach.StateMachine.add("SAY_START", Say(robot, "Which item should I bring?", block=False),
+                               transitions={"spoken": "NAVIGATE_TO_WAYPOINT"})
+        smach.StateMachine.add("NAVIGATE_TO_WAYPOINT", NavigateToWaypoint(robot, waypoint),
+                               transitions={"arrived": "INSPECT",
+                                            "unreachable": "Aborted",
+                                            "goal_not_defined": "Aborted"})
+        smach.StateMachine.add("INSPECT", Inspect(robot, cabinet, objectIDsDes=segmented),
+                               transitions={"done": "GRAB",
+                                            "failed": "Aborted"})
+        smach.StateMachine.add("GRAB", Grab(robot, item, arm),
+                               transitions={"done": "HANDOVER",
+                                            "failed": "Aborted"})
+        smach.StateMachine.add("HANDOVER", HandoverToHuman(robot, arm),
+                               transitions={"succeeded": "Done",
+                                            "failed": "Aborted"})
+    return sm
+
+
+def import_builder(module_name, builder_name):
+    """ Returns a function that imports the builder of a challenge state machine when called """
+    def build(robot):
+        module = importlib.import_module(module_name)
+        return getattr(module, builder_name)(robot)
+    return build
+
+
+SCENARIOS = {
+    "gpsr_sequence": gpsr_sequence,
+    "cleanup": import_builder("challenge_cleanup.cleanup", "setup_statemachine"),
+    "storing_groceries": import_builder("challenge_storing_groceries.storing_groceries", "StoringGroceries"),
+}
+
+
+def add_latency(robot, path, latency, calls):
+    """
+    Replaces a (mocked) method of the robot by one that sleeps for latency and counts the calls
+
+    :param robot: Mockbot
+    :param path: 'part.method' or 'part.attribute.method'
+    :param latency: duration [s] of each call
+    :param calls: dict in which the number of calls is counted, keyed by path
+    """
+    owner_path, method_name = path.rsplit(".", 1)
+    owner = robot
+    for attr in owner_path.split("."):
+        owner = getattr(owner, attr)
+    method = getattr(owner, method_name)
+
+    def wrapper(*args, **kwargs):
+        calls[path] += 1
+        time.sleep(latency)
+        return method(*args, **kwargs)
+
+    setattr(owner, method_name, wrapper)
+
+
+class DeadlineProfiler(StateProfiler):
+    """ StateProfiler that raises a BenchmarkTimeout when a state is entered after the deadline """
+    def __init__(self, log_file, deadline, run_id=None):
+        """
+        Constructor
+
+        :param log_file: (str) path of the log file
+        :param deadline: (float) wall time after which no new states are entered
+        :param run_id: (str) identifies this run in the log file
+        """
+        super(DeadlineProfiler, self).__init__(log_file, run_id=run_id)
+        self.deadline = deadline
+
+    def _execute(self, path, execute, *args, **kwargs):
+        if time.time() > self.deadline:
+            raise BenchmarkTimeout("Deadline passed before entering {}".format(path))
+        return super(DeadlineProfiler, self)._execute(path, execute, *args, **kwargs)
+
+
+def designator_classes(cls=ds.Designator):
+    """ Returns the designator class and all its (imported) subclasses """
+    classes = {cls}
+    for subclass in cls.__subclasses__():
+        classes |= designator_classes(subclass)
+    return classes
+
+
+def count_resolves(resolves):
+    """
+    Replaces the resolve method of every designator class that defines one by a version that counts the resolves per
+    designator class and name. Only the outermost resolve of a designator is counted, so an overriding resolve that
+    calls the resolve of its base class counts once.
+
+    :param resolves: dict in which the resolves are counted
+    :return: function that restores the original resolve methods
+    """
+    resolving = threading.local()
+    originals = []
+
+    def counting(original):
+        def resolve(self, *args, **kwargs):
+            if not hasattr(resolving, "ids"):
+                resolving.ids = set()
+            if id(self) in resolving.ids:
+                return original(self, *args, **kwargs)
+            resolves["{}({})".format(type(self).__name__, self.name or "")] += 1
+            resolving.ids.add(id(self))
+            try:
+                return original(self, *args, **kwargs)
+            finally:
+                resolving.ids.discard(id(self))
+        return resolve
+
+    for cls in designator_classes():
+        if "resolve" in vars(cls):
+            originals.append((cls, vars(cls)["resolve"]))
+            cls.resolve = counting(vars(cls)["resolve"])
+
+    def restore():
+        for cls, original in originals:
+            cls.resolve = original
+    return restore
+
+
+def run_scenario(name, latencies, seed, timeout):
+    """
+    Builds a scenario against a freshly created Mockbot and executes it
+
+    :return: dict with the results, the outcome starts with 'build error' if the state machine could not be built
+    """
+    random.seed(seed)
+    robot = Mockbot()
+
+    calls = defaultdict(int)
+    for path, latency in latencies.items():
+        add_latency(robot, path, latency, calls)
+    for call in ED_CALLS:
+        if hasattr(robot.ed, call) and "ed." + call not in latencies:
+            add_latency(robot, "ed." + call, 0.0, calls)
+
+    result = {"scenario": name, "seed": seed, "latencies": latencies}
+    try:
+        sm = SCENARIOS[name](robot)
+    except Exception as e:
+        rospy.logerr("Cannot build scenario {}: {}".format(name, e))
+        result["outcome"] = "build error: {}".format(e)
+        return result
+
+    # The designator classes of the scenario are imported by now
+    resolves = defaultdict(int)
+    restore_resolve = count_resolves(resolves)
+    fd, log_file = tempfile.mkstemp(prefix="benchmark_{}_".format(name), suffix=".log")
+    os.close(fd)
+    try:
+        profiler = DeadlineProfiler(log_file, time.time() + timeout, run_id=name)
+        profiler.instrument(sm, label=name)
+
+        start = time.time()
+        with profiler:
+            try:
+                outcome = sm.execute()
+            except Exception as e:
+                # smach wraps exceptions of states, check the message for the timeout
+                outcome = "timeout" if "Deadline passed" in str(e) else "error: {}".format(e)
+        duration = time.time() - start
+        states = aggregate(read_records([log_file]))
+    finally:
+        restore_resolve()
+        os.remove(log_file)
+
+    result.update({
+        "outcome": outcome,
+        "duration": duration,
+        "states": {path: {"count": len(state["durations"]),
+                          "total": sum(state["durations"]),
+                          "mean": sum(state["durations"]) / len(state["durations"]),
+                          "max": max(state["durations"]),
+                          "outcomes": dict(state["outcomes"])}
+                   for path, state in states.items()},
+        "designator_resolves": dict(resolves),
+        "world_model_calls": {path[len("ed."):]: count for path, count in calls.items() if path.startswith("ed.")},
+        "mocked_calls": {path: count for path, count in calls.items() if not path.startswith("ed.")},
+    })
+    return result
+
+
+def parse_latency(text):
+    path, _, latency = text.partition("=")
+    return path, float(latency)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Executes challenge state machines against Mockbot with "
+                                                 "deterministic mocked latencies and reports per state wall time, "
+                                                 "designator resolves and world model calls as JSON")
+    parser.add_argument("--scenarios", nargs="+", default=["gpsr_sequence"], choices=sorted(SCENARIOS.keys()))
+    parser.add_argument("--latency", type=parse_latency, action="append", default=[],
+                        help="Latency of a mocked call, e.g. 'ed.get_entities=0.005'. Overrides the defaults")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the random generator used by Mockbot")
+    parser.add_argument("--timeout", type=float, default=60.0,
+                        help="No new states are entered after this wall time [s]")
+    parser.add_argument("--environment", default="robotics_testlabs",
+                        help="ROBOT_ENV used for the challenge knowledge, if not set")
+    parser.add_argument("--output", help="Write the JSON report to this file instead of stdout")
+    args = parser.parse_args()
+
+    os.environ.setdefault("ROBOT_ENV", args.environment)
+    # No ROS master is needed: use wall time as ROS time
+    rospy.rostime.set_rostime_initialized(True)
+
+    latencies = dict(DEFAULT_LATENCIES)
+    latencies.update(dict(args.latency))
+
+    report = [run_scenario(name, latencies, args.seed, args.timeout) for name in args.scenarios]
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+    else:
+        json.dump(report, sys.stdout, indent=2, sort_keys=True)
+        print("")
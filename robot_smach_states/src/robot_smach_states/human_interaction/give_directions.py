@@ -5,6 +5,7 @@ import math
 from collections import OrderedDict
 
 # ROS
+import numpy as np
 import PyKDL as kdl
 import rospy
 import smach
@@ -12,7 +13,8 @@ import smach
 # TU/e Robotics
 from robot_skills.robot import Robot
 from robot_skills.util.entity import Entity
-from robot_skills.util.kdl_conversions import point_msg_to_kdl_vector, VectorStamped
+from robot_skills.util.kdl_conversions import VectorStamped
+from robot_skills.util.plan import Plan
 
 # Robot Smach States
 from ..navigation.constraint_functions.symbolic_constraints import symbolic_constraint
@@ -82,9 +84,9 @@ class GiveDirections(smach.State):
             self._robot.speech.speak("I'm sorry but I don't know how to get to the {}".format(goal_entity.id))
             return "failed"
 
-        # Convert the path to a list of kdl Vectors
+        # Convert the path to an array once
         assert(all([p.header.frame_id.endswith("map") for p in path])), "Not all path poses are defined w.r.t. 'map'"
-        kdl_path = [point_msg_to_kdl_vector(p.pose.position) for p in path]
+        plan = Plan.from_pose_stamped_msgs(path)
 
         # Get all entities
         entities = self._robot.ed.get_entities()
@@ -93,17 +95,15 @@ class GiveDirections(smach.State):
         # Log the time we start iterating
         t_start = rospy.Time.now()
 
-        # Match the path to rooms
-        passed_room_ids = []  # Will contain the ids of the rooms that are passed
-        for position, next_position in zip(kdl_path[:-1], kdl_path[1:]):
-
-            try:
-                room = get_room(room_entities, position)
-            except RuntimeError:
-                continue
-            if room.id not in passed_room_ids:
-                passed_room_ids.append(room.id)
-                final_room_entry_pose = create_frame_from_points(position, next_position)
+        # Match the path to rooms: label all points (except the last) at once and find where each room is entered
+        room_indices = plan.room_indices(room_entities)[:-1]
+        labelled_rooms, first_indices = np.unique(room_indices, return_index=True)
+        entries = sorted((index, room) for room, index in zip(labelled_rooms, first_indices) if room >= 0)
+        passed_room_ids = [room_entities[room].id for _, room in entries]  # The ids of the rooms that are passed
+        if entries:
+            entry_index = entries[-1][0]
+            final_room_entry_pose = create_frame_from_points(kdl.Vector(*plan.points[entry_index]),
+                                                             kdl.Vector(*plan.points[entry_index + 1]))
 
         # With this information: start creating the text for the robot
         sentence = ""
@@ -11,7 +11,8 @@ from visualization_msgs.msg import MarkerArray, Marker
 # TUe robotics
 from robot_skills.arms import PublicArm
 from robot_skills.util.entity import Entity
-from robot_skills.util.kdl_conversions import kdl_frame_stamped_from_XYZRPY, FrameStamped
+from robot_skills.util.entity_cache import EntityCache
+from robot_skills.util.kdl_conversions import kdl_frame_stamped_from_XYZRPY, FrameStamped, VectorStamped
 from ..util.designators import Designator, check_resolve_type
 from cb_base_navigation_msgs.msg import PositionConstraint
 from ..util.geometry_helpers import offsetConvexHull
@@ -22,6 +23,10 @@ class EmptySpotDesignator(Designator):
     It does this by querying ED for entities that occupy some space.
         If the result is no entities, then we found an open spot.
 
+    ED is queried once per resolve for a snapshot of the entities around the place location, the candidate spots are
+    checked against a spatial index of that snapshot. The lengths of the plans to the candidate spots are cached for
+    as long as the robot does not move.
+
     To test this in the robotics_test_lab with amigo-console:
     robot = amigo
     CABINET = "bookcase"
@@ -54,6 +59,10 @@ class EmptySpotDesignator(Designator):
         self._spacing = 0.15
         self._area = area
         self._nav_threshold = 0.3   # Distance we are willing to drive further for better edge_score
+        self._pose_tolerance = 0.05  # Robot poses closer than this [m, rad] share the cached plan lengths
+
+        self._plan_lengths = {}  # Maps (x, y, frame_id, radius) of a spot to the plan length from _plan_lengths_pose
+        self._plan_lengths_pose = None
 
         self.marker_pub = rospy.Publisher('/empty_spots', MarkerArray, queue_size=1)
         self.marker_array = MarkerArray()
@@ -75,9 +84,11 @@ class EmptySpotDesignator(Designator):
 
         assert all(isinstance(v, FrameStamped) for v in vectors_of_interest)
 
-        open_POIs = filter(lambda pose: self._is_poi_unoccupied(pose, place_location), vectors_of_interest)
+        snapshot = self._scene_snapshot(vectors_of_interest, place_location)
+        open_POIs = [pose for pose in vectors_of_interest if self._is_poi_unoccupied(pose, place_location, snapshot)]
 
         base_pose = self.robot.base.get_location()
+        self._update_plan_lengths_pose(base_pose)
         arm = self.arm_designator.resolve()
         open_POIs_dist = [(poi, self._distance_to_poi_area_heuristic(poi, base_pose, arm)) for poi in open_POIs]
 
@@ -96,12 +107,53 @@ class EmptySpotDesignator(Designator):
         rospy.logerr("Could not find an empty spot")
         return None
 
-    def _is_poi_unoccupied(self, frame_stamped, surface_entity):
+    def _scene_snapshot(self, frames_stamped, surface_entity):
+        """
+        Queries ED once for all entities that may occupy one of the points of interest
+
+        :param frames_stamped: [FrameStamped] points of interest in map frame
+        :param surface_entity: Entity the points of interest are on, this entity is not included in the snapshot
+        :return: EntityCache with the entities around the points of interest, indexed by their position
+        """
+        snapshot = EntityCache(cell_size=self._spacing)
+        if not frames_stamped:
+            return snapshot
+
+        center = surface_entity._pose.p
+        radius = max((fs.frame.p - center).Norm() for fs in frames_stamped) + self._spacing
+        entities = self.robot.ed.get_entities(center_point=VectorStamped(vector=center, frame_id="/map"),
+                                              radius=radius)
+        snapshot.update([entity for entity in entities if entity.id != surface_entity.id], stamp=0.0, complete=True)
+        return snapshot
+
+    def _is_poi_unoccupied(self, frame_stamped, surface_entity, snapshot=None):
+        """
+        :param snapshot: (optional) EntityCache from _scene_snapshot, if not provided ED is queried
+        """
+        if snapshot is not None:
+            return not snapshot.select(center_point=frame_stamped.frame.p, radius=self._spacing)
+
         entities_at_poi = self.robot.ed.get_entities(center_point=frame_stamped.extractVectorStamped(),
                                                      radius=self._spacing)
         entities_at_poi = [entity for entity in entities_at_poi if entity.id != surface_entity.id]
         return not any(entities_at_poi)
 
+    def _update_plan_lengths_pose(self, base_pose):
+        """
+        Discards the cached plan lengths if the robot moved
+
+        :param base_pose: FrameStamped with the current robot pose
+        """
+        p = base_pose.frame.p
+        pose = (p.x(), p.y(), base_pose.frame.M.GetRPY()[2])
+        if self._plan_lengths_pose is None or \
+                math.hypot(pose[0] - self._plan_lengths_pose[0], pose[1] - self._plan_lengths_pose[1]) > \
+                self._pose_tolerance or \
+                abs(math.atan2(math.sin(pose[2] - self._plan_lengths_pose[2]),
+                               math.cos(pose[2] - self._plan_lengths_pose[2]))) > self._pose_tolerance:
+            self._plan_lengths = {}
+            self._plan_lengths_pose = pose
+
     def _distance_to_poi_area_heuristic(self, frame_stamped, base_pose, arm):
         """
         :return: direct distance between a point and and the place offset of the arm
@@ -130,6 +182,11 @@ class EmptySpotDesignator(Designator):
         x = frame_stamped.frame.p.x()
         y = frame_stamped.frame.p.y()
         radius -= 0.1
+
+        key = (round(x, 3), round(y, 3), frame_stamped.frame_id, round(radius, 3))
+        if key in self._plan_lengths:
+            return self._plan_lengths[key]
+
         ro = "(x-%f)^2+(y-%f)^2 < %f^2" % (x, y, radius + 0.075)
         ri = "(x-%f)^2+(y-%f)^2 > %f^2" % (x, y, radius - 0.075)
         pos_constraint = PositionConstraint(constraint=ri + " and " + ro, frame=frame_stamped.frame_id)
@@ -141,6 +198,10 @@ class EmptySpotDesignator(Designator):
             # print "Distance to {fs}: {dist}".format(dist=distance, fs=frame_stamped.frame.p)
         else:
             distance = None
+
+        # If the planner failed (None), it may succeed on a next attempt
+        if plan_to_poi is not None:
+            self._plan_lengths[key] = distance
         return distance
 
     def _create_marker(self, x, y, z):
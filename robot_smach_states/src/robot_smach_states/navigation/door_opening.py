@@ -3,7 +3,7 @@ import numpy as np
 from threading import Event
 
 # ROS
-from geometry_msgs.msg import PolygonStamped, Point, PoseStamped, Pose
+from geometry_msgs.msg import PolygonStamped
 import rospy
 from sensor_msgs.msg import LaserScan
 import smach
@@ -125,15 +125,11 @@ class ForceDriveToTouchDoor(smach.State):
         footprint_sub.unregister()
         footprint = footprint[0]
 
-        posestampeds = [PoseStamped(footprint.header, Pose(position=point)) for point in footprint.polygon.points]
-        in_baselink = [self.robot.tf_transform_pose(ps, '{}/base_link'.format(self.robot.robot_name)) for ps in posestampeds]
+        points = np.array([[point.x, point.y, point.z] for point in footprint.polygon.points])
+        in_baselink = self.robot.tf_transform_points(points, footprint.header,
+                                                     '{}/base_link'.format(self.robot.robot_name))
 
-        X = [ps.pose.position.x for ps in in_baselink]
-        Y = [ps.pose.position.y for ps in in_baselink]
-        # Z = [ps.point.z for ps in in_baselink]
-        as_array = np.array([X, Y]).T
-
-        return as_array
+        return in_baselink[:, :2]
 
     def select_frontside_of_footprint(self, footprint_points):
         return footprint_points[footprint_points[:,0] > 0]
@@ -159,16 +155,13 @@ class ForceDriveToTouchDoor(smach.State):
 
         #angles = np.arange(scan.angle_min, scan.angle_max-scan.angle_increment, scan.angle_increment)
         angles = np.linspace(scan.angle_min, scan.angle_max, len(scan.ranges))
-        X = scan.ranges * np.cos(angles) # TODO: get distance between laser frame and base_link
-        Y = scan.ranges * np.sin(angles)
-
-        posestampeds = [PoseStamped(scan.header, Pose(position=Point(x,y, 0))) for (x, y) in zip(X, Y)]
-        in_baselink = [self.robot.tf_transform_pose(ps, '{}/base_link'.format(self.robot.robot_name)) for ps in posestampeds]
+        ranges = np.asarray(scan.ranges)
+        points = np.column_stack((ranges * np.cos(angles), ranges * np.sin(angles), np.zeros(len(ranges))))
 
-        Xb = [ps.pose.position.x for ps in in_baselink]
-        Yb = [ps.pose.position.y for ps in in_baselink]
+        # A single transform lookup for the stamp of the scan, applied to all points at once
+        in_baselink = self.robot.tf_transform_points(points, scan.header, '{}/base_link'.format(self.robot.robot_name))
 
-        return np.array([Xb,Yb]).T
+        return in_baselink[:, :2]
 
     def add_delta_to_points(self, points, delta):
         """
@@ -217,24 +210,23 @@ class ForceDriveToTouchDoor(smach.State):
         :rtype tuple of (np.array([x, y]), distance, np.array([x, y]))
         """
 
-        def calc(forward_travel):
-            shifted_points = self.add_delta_to_points(footprint_points, delta=np.array([forward_travel, 0]))
-            fp, distance, sp = self.distance_between_footprint_and_scan(shifted_points, scan_points)
-            # print "If I drive {0:.3f}, distance will be {2} between {1} and {3}".format(forward_travel, fp, distance, sp)
-
-            original_fp = self.add_delta_to_points(fp, delta=np.array([-forward_travel, 0]))
-            return original_fp, distance, sp
-
         forward_travels = np.arange(0, 1, stepsize)
-        fp_distance_sp = map(calc, forward_travels)
 
-        distances = np.array([fp_dist_sp[1] for fp_dist_sp in fp_distance_sp])
+        # Offsets between all footprint points (N) and scan points (M), for all forward travels (T): T x N x M
+        dx = scan_points[np.newaxis, :, 0] - footprint_points[:, np.newaxis, 0]
+        dy = scan_points[np.newaxis, :, 1] - footprint_points[:, np.newaxis, 1]
+        distances = np.hypot(dx[np.newaxis, :, :] - forward_travels[:, np.newaxis, np.newaxis], dy[np.newaxis, :, :])
 
-        smallest_distance_index = np.argmin(distances)
+        # Smallest distance over all (footprint point, scan point) pairs per forward travel, and the travel where this
+        # is the smallest overall
+        flat_distances = distances.reshape((len(forward_travels), -1))
+        pair_indices = np.argmin(flat_distances, axis=1)
+        smallest_distance_index = np.argmin(flat_distances[np.arange(len(forward_travels)), pair_indices])
+        fp_index, sp_index = np.unravel_index(pair_indices[smallest_distance_index], dx.shape)
 
         forward_travel_to_minimize_distance = forward_travels[smallest_distance_index]
-        footprint_point_closest_to_scan = fp_distance_sp[smallest_distance_index][0]
-        scan_point_closest_to_footprint = fp_distance_sp[smallest_distance_index][2]
+        footprint_point_closest_to_scan = footprint_points[fp_index]
+        scan_point_closest_to_footprint = scan_points[sp_index]
 
         return (footprint_point_closest_to_scan, forward_travel_to_minimize_distance, scan_point_closest_to_footprint)
 
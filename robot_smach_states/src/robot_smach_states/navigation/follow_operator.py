@@ -1,10 +1,10 @@
 # System
-import copy
 import math
 
 # ROS
 import geometry_msgs  # Only used for publishing markers
 import geometry_msgs.msg
+import numpy as np
 import PyKDL as kdl
 import smach
 import rospy
@@ -16,6 +16,7 @@ from cb_base_navigation_msgs.msg import PositionConstraint, OrientationConstrain
 from hmi import TimeoutException
 from robot_skills.util import kdl_conversions
 from robot_skills.util.entity import Entity
+from robot_skills.util.plan import Plan
 from ..util.startup import startup
 from ..util.designators import VariableDesignator
 
@@ -32,7 +33,7 @@ class FollowOperator(smach.State):
     def __init__(self, robot, ask_follow=True, learn_face=True, operator_radius=1, lookat_radius=1.2, timeout=1.0,
                  start_timeout=10, operator_timeout=20, distance_threshold=None, lost_timeout=60, lost_distance=0.8,
                  operator_id_des=VariableDesignator(resolve_type=str), standing_still_timeout=20,
-                 operator_standing_still_timeout=3.0, replan=False):
+                 operator_standing_still_timeout=3.0, replan=False, plan_check_time_budget=0.5):
         """ Constructor
 
         :param robot: robot object
@@ -50,6 +51,7 @@ class FollowOperator(smach.State):
         :param standing_still_timeout:
         :param operator_standing_still_timeout:
         :param replan:
+        :param plan_check_time_budget: maximum duration [s] of removing the blocked points from the breadcrumb plan
         """
         smach.State.__init__(self, outcomes=["stopped", 'lost_operator', "no_operator"])
         self._robot = robot
@@ -62,6 +64,7 @@ class FollowOperator(smach.State):
         self._start_timeout = start_timeout
         self._breadcrumbs = []  # List of Entity's
         self._breadcrumb_distance = 0.1  # meters between dropped breadcrumbs
+        self._plan_check_time_budget = plan_check_time_budget
         self._operator_timeout = operator_timeout
         self._ask_follow = ask_follow
         self._learn_face = learn_face
@@ -242,17 +245,14 @@ class FollowOperator(smach.State):
             else:
                 self._breadcrumbs.append(self._operator)
 
-        # Remove 'reached' breadcrumbs from breadcrumb path
+        # Remove 'reached' breadcrumbs from breadcrumb path: all breadcrumbs up to the last one near the robot
         robot_position = self._robot.base.get_location().frame
         # robot_yaw = transformations.euler_z_from_quaternion(self._robot.base.pose.orientation)
-        temp_crumbs = []
-        for crumb in self._breadcrumbs:
-            if crumb.distance_to_2d(robot_position.p) > self._lookat_radius + 0.1:
-                temp_crumbs.append(crumb)
-            else:
-                temp_crumbs = []
-
-        self._breadcrumbs = temp_crumbs
+        if self._breadcrumbs:
+            distances = Plan([crumb._pose.p for crumb in self._breadcrumbs]).distances(robot_position.p)
+            reached = np.flatnonzero(distances <= self._lookat_radius + 0.1)
+            if len(reached):
+                self._breadcrumbs = self._breadcrumbs[reached[-1] + 1:]
 
         self._visualize_breadcrumbs()
 
@@ -405,46 +405,23 @@ class FollowOperator(smach.State):
 
         ''' Calculate global plan from robot position, through breadcrumbs, to the operator '''
         res = 0.05
-        kdl_plan = []
-        previous_point = robot_position
 
         if self._operator:
             breadcrumbs = self._breadcrumbs + [self._operator]
         else:
             breadcrumbs = self._breadcrumbs + [self._last_operator]
-        for crumb in breadcrumbs:
-            assert isinstance(crumb, Entity)
-            diff = crumb._pose.p - previous_point
-            dx, dy = diff.x(), diff.y()
-
-            length = crumb.distance_to_2d(previous_point)
-
-            if length != 0:
-                dx_norm = dx / length
-                dy_norm = dy / length
-                yaw = math.atan2(dy, dx)
-
-                start = 0
-                end = int(length / res)
-
-                for i in range(start, end):
-                    x = previous_point.x() + i * dx_norm * res
-                    y = previous_point.y() + i * dy_norm * res
-                    kdl_plan.append(kdl_conversions.kdl_frame_stamped_from_XYZRPY(x=x, y=y, z=0, yaw=yaw))
-
-            previous_point = copy.deepcopy(crumb._pose.p)
+        assert all(isinstance(crumb, Entity) for crumb in breadcrumbs)
+        plan = Plan([robot_position] + [crumb._pose.p for crumb in breadcrumbs]).resample(res)
 
         # Delete the elements from the plan within the operator radius from the robot
         cutoff = int(self._operator_radius/(2.0*res))
-        if len(kdl_plan) > cutoff:
-            del kdl_plan[-cutoff:]
-
-        ros_plan = frame_stampeds_to_pose_stampeds(kdl_plan)
+        points = plan.points[:-cutoff] if cutoff and len(plan) > cutoff else plan.points
+        ros_plan = Plan(points).to_pose_stamped_msgs()
         # Check if plan is valid. If not, remove invalid points from the path
-        if not self._robot.base.global_planner.checkPlan(ros_plan):
+        valid = self._robot.base.global_planner.checkPoints(ros_plan, time_budget=self._plan_check_time_budget)
+        if not all(valid):
             rospy.loginfo("Breadcrumb plan is blocked, removing blocked points")
-            # Go through plan from operator to robot and pick the first unoccupied point as goal point
-            ros_plan = [point for point in ros_plan if self._robot.base.global_planner.checkPlan([point])]
+            ros_plan = [point for point, point_valid in zip(ros_plan, valid) if point_valid]
 
         self._visualize_plan(ros_plan)
         self._robot.base.local_planner.setPlan(ros_plan, p, o)
@@ -118,13 +118,14 @@ class Track(smach.State):
 
 
 class FollowBread(smach.State):
-    def __init__(self, robot, _buffer, operator_radius=1, lookat_radius=0.5):
+    def __init__(self, robot, _buffer, operator_radius=1, lookat_radius=0.5, plan_check_time_budget=0.5):
         """
 
         :param robot: robot object (amigo, sergio)
         :param _buffer: the buffer deque that is made in the track state
         :param operator_radius: the assumed radius of the operator for position constraint
         :param lookat_radius: all breadcrumbs within the lookat_radius are deleted
+        :param plan_check_time_budget: maximum duration [s] of removing the blocked points from the breadcrumb plan
         """
         smach.State.__init__(self,
                              outcomes=['follow_bread', 'no_follow_bread_ask_finalize', 'no_follow_bread_recovery'])
@@ -139,6 +140,7 @@ class FollowBread(smach.State):
         self._buffer = _buffer
         self._breadcrumb = []
         self._resolution = 0.05
+        self._plan_check_time_budget = plan_check_time_budget
         self._timeout_count = 0
         # ros_plan = []
 
@@ -235,11 +237,11 @@ class FollowBread(smach.State):
 
         if len(self._breadcrumb) > 0:
             ros_plan = [crwp.waypoint for crwp in self._breadcrumb]
-            if not self._robot.base.global_planner.checkPlan(ros_plan):
+            valid = self._robot.base.global_planner.checkPoints(ros_plan, time_budget=self._plan_check_time_budget)
+            if not all(valid):
                 rospy.loginfo("Breadcrumb plan is blocked, removing blocked points")
                 rospy.loginfo("Breadcrumbs before removing blocked points: {}".format(len(ros_plan)))
-                ros_plan = [crwp.waypoint for crwp in self._breadcrumb
-                            if self._robot.base.global_planner.checkPlan([crwp.waypoint])]
+                ros_plan = [point for point, point_valid in zip(ros_plan, valid) if point_valid]
                 rospy.loginfo("Breadcrumbs length after removing blocked points: {}".format(len(ros_plan)))
 
             # if the new ros plan is empty, we do have an operator but there are no breadcrumbs that we can reach
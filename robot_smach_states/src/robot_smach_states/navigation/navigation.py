@@ -2,11 +2,15 @@ from __future__ import absolute_import
 
 # System
 from random import choice
+import threading
 
 # ROS
 import rospy
 import smach
 
+# TU/e Robotics
+from robot_skills.util.loop_scheduler import LoopScheduler
+
 
 class StartAnalyzer(smach.State):
     def __init__(self, robot):
@@ -40,17 +44,44 @@ class AbortAnalyzer(smach.State):
 
 
 class getPlan(smach.State):
-    def __init__(self, robot, constraint_function, speak=True):
+    def __init__(self, robot, constraint_function, speak=True, breakout_delay=0.1):
+        """
+        Constructor
+
+        :param robot: robot object
+        :param constraint_function: function resolving to a tuple(PositionConstraint, OrientationConstraint)
+        :param speak: whether the robot should speak when it has a plan
+        :param breakout_delay: (float) time [s] a monitoring state that runs concurrently gets to preempt navigation
+            before the plan is set
+        """
         smach.State.__init__(self,
             outcomes=['unreachable','goal_not_defined','goal_ok','preempted'])
         self.robot = robot
         self.constraint_function = constraint_function
         self.speak = speak
+        self.breakout_delay = breakout_delay
+        self._preempt_event = threading.Event()
+
+    def request_preempt(self):
+        smach.State.request_preempt(self)
+        self._preempt_event.set()
+
+    def _wait_for_preempt(self, deadline):
+        """ Waits until the deadline (rospy time [s]) or until preempted, returns whether a preempt was requested """
+        while not self.preempt_requested():
+            remaining = deadline - rospy.get_time()
+            if remaining <= 0.0:
+                break
+            # The deadline may be in simulated time, so the event is waited for in short (wall time) slices
+            self._preempt_event.wait(min(remaining, 0.01))
+        return self.preempt_requested()
 
     def execute(self, userdata=None):
 
-        # Sleep for 0.1 s (breakOut sleep) to prevent synchronization errors between monitor state and nav state
-        rospy.sleep(rospy.Duration(0.1))
+        # BreakOut delay to prevent synchronization errors between monitor state and nav state: the plan is only set
+        # if navigation is not preempted within the delay. The plan is computed meanwhile instead of sleeping first.
+        deadline = rospy.get_time() + self.breakout_delay
+        self._preempt_event.clear()
 
         if self.preempt_requested():
             rospy.loginfo('Get plan: preempt_requested')
@@ -67,6 +98,10 @@ class getPlan(smach.State):
 
         plan = self.robot.base.global_planner.getPlan(pc)
 
+        if self._wait_for_preempt(deadline):
+            rospy.loginfo('Get plan: preempt_requested')
+            return 'preempted'
+
         if not plan or len(plan) == 0:
             self.robot.base.local_planner.cancelCurrentPlan()
             return "unreachable"
@@ -81,7 +116,7 @@ class getPlan(smach.State):
 
 
 class executePlan(smach.State):
-    def __init__(self, robot, breakout_function, blocked_timeout = 4, reset_head=True, reset_pose=True):
+    def __init__(self, robot, breakout_function, blocked_timeout = 4, reset_head=True, reset_pose=True, rate=10.0):
         smach.State.__init__(self,outcomes=['succeeded','arrived','blocked','preempted'])
         self.robot = robot
         self.t_last_free = None
@@ -89,6 +124,15 @@ class executePlan(smach.State):
         self.breakout_function = breakout_function
         self.reset_head = reset_head
         self.reset_pose = reset_pose
+        self.rate = rate
+        self._scheduler = None
+
+    def request_preempt(self):
+        smach.State.request_preempt(self)
+        # Handle the preemption right away instead of at the next iteration
+        scheduler = self._scheduler
+        if scheduler is not None:
+            scheduler.notify()
 
     def execute(self, userdata=None):
         """
@@ -108,8 +152,21 @@ class executePlan(smach.State):
         if self.reset_pose and self.robot.base.global_planner.path_length > 0.5:
             self.robot.go_to_driving_pose()
 
+        # The loop runs at a fixed rate and starts an iteration right away if the status of the local planner changes
+        scheduler = self._scheduler = LoopScheduler(rate=self.rate)
+        status_listener = lambda status: scheduler.notify()
+        self.robot.base.local_planner.add_status_listener(status_listener)
+        try:
+            return self._control_loop(scheduler)
+        finally:
+            self.robot.base.local_planner.remove_status_listener(status_listener)
+            self._scheduler = None
+            self.robot.base.analyzer.add_loop_timing("execute_plan", scheduler.timing)
+
+    def _control_loop(self, scheduler):
+        """ Monitors the breakout function and the local planner until the plan is done, returns the outcome """
         while not rospy.is_shutdown():
-            rospy.Rate(10).sleep() # 10hz
+            scheduler.sleep()
 
             ''' If the breakoutfunction returns preempt,
                 navigation has succeeded and the robot can stop'''
@@ -171,20 +228,18 @@ class planBlocked(smach.State):
 
         rospy.loginfo("Plan blocked")
 
-        # Wait for 5 seconds but continue if the path is free
-        wait_start = rospy.Time.now()
-
-        while (rospy.Time.now() - wait_start) < rospy.Duration(3.0) and not rospy.is_shutdown():
-            rospy.sleep(0.5)
-
-            # Look at the entity
-            # ps = msgs.PointStamped(point=self.robot.base.local_planner.getObstaclePoint(), frame_id="/map")
-            # self.robot.head.look_at_point(kdl_vector_stamped_from_point_stamped_msg(ps))
-
-            if not self.robot.base.local_planner.getStatus() == "blocked":
+        # Wait for 3 seconds but continue as soon as the path is free
+        scheduler = LoopScheduler(rate=2.0)
+        status_listener = lambda status: scheduler.notify()
+        self.robot.base.local_planner.add_status_listener(status_listener)
+        try:
+            if self._wait_until_free(scheduler, 3.0):
                 self.robot.head.cancel_goal()
                 rospy.loginfo("Plan free again")
                 return "free"
+        finally:
+            self.robot.base.local_planner.remove_status_listener(status_listener)
+            self.robot.base.analyzer.add_loop_timing("plan_blocked", scheduler.timing)
 
         # Else: replan with same constraints
         # Get alternative plan
@@ -204,6 +259,25 @@ class planBlocked(smach.State):
 
         return 'blocked'
 
+    def _wait_until_free(self, scheduler, timeout):
+        """
+        Returns True as soon as the local planner is not blocked anymore, False if still blocked after timeout
+
+        :param scheduler: (LoopScheduler) scheduler of the loop, the timeout is measured on its clock
+        :param timeout: (float) maximum time to wait [s]
+        """
+        deadline = scheduler.clock() + timeout
+        while scheduler.clock() < deadline and not rospy.is_shutdown():
+            scheduler.sleep()
+
+            # Look at the entity
+            # ps = msgs.PointStamped(point=self.robot.base.local_planner.getObstaclePoint(), frame_id="/map")
+            # self.robot.head.look_at_point(kdl_vector_stamped_from_point_stamped_msg(ps))
+
+            if not self.robot.base.local_planner.getStatus() == "blocked":
+                return True
+        return False
+
 
 class NavigateTo(smach.StateMachine):
     """
@@ -3,6 +3,7 @@ from __future__ import absolute_import
 # System
 import inspect
 import pprint
+import time
 
 # ROS
 import rospy
@@ -10,12 +11,70 @@ import rospy
 # TU/e Robotics
 from robot_skills.util.entity import Entity
 from robot_skills.util.kdl_conversions import VectorStamped
+from robot_skills.util.logging_util import debug_enabled
 from .core import Designator
 from .checks import check_resolve_type
 
 
 __author__ = 'loy'
 
+# Descriptions of criteria functions, keyed by their code object so that lambdas created anew on every call (e.g.
+# inside a loop or a resolve) share a single entry
+_criterium_descriptions = {}
+
+
+def describe_criterium(criterium):
+    """
+    Returns a description of a criterium function for logging. The source code is looked up once per function
+    definition and cached afterwards.
+
+    :param criterium: callable
+    :return: (str) the source code of the criterium, or its representation if the source is not available
+
+    >>> describe_criterium(len)
+    '<built-in function len>'
+    """
+    key = getattr(criterium, "__code__", None)
+    if key is None:
+        return repr(criterium)
+
+    try:
+        return _criterium_descriptions[key]
+    except KeyError:
+        pass
+
+    try:
+        description = inspect.getsource(criterium)
+    except (IOError, TypeError):
+        description = repr(criterium)
+    _criterium_descriptions[key] = description
+    return description
+
+
+def _filter_entities(entities, criteria):
+    """
+    Applies all criteria to the entities. Entities for which a criterium raises an exception are discarded.
+
+    :param entities: list of entities
+    :param criteria: list of functions that take an entity and return a bool
+    :return: list with the entities that meet all criteria
+    """
+    for criterium in criteria:
+        filtered_entities = []
+        for entity in entities:
+            try:
+                if criterium(entity):
+                    filtered_entities.append(entity)
+            except Exception as exp:
+                rospy.logerr("{id} cannot be filtered with criterum '{crit}': {exp}".format(
+                    id=entity.id, crit=describe_criterium(criterium), exp=exp))
+
+        entities = filtered_entities
+        rospy.loginfo("Criterium %s leaves %d entities", describe_criterium(criterium), len(entities))
+        if debug_enabled():
+            rospy.logdebug("Remaining entities: %s", pprint.pformat([ent.id for ent in entities]))
+    return entities
+
 
 class EdEntityCollectionDesignator(Designator):
     """
@@ -71,25 +130,29 @@ class EdEntityCollectionDesignator(Designator):
 
         self.debug = debug
 
+        # Duration [s] of the stages of the last resolve
+        self.resolve_timing = {}
+
     def _resolve(self):
         _type = self.type_designator.resolve() if self.type_designator else self.type
         _center_point = self.center_point_designator.resolve() if self.center_point_designator else self.center_point
         _id = self.id_designator.resolve() if self.id_designator else self.id
         _criteria = self.criteriafuncs
 
+        start = time.time()
         entities = self.ed.get_entities(_type, _center_point, self.radius, _id)
+        query_done = time.time()
         if self.debug:
             import ipdb;
             ipdb.set_trace()
         if entities:
-            for criterium in _criteria:
-                entities = filter(criterium, entities)
-                criterium_code = inspect.getsource(criterium)
-                rospy.loginfo("Criterium {0} leaves {1} entities".format(criterium_code, len(entities)))
-                rospy.logdebug("Remaining entities: {}".format(pprint.pformat([ent.id for ent in entities])))
-            if entities:
-                self._current = entities
-                return self.current
+            entities = _filter_entities(entities, _criteria)
+        self.resolve_timing = {"query": query_done - start, "filter": time.time() - query_done}
+        rospy.logdebug("%s resolve timing: query %.4f s, filter %.4f s", self, self.resolve_timing["query"],
+                       self.resolve_timing["filter"])
+
+        if entities:
+            return entities
 
         rospy.logerr("No entities found in {0}".format(self))
         return None
@@ -149,6 +212,9 @@ class EdEntityDesignator(Designator):
 
         self.debug = debug
 
+        # Duration [s] of the stages of the last resolve
+        self.resolve_timing = {}
+
     def lockable(self):
         return LockToId(self.robot, self)
 
@@ -170,41 +236,38 @@ class EdEntityDesignator(Designator):
             rospy.logwarn("id_designator {0} failed to resolve: {1}".format(self.id_designator, _id))
 
         if isinstance(_type, list):
+            types = _type
             _type = ""  # Do the check not in Ed but in code here
-            typechecker = lambda entity: entity.type in _type
-            _criteria += [typechecker]
+            typechecker = lambda entity: entity.type in types
+            _criteria = _criteria + [typechecker]
 
+        start = time.time()
         entities = self.ed.get_entities(_type, _center_point, self.radius, _id)
+        query_done = time.time()
+        self.resolve_timing = {"query": query_done - start, "filter": 0.0, "weight": 0.0}
+
         if entities:
-            for criterium in _criteria:
-                criterium_code = inspect.getsource(criterium)
-                filtered_entities = []
-                for entity in entities:
-                    try:
-                        if criterium(entity):
-                            filtered_entities += [entity]
-                    except Exception as exp:
-                        rospy.logerr("{id} cannot be filtered with criterum '{crit}': {exp}".format(id=entity.id,
-                                                                                                    crit=criterium_code,
-                                                                                                    exp=exp))
-
-                entities = filtered_entities
-                rospy.loginfo("Criterium {0} leaves {1} entities".format(criterium_code, len(entities)))
-                rospy.logdebug("Remaining entities: {}".format(pprint.pformat([ent.id for ent in entities])))
+            entities = _filter_entities(entities, _criteria)
+            filter_done = time.time()
+            self.resolve_timing["filter"] = filter_done - query_done
 
             if entities:
                 weights = [self.weight_function(entity) for entity in entities]
-                names = [entity.id for entity in entities]
-
-                if len(entities) >= 1:
-                    rospy.loginfo('choosing best entity from this list (name->weight):\n\t%s', zip(names, weights))
-                    return min(entities, key=self.weight_function)
-                else:
-                    return entities[0]
-
+                best_index = min(range(len(entities)), key=weights.__getitem__)
+                self.resolve_timing["weight"] = time.time() - filter_done
+                rospy.loginfo('choosing best entity from this list (name->weight):\n\t%s',
+                              zip([entity.id for entity in entities], weights))
+                self._log_resolve_timing()
+                return entities[best_index]
+
+        self._log_resolve_timing()
         rospy.logerr("No entities found in {0}".format(self))
         return None
 
+    def _log_resolve_timing(self):
+        rospy.logdebug("%s resolve timing: query %.4f s, filter %.4f s, weight %.4f s", self,
+                       self.resolve_timing["query"], self.resolve_timing["filter"], self.resolve_timing["weight"])
+
 
 class EntityByIdDesignator(Designator):
     def __init__(self, robot, id, name=None):
@@ -4,10 +4,10 @@ from __future__ import absolute_import
 import math
 
 # ROS
-import PyKDL as kdl
 import rospy
 
 # TU/e Robotics
+from robot_skills.util.geometry import points_in_convex_hull, transform_points
 from robot_skills.util.kdl_conversions import point_msg_to_kdl_vector
 
 
@@ -61,6 +61,16 @@ def isPointInsideHull(p, chull):
     return True
 
 
+def arePointsInsideHull(points, chull):
+    """ Checks for all points whether they are inside the convex hull chull, see isPointInsideHull
+
+    :param points: Nx3 numpy array or list of kdl Vectors. Note that only x and y are evaluated
+    :param chull: list of kdl Vectors. Note that the order is supposed to be anti-clockwise
+    :return: boolean numpy array with shape (N,)
+    """
+    return points_in_convex_hull(points, chull)
+
+
 def onTopOff(subject, container, ht=0.1):
     """ Checks whether the entity 'subject' is on top of entity 'container'
         @param subject the EntityInfo which may be on top of the container, e.g. a cup
@@ -107,10 +117,15 @@ def offsetConvexHull(input_ch, offset):
     :param offset: KDL frame representing the offset with which to multiply the convex_hull
     :return: list with KDL vectors representing the convex hull
     """
-    out_ch = []
-    for p in input_ch:
-        pf = kdl.Frame(kdl.Rotation(), p)  # ToDo: is this necessary???
-        pf = offset * pf
-        p_out = kdl.Vector(pf.p)
-        out_ch.append(p_out)
-    return out_ch
+    return [offset * p for p in input_ch]
+
+
+def offsetConvexHullArray(input_ch, offset):
+    """ Same as offsetConvexHull, but returns the convex hull as Nx3 numpy array, which is more efficient for large
+    hulls and for subsequent batch checks with arePointsInsideHull
+
+    :param input_ch: Nx3 numpy array or list with kdl Vectors
+    :param offset: KDL frame representing the offset with which to multiply the convex_hull
+    :return: Nx3 numpy array representing the convex hull
+    """
+    return transform_points(offset, input_ch)
@@ -0,0 +1,288 @@
+"""
+Clustering of person detections, e.g., to find the distinct people in a room from all detections made while looking
+around.
+
+A detection is a dict with a 'map_ps' key containing a geometry_msgs.msg.PointStamped in the map frame. The other
+values are ROS messages, e.g. {'map_ps': ..., 'person_detection': ..., 'rgb': ...}. Detections can be stored with
+save_detections, which writes the positions as columns and serializes the messages only once, even if multiple
+detections share a message (like the rgb image all persons in a view were detected in).
+"""
+
+from __future__ import absolute_import
+
+# System
+import io
+import pickle
+
+# ROS
+from geometry_msgs.msg import Point, PointStamped
+import numpy as np
+import roslib.message
+import rospy
+from sklearn.cluster import KMeans, MiniBatchKMeans
+from std_msgs.msg import Header
+
+
+def detection_positions(detections):
+    """
+    Returns the positions of the detections in the map
+
+    :param detections: list of detections
+    :return: numpy array with shape (N, 2) with the x and y coordinates of the detections
+    """
+    return np.array([(d['map_ps'].point.x, d['map_ps'].point.y) for d in detections], dtype=float).reshape(-1, 2)
+
+
+def closest_to_centers(positions, labels, centers):
+    """
+    Selects, for every cluster, the position closest to the center of the cluster
+
+    >>> positions = np.array([[0.0, 0.0], [1.0, 0.0], [5.0, 5.0], [6.0, 6.0]])
+    >>> closest_to_centers(positions, np.array([0, 0, 1, 1]), np.array([[0.2, 0.0], [5.9, 5.9]]))
+    [0, 3]
+
+    :param positions: numpy array with shape (N, 2)
+    :param labels: numpy array with the cluster index of every position
+    :param centers: numpy array with shape (K, 2) with the cluster centers
+    :return: list with the index of the selected position of every cluster, ordered by cluster index. Clusters without
+        positions are skipped. Of equally close positions, the first is selected
+    """
+    distances = np.hypot(*(positions - centers[labels]).T)
+    indices = []
+    for label in range(len(centers)):
+        members = np.flatnonzero(labels == label)
+        if len(members):
+            indices.append(int(members[np.argmin(distances[members])]))
+    return indices
+
+
+def cluster_people(detections, room_center=None, n_clusters=4):
+    """
+    Clusters the detections by their position in the map using KMeans and returns, for every cluster, the detection
+    closest to the center of the cluster
+
+    :param detections: list of detections
+    :param room_center: unused, kept for compatibility with the challenge specific implementations
+    :param n_clusters: (int) number of clusters, i.e., the expected number of people
+    :return: list with one detection per cluster
+    :raises ValueError: if there are less detections than clusters
+    """
+    positions = detection_positions(detections)
+    kmeans = KMeans(n_clusters=n_clusters, random_state=0)
+    kmeans.fit(positions)
+    return [detections[index] for index in closest_to_centers(positions, kmeans.labels_, kmeans.cluster_centers_)]
+
+
+class PeopleClusterer(object):
+    """
+    Collects detections while they come in and clusters them on request. The positions are stored in a numpy array
+    and the result is reused as long as no detections are added, so the clusters can be requested after every
+    detection. The result is identical to cluster_people on the collected detections.
+    """
+    def __init__(self, n_clusters=4, max_detections=None):
+        """
+        Constructor
+
+        :param n_clusters: (int) number of clusters, i.e., the expected number of people
+        :param max_detections: (int) if provided, only the most recent max_detections detections are kept
+        """
+        self.n_clusters = n_clusters
+        self.max_detections = max_detections
+
+        self._detections = []
+        self._positions = np.empty((64, 2))
+        self._clusters = None
+
+    def __len__(self):
+        return len(self._detections)
+
+    def add(self, detection):
+        """
+        Adds a detection
+
+        :param detection: dict with at least a 'map_ps' key
+        """
+        count = len(self._detections)
+        if self.max_detections is not None and count >= self.max_detections:
+            # Drop the oldest detection(s)
+            drop = count - self.max_detections + 1
+            del self._detections[:drop]
+            self._positions[:count - drop] = self._positions[drop:count]
+            count -= drop
+        elif count == len(self._positions):
+            self._positions = np.concatenate([self._positions, np.empty_like(self._positions)])
+
+        self._positions[count] = (detection['map_ps'].point.x, detection['map_ps'].point.y)
+        self._detections.append(detection)
+        self._clusters = None
+
+    def extend(self, detections):
+        """ Adds multiple detections """
+        for detection in detections:
+            self.add(detection)
+
+    def clusters(self):
+        """
+        Returns one detection per cluster, see cluster_people
+
+        :raises ValueError: if there are less detections than clusters
+        """
+        if self._clusters is None:
+            positions = self._positions[:len(self._detections)]
+            kmeans = KMeans(n_clusters=self.n_clusters, random_state=0)
+            kmeans.fit(positions)
+            self._clusters = [self._detections[index]
+                              for index in closest_to_centers(positions, kmeans.labels_, kmeans.cluster_centers_)]
+        return list(self._clusters)
+
+
+class OnlinePeopleClusterer(object):
+    """
+    Clusters an unbounded stream of detections with constant memory. Detections are fed to a MiniBatchKMeans model in
+    batches and only the detection closest to the center of every cluster is kept. The clusters approximate those of
+    cluster_people, use PeopleClusterer if an exact result is needed.
+    """
+    def __init__(self, n_clusters=4, batch_size=100):
+        """
+        Constructor
+
+        :param n_clusters: (int) number of clusters, i.e., the expected number of people
+        :param batch_size: (int) number of detections the model is updated with at once
+        """
+        self.n_clusters = n_clusters
+        self.batch_size = batch_size
+
+        self._kmeans = MiniBatchKMeans(n_clusters=n_clusters, batch_size=batch_size, random_state=0)
+        self._fitted = False
+        self._pending = []
+        self._representatives = []
+
+    def add(self, detection):
+        """
+        Adds a detection, the model is updated once batch_size detections are pending
+
+        :param detection: dict with at least a 'map_ps' key
+        """
+        self._pending.append(detection)
+        if len(self._pending) >= self.batch_size:
+            self._update()
+
+    def extend(self, detections):
+        """ Adds multiple detections """
+        for detection in detections:
+            self.add(detection)
+
+    def _update(self):
+        # The model can only be initialized with at least n_clusters detections
+        if not self._pending or (not self._fitted and len(self._pending) < self.n_clusters):
+            return
+
+        self._kmeans.partial_fit(detection_positions(self._pending))
+        self._fitted = True
+
+        # The centers have moved, so select the representatives again from the previous ones and the new detections
+        candidates = self._representatives + self._pending
+        positions = detection_positions(candidates)
+        labels = self._kmeans.predict(positions)
+        self._representatives = [candidates[index] for index in
+                                 closest_to_centers(positions, labels, self._kmeans.cluster_centers_)]
+        self._pending = []
+
+    def clusters(self):
+        """
+        Updates the model with the pending detections and returns one detection per cluster
+
+        :raises ValueError: if less detections than clusters have been added
+        """
+        self._update()
+        if not self._fitted:
+            raise ValueError("{} detections, at least {} are needed".format(len(self._pending), self.n_clusters))
+        return list(self._representatives)
+
+
+def _serialize(msg):
+    buff = io.BytesIO()
+    msg.serialize(buff)
+    return buff.getvalue()
+
+
+def save_detections(path, detections):
+    """
+    Stores detections in a compressed numpy archive, one array per column. The position, stamp and frame of the
+    'map_ps' points are stored as numbers and strings. The other messages are serialized, messages shared by several
+    detections are only stored once.
+
+    :param path: (str) path of the file, '.npz' is appended if it has a different extension
+    :param detections: list of detections
+    :raises ValueError: if a detection contains a value that is not a ROS message
+    """
+    columns = {
+        "position": np.array([(d['map_ps'].point.x, d['map_ps'].point.y, d['map_ps'].point.z) for d in detections],
+                             dtype=float).reshape(-1, 3),
+        "stamp": np.array([d['map_ps'].header.stamp.to_sec() for d in detections], dtype=float),
+        "frame_id": np.array([d['map_ps'].header.frame_id for d in detections], dtype=str),
+    }
+
+    keys = sorted(set(key for d in detections for key in d) - {'map_ps'})
+    for key in keys:
+        unique = {}  # Maps the id of a message to its index in the column
+        data = []
+        index = []
+        for d in detections:
+            msg = d.get(key)
+            if msg is None:
+                index.append(-1)
+                continue
+            if not hasattr(msg, "serialize"):
+                raise ValueError("Cannot store '{}' of type {}, only ROS messages are supported".format(key, type(msg)))
+            if id(msg) not in unique:
+                unique[id(msg)] = len(data)
+                data.append((msg._type, _serialize(msg)))
+            index.append(unique[id(msg)])
+
+        columns[key + ".index"] = np.array(index, dtype=np.int64)
+        columns[key + ".type"] = np.array([msg_type for msg_type, _ in data], dtype=str)
+        columns[key + ".offsets"] = np.cumsum([0] + [len(buff) for _, buff in data]).astype(np.int64)
+        columns[key + ".data"] = np.frombuffer(b"".join(buff for _, buff in data), dtype=np.uint8)
+
+    np.savez_compressed(path, **columns)
+
+
+def load_detections(path):
+    """
+    Loads detections stored by save_detections. Files with a '.pickle' extension are read as pickled lists of
+    detections, the format that was used before
+
+    :param path: (str) path of the file
+    :return: list of detections
+    """
+    if path.endswith(".pickle"):
+        with open(path, "rb") as f:
+            return pickle.load(f)
+
+    with np.load(path, allow_pickle=False) as columns:
+        detections = [{'map_ps': PointStamped(header=Header(stamp=rospy.Time.from_sec(stamp), frame_id=str(frame_id)),
+                                              point=Point(*position))}
+                      for position, stamp, frame_id in zip(columns["position"], columns["stamp"], columns["frame_id"])]
+
+        keys = set(name.rsplit(".", 1)[0] for name in columns.files if "." in name)
+        for key in keys:
+            types = columns[key + ".type"]
+            offsets = columns[key + ".offsets"]
+            data = columns[key + ".data"]
+            messages = []
+            for i, msg_type in enumerate(types):
+                msg = roslib.message.get_message_class(str(msg_type))()
+                msg.deserialize(data[offsets[i]:offsets[i + 1]].tobytes())
+                messages.append(msg)
+
+            for detection, index in zip(detections, columns[key + ".index"]):
+                if index >= 0:
+                    detection[key] = messages[index]
+
+    return detections
+
+
+if __name__ == "__main__":
+    import doctest
+    doctest.testmod()
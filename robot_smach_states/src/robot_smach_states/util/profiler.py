@@ -0,0 +1,151 @@
+"""
+Opt-in profiling of smach state machines.
+
+The StateProfiler wraps the execute method of all states in a state machine and writes a record for every execution
+to a log file, one JSON object per line:
+
+    {"run": "1571...", "path": "SM/NAVIGATE/GET_PLAN", "enter": 1571..., "exit": 1571..., "outcome": "goal_ok",
+     "calls": {"srv:/hero/global_planner/get_plan": 1}}
+
+Calls are the service calls and action goals sent by the thread executing the state, while it was the innermost
+executing state. Use robot_smach_states/benchmark/analyse_profile.py to aggregate the logs of one or more runs.
+"""
+
+from __future__ import absolute_import
+
+# System
+from collections import defaultdict
+import json
+import threading
+import time
+
+# ROS
+import actionlib
+import rospy
+
+
+class StateProfiler(object):
+    """
+    Records the execution of states to a log file
+
+    >>> profiler = StateProfiler("/tmp/profile.log")  # doctest: +SKIP
+    >>> profiler.instrument(sm)  # doctest: +SKIP
+    >>> with profiler:  # doctest: +SKIP
+    ...     sm.execute()
+    """
+    def __init__(self, log_file, run_id=None):
+        """
+        Constructor
+
+        :param log_file: (str) path of the log file. Records are appended, so multiple runs can share a file
+        :param run_id: (str) identifies this run in the log file. Defaults to the current time
+        """
+        self._log_file = log_file
+        self.run_id = run_id if run_id is not None else "{:.3f}".format(time.time())
+        self._log = None
+        self._lock = threading.Lock()
+        self._stack = threading.local()
+        self._patched = []
+
+    def instrument(self, state, label=None):
+        """
+        Wraps the execute method of the state and, recursively, of all its children. States are only recorded while
+        the profiler is started.
+
+        :param state: smach state or container
+        :param label: (str) name of the state, defaults to the name of its class
+        :return: the state
+        """
+        self._instrument(state, label or state.__class__.__name__)
+        return state
+
+    def _instrument(self, state, path):
+        if hasattr(state, "get_children"):
+            for label, child in state.get_children().items():
+                self._instrument(child, path + "/" + label)
+
+        execute = state.execute
+
+        def profiled_execute(*args, **kwargs):
+            if self._log is None:
+                return execute(*args, **kwargs)
+            return self._execute(path, execute, *args, **kwargs)
+
+        state.execute = profiled_execute
+
+    def _execute(self, path, execute, *args, **kwargs):
+        calls = defaultdict(int)
+        stack = self._thread_stack()
+        stack.append(calls)
+        outcome = None
+        enter = time.time()
+        try:
+            outcome = execute(*args, **kwargs)
+            return outcome
+        except Exception as e:
+            outcome = "exception:{}".format(type(e).__name__)
+            raise
+        finally:
+            stack.pop()
+            self._write({"run": self.run_id, "path": path, "enter": enter, "exit": time.time(), "outcome": outcome,
+                         "calls": calls})
+
+    def _thread_stack(self):
+        if not hasattr(self._stack, "calls"):
+            self._stack.calls = []
+        return self._stack.calls
+
+    def _count_call(self, key):
+        stack = self._thread_stack()
+        if stack:
+            stack[-1][key] += 1
+
+    def _write(self, record):
+        with self._lock:
+            if self._log is not None:
+                self._log.write(json.dumps(record, separators=(",", ":")) + "\n")
+
+    def start(self):
+        """ Opens the log file and starts counting the service calls and action goals """
+        with self._lock:
+            if self._log is not None:
+                return
+            self._log = open(self._log_file, "a")
+
+        profiler = self
+
+        original_call = rospy.ServiceProxy.call
+
+        def call(proxy, *args, **kwargs):
+            profiler._count_call("srv:" + proxy.resolved_name)
+            return original_call(proxy, *args, **kwargs)
+
+        original_send_goal = actionlib.SimpleActionClient.send_goal
+
+        def send_goal(client, *args, **kwargs):
+            profiler._count_call("action:" + client.action_client.ns)
+            return original_send_goal(client, *args, **kwargs)
+
+        self._patched = [(rospy.ServiceProxy, "call", original_call),
+                         (actionlib.SimpleActionClient, "send_goal", original_send_goal)]
+        rospy.ServiceProxy.call = call
+        actionlib.SimpleActionClient.send_goal = send_goal
+        rospy.loginfo("Profiling state machine execution to {}".format(self._log_file))
+
+    def stop(self):
+        """ Restores the service and action clients and closes the log file """
+        for cls, name, original in self._patched:
+            setattr(cls, name, original)
+        self._patched = []
+
+        with self._lock:
+            if self._log is not None:
+                self._log.close()
+                self._log = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exception_type, exception_val, trace):
+        self.stop()
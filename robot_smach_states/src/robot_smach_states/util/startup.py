@@ -3,6 +3,7 @@ State machine startup
 
 Usage:
   challenge_{challenge_name}.py ({robot}) [--initial=<init>] [--initial_pose=<init_pose>] [--debug] [--no-execute]
+                                [--profile=<log_file>]
 
 Options:
   -h --help                     Show this screen.
@@ -10,6 +11,7 @@ Options:
   --initial_pose=<init_pose>    Initial state
   --debug                       Run the IntrospectionServer
   --no-execute                  Only construct state machine, do not execute it, i.e. only do checks.
+  --profile=<log_file>          Record the execution of all states to this file, see util/profiler.py
 """
 
 from __future__ import absolute_import
@@ -26,6 +28,7 @@ import smach_ros
 
 # TU/e Robotics
 from robot_skills.util.robot_constructor import robot_constructor
+from robot_smach_states.util.profiler import StateProfiler
 
 
 def startup(statemachine_creator, statemachine_args = (), initial_state=None, robot_name='', challenge_name=None, argv=sys.argv):
@@ -54,6 +57,7 @@ def startup(statemachine_creator, statemachine_args = (), initial_state=None, ro
     initial_pose = arguments["--initial_pose"]
     enable_debug = arguments["--debug"]
     no_execute = arguments["--no-execute"]
+    profile_log = arguments["--profile"]
 
     robot = robot_constructor(robot_name)
 
@@ -84,9 +88,20 @@ def startup(statemachine_creator, statemachine_args = (), initial_state=None, ro
             introserver = smach_ros.IntrospectionServer(robot_name, executioner, '/SM_ROOT_PRIMARY')
             introserver.start()
 
+        profiler = None
+        if profile_log:
+            profiler = StateProfiler(profile_log)
+            profiler.instrument(executioner)
+
         if not no_execute:
             # Run the statemachine
-            outcome = executioner.execute()
+            if profiler:
+                profiler.start()
+            try:
+                outcome = executioner.execute()
+            finally:
+                if profiler:
+                    profiler.stop()
             rospy.loginfo("Final outcome: {0}".format(outcome))
 
         if introserver:
@@ -5,6 +5,7 @@ import PyKDL as kdl
 
 # Robot Skills
 from robot_skills.util.entity import Entity
+from robot_skills.util.plan import Plan
 from robot_skills.util.volume import BoxVolume
 
 # Robot Smach States
@@ -63,6 +64,20 @@ class TestGetRoom(unittest.TestCase):
         with self.assertRaises(RuntimeError):
             get_room(self.room_entities, position)
 
+    def test_plan_room_indices(self):
+        """
+        Tests that labelling a plan at once gives the same rooms as the 'get room' method for every point
+        """
+        plan = Plan([(0.05 * i, 0.5, 1.0) for i in range(100)])
+        labels = plan.room_indices(self.room_entities)
+        for point, label in zip(plan.points, labels):
+            try:
+                expected = self.room_entities.index(get_room(self.room_entities, kdl.Vector(*point)))
+            except RuntimeError:
+                expected = -1
+            self.assertEqual(label, expected)
+        self.assertEqual(sorted(set(labels)), [-1, 0, 1, 2])
+
 
 if __name__ == '__main__':
     unittest.main()
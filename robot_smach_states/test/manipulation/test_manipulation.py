@@ -1,13 +1,19 @@
 import unittest
 import mock
 
+# ROS
+import PyKDL as kdl
+
 # Robot Skills
 from robot_skills import arms
 from robot_skills.mockbot import Mockbot
 from robot_skills.util.entity import Entity
+from robot_skills.util.kdl_conversions import FrameStamped
+from robot_skills.util.shape import RightPrism
 
 # Robot Smach States
 from robot_smach_states.manipulation import CloseGripperOnHandoverToRobot, HandoverFromHuman, HandoverToHuman, SetGripper
+from robot_smach_states.manipulation.place_designator import EmptySpotDesignator
 from robot_smach_states.util import designators as ds
 
 
@@ -153,5 +159,46 @@ class TestCloseGripperFail(unittest.TestCase):
         self.robot.arms["leftArm"].handover_to_robot.assert_not_called()
 
 
+class TestEmptySpotDesignator(unittest.TestCase):
+    def setUp(self):
+        self.robot = Mockbot()
+        self.robot.base.get_location = mock.MagicMock(return_value=FrameStamped(kdl.Frame(), "/map"))
+        self.robot.base.global_planner.getPlan = mock.MagicMock(return_value=["dummy_plan"])
+
+        hull = [kdl.Vector(-0.3, -0.3, 0), kdl.Vector(0.3, -0.3, 0), kdl.Vector(0.3, 0.3, 0), kdl.Vector(-0.3, 0.3, 0)]
+        self.table = Entity("table", "table", "/map", kdl.Frame(kdl.Vector(2.0, 0.0, 0.0)),
+                            RightPrism(hull, 0.0, 0.75), {}, [], 0)
+        self.arm_ds = ds.ArmDesignator(self.robot, {'required_arm_name': 'leftArm'})
+        self.designator = EmptySpotDesignator(self.robot, ds.Designator(self.table), self.arm_ds)
+
+    def _set_entities(self, entities):
+        self.robot.ed.get_entities = mock.MagicMock(return_value=[self.table] + entities)
+
+    def test_single_query(self):
+        self._set_entities([])
+        self.assertIsInstance(self.designator.resolve(), FrameStamped)
+        self.robot.ed.get_entities.assert_called_once()
+
+    def test_occupied(self):
+        self._set_entities([])
+        spot = self.designator.resolve()
+
+        cup = Entity("cup", "cup", "/map", kdl.Frame(spot.frame.p), None, {}, [], 0)
+        self._set_entities([cup])
+        other_spot = self.designator.resolve()
+        self.assertGreater((other_spot.frame.p - spot.frame.p).Norm(), self.designator._spacing)
+
+    def test_plan_length_cache(self):
+        self._set_entities([])
+        self.designator.resolve()
+        self.designator.resolve()
+        self.robot.base.global_planner.getPlan.assert_called_once()
+
+        # The robot moved, the plan lengths are no longer valid
+        self.robot.base.get_location.return_value = FrameStamped(kdl.Frame(kdl.Vector(1.0, 0.0, 0.0)), "/map")
+        self.designator.resolve()
+        self.assertEqual(self.robot.base.global_planner.getPlan.call_count, 2)
+
+
 if __name__ == '__main__':
     unittest.main()
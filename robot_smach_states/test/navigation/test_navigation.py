@@ -1,10 +1,20 @@
+import threading
+import time
 import unittest
 
+# ROS
+import rospy
+
 # Robot Skills
 from robot_skills.mockbot import Mockbot
 
 # Robot Smach States
-from robot_smach_states.navigation import ForceDrive
+from robot_smach_states.navigation import ForceDrive, executePlan, getPlan
+
+
+def setUpModule():
+    # The navigation states use the rospy clock, which follows the wall clock once initialized without a node
+    rospy.rostime.set_rostime_initialized(True)
 
 
 class TestForceDrive(unittest.TestCase):
@@ -26,5 +36,70 @@ class TestForceDrive(unittest.TestCase):
         self.robot.base.force_drive.assert_called_with(vx, vy, vth, duration)
 
 
+class TestExecutePlan(unittest.TestCase):
+    def setUp(self):
+        self.robot = Mockbot()
+        self.status = "controlling"
+        self.listeners = []
+        self.robot.base.local_planner.getStatus = lambda: self.status
+        self.robot.base.local_planner.add_status_listener = self.listeners.append
+        self.robot.base.local_planner.remove_status_listener = self.listeners.remove
+        self.state = executePlan(self.robot, lambda: "passed", reset_head=False, reset_pose=False, rate=1.0)
+
+    def set_status(self, status):
+        self.status = status
+        for listener in list(self.listeners):
+            listener(status)
+
+    def test_wake_on_status_change(self):
+        """
+        Check that the loop handles a status change right away instead of at the next period and reports its timing
+        """
+        threading.Timer(0.05, self.set_status, args=("arrived",)).start()
+        start = time.time()
+        self.assertEqual(self.state.execute(), "succeeded")
+        self.assertLess(time.time() - start, 0.5)
+        self.assertEqual(self.listeners, [])
+
+        name, timing = self.robot.base.analyzer.add_loop_timing.call_args[0]
+        self.assertEqual(name, "execute_plan")
+        self.assertEqual(timing.wakeups, 1)
+
+    def test_wake_on_preempt(self):
+        """
+        Check that the loop handles a preempt request right away
+        """
+        threading.Timer(0.05, self.state.request_preempt).start()
+        start = time.time()
+        self.assertEqual(self.state.execute(), "preempted")
+        self.assertLess(time.time() - start, 0.5)
+
+
+class TestGetPlan(unittest.TestCase):
+    def setUp(self):
+        self.robot = Mockbot()
+        self.robot.base.local_planner.setPlan.reset_mock()
+        self.state = getPlan(self.robot, lambda: ("pc", "oc"), speak=False, breakout_delay=0.2)
+
+    def test_plan(self):
+        """
+        Check that the plan is set after the breakout delay
+        """
+        start = time.time()
+        self.assertEqual(self.state.execute(), "goal_ok")
+        self.assertGreaterEqual(time.time() - start, 0.2)
+        self.robot.base.local_planner.setPlan.assert_called_once_with(["dummy_plan"], "pc", "oc")
+
+    def test_preempt_within_breakout_delay(self):
+        """
+        Check that the plan is not set if navigation is preempted during the breakout delay
+        """
+        threading.Timer(0.05, self.state.request_preempt).start()
+        start = time.time()
+        self.assertEqual(self.state.execute(), "preempted")
+        self.assertLess(time.time() - start, 0.15)
+        self.robot.base.local_planner.setPlan.assert_not_called()
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,111 @@
+#! /usr/bin/env python
+from collections import defaultdict
+import os
+import random
+import shutil
+import tempfile
+import unittest
+
+from geometry_msgs.msg import Point, PointStamped
+import numpy as np
+from sklearn.cluster import KMeans
+from std_msgs.msg import Header
+
+from robot_smach_states.util.people_clustering import cluster_people, load_detections, save_detections, \
+    OnlinePeopleClusterer, PeopleClusterer
+
+
+def reference_cluster_people(people_dicts, n_clusters=4):
+    """
+    The implementation that was used in challenge_find_my_mates and challenge_final, without converting the detections
+    to tuples to group them by label
+    """
+    people_pos = np.array([[person['map_ps'].point.x for person in people_dicts],
+                           [person['map_ps'].point.y for person in people_dicts]]).T
+
+    kmeans = KMeans(n_clusters=n_clusters, random_state=0)
+    kmeans.fit(people_pos)
+
+    label2persons = defaultdict(list)
+    for person, label in zip(people_dicts, kmeans.labels_):
+        label2persons[label].append(person)
+
+    closest = {}
+    for label, persons in label2persons.items():
+        closest[label] = sorted(persons, key=lambda _person: np.hypot(
+            *(np.array([_person['map_ps'].point.x, _person['map_ps'].point.y]) - kmeans.cluster_centers_[label])))[0]
+    return [closest[label] for label in sorted(closest)]
+
+
+def random_detections(count, people=4):
+    """ Detections scattered around a number of people, the 'view' is shared by the detections of one view """
+    centers = [(random.uniform(0.0, 8.0), random.uniform(-3.0, 3.0)) for _ in range(people)]
+    detections = []
+    view = None
+    for i in range(count):
+        if i % people == 0:
+            view = Point(x=i)
+        x, y = random.choice(centers)
+        detections.append({
+            "map_ps": PointStamped(header=Header(frame_id="map"),
+                                   point=Point(x + random.gauss(0.0, 0.2), y + random.gauss(0.0, 0.2), 1.5)),
+            "view": view,
+        })
+    return detections
+
+
+class TestPeopleClustering(unittest.TestCase):
+    def setUp(self):
+        random.seed(0)
+        self.detections = random_detections(200)
+
+    def test_cluster_people(self):
+        self.assertEqual(cluster_people(self.detections), reference_cluster_people(self.detections))
+
+    def test_people_clusterer(self):
+        clusterer = PeopleClusterer()
+        for detection in self.detections:
+            clusterer.add(detection)
+        self.assertEqual(clusterer.clusters(), reference_cluster_people(self.detections))
+
+    def test_people_clusterer_bounded(self):
+        clusterer = PeopleClusterer(max_detections=50)
+        clusterer.extend(self.detections)
+        self.assertEqual(len(clusterer), 50)
+        self.assertEqual(clusterer.clusters(), reference_cluster_people(self.detections[-50:]))
+
+    def test_online_people_clusterer(self):
+        clusterer = OnlinePeopleClusterer(batch_size=20)
+        with self.assertRaises(ValueError):
+            clusterer.clusters()
+        clusterer.extend(self.detections)
+        clusters = clusterer.clusters()
+        self.assertEqual(len(clusters), 4)
+        self.assertTrue(all(any(c is d for d in self.detections) for c in clusters))
+
+
+class TestDetectionStorage(unittest.TestCase):
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def test_save_load(self):
+        random.seed(1)
+        detections = random_detections(10)
+        path = os.path.join(self.path, "detections.npz")
+        save_detections(path, detections)
+        loaded = load_detections(path)
+
+        self.assertEqual(len(loaded), len(detections))
+        for original, result in zip(detections, loaded):
+            self.assertEqual(original["map_ps"].point, result["map_ps"].point)
+            self.assertEqual(original["map_ps"].header.frame_id, result["map_ps"].header.frame_id)
+            self.assertEqual(original["view"], result["view"])
+        # Shared messages are stored once and shared again after loading
+        self.assertIs(loaded[0]["view"], loaded[1]["view"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,130 @@
+#! /usr/bin/env python
+import os
+import shutil
+import sys
+import tempfile
+import time
+import unittest
+
+import mock
+import rospy
+import smach
+
+from robot_smach_states.util.profiler import StateProfiler
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "benchmark"))
+from analyse_profile import aggregate, folded_stacks, read_records  # noqa: E402
+
+
+class Work(smach.State):
+    """ Sleeps and calls a service, returns 'again' until it has been executed the provided number of times """
+    def __init__(self, proxy, duration=0.01, repeat=1):
+        smach.State.__init__(self, outcomes=["again", "done"])
+        self.proxy = proxy
+        self.duration = duration
+        self.repeat = repeat
+        self.executions = 0
+
+    def execute(self, userdata=None):
+        self.executions += 1
+        time.sleep(self.duration)
+        self.proxy.call()
+        return "again" if self.executions < self.repeat else "done"
+
+
+class Fail(smach.State):
+    def __init__(self):
+        smach.State.__init__(self, outcomes=["done"])
+
+    def execute(self, userdata=None):
+        raise RuntimeError("Failed on purpose")
+
+
+class TestStateProfiler(unittest.TestCase):
+    def setUp(self):
+        patcher = mock.patch.object(rospy.ServiceProxy, "call")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.proxy = rospy.ServiceProxy.__new__(rospy.ServiceProxy)
+        self.proxy.resolved_name = "/robot/service"
+
+        self.log_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.log_dir)
+        self.log_file = os.path.join(self.log_dir, "profile.log")
+
+    def _state_machine(self):
+        sm = smach.StateMachine(outcomes=["done"])
+        with sm:
+            inner = smach.StateMachine(outcomes=["done"])
+            with inner:
+                smach.StateMachine.add("REPEAT", Work(self.proxy, repeat=3),
+                                       transitions={"again": "REPEAT", "done": "done"})
+            smach.StateMachine.add("FIRST", Work(self.proxy, duration=0.02), transitions={"again": "done",
+                                                                                          "done": "INNER"})
+            smach.StateMachine.add("INNER", inner, transitions={"done": "done"})
+        return sm
+
+    def test_nested_containers(self):
+        """
+        Check that every execution of the states in nested containers is recorded with its duration and calls
+        """
+        profiler = StateProfiler(self.log_file, run_id="test")
+        sm = profiler.instrument(self._state_machine(), "SM")
+        with profiler:
+            self.assertEqual(sm.execute(), "done")
+
+        records = read_records([self.log_file])
+        self.assertEqual({record["run"] for record in records}, {"test"})
+        self.assertTrue(all(record["exit"] >= record["enter"] for record in records))
+
+        states = aggregate(records)
+        self.assertEqual({path: len(state["durations"]) for path, state in states.items()},
+                         {"SM": 1, "SM/FIRST": 1, "SM/INNER": 1, "SM/INNER/REPEAT": 3})
+        self.assertEqual(dict(states["SM/INNER/REPEAT"]["outcomes"]), {"again": 2, "done": 1})
+        self.assertEqual(dict(states["SM/INNER"]["outcomes"]), {"done": 1})
+
+        # Durations of the containers include those of their children
+        self.assertGreaterEqual(states["SM/FIRST"]["durations"][0], 0.02)
+        self.assertGreaterEqual(sum(states["SM/INNER/REPEAT"]["durations"]), 0.03)
+        self.assertGreaterEqual(states["SM/INNER"]["durations"][0], sum(states["SM/INNER/REPEAT"]["durations"]))
+        self.assertGreaterEqual(states["SM"]["durations"][0],
+                                states["SM/FIRST"]["durations"][0] + states["SM/INNER"]["durations"][0])
+
+        # Calls are counted for the innermost executing state only
+        self.assertEqual(dict(states["SM/INNER/REPEAT"]["calls"]), {"srv:/robot/service": 3})
+        self.assertEqual(dict(states["SM/FIRST"]["calls"]), {"srv:/robot/service": 1})
+        self.assertEqual(dict(states["SM"]["calls"]), {})
+
+        self.assertEqual([line.split()[0] for line in folded_stacks(states)],
+                         ["SM", "SM;FIRST", "SM;INNER", "SM;INNER;REPEAT"])
+
+    def test_not_started(self):
+        """
+        Check that nothing is recorded if the profiler is not started and that the service client is restored
+        """
+        original_call = rospy.ServiceProxy.call
+        profiler = StateProfiler(self.log_file)
+        sm = profiler.instrument(self._state_machine(), "SM")
+        self.assertEqual(sm.execute(), "done")
+        self.assertFalse(os.path.exists(self.log_file))
+
+        with profiler:
+            self.assertIsNot(rospy.ServiceProxy.call, original_call)
+        self.assertIs(rospy.ServiceProxy.call, original_call)
+
+    def test_exception(self):
+        """
+        Check that a state that raises an exception is recorded with the type of the exception as outcome
+        """
+        profiler = StateProfiler(self.log_file)
+        state = profiler.instrument(Fail(), "FAIL")
+        with profiler:
+            self.assertRaises(RuntimeError, state.execute)
+
+        self.assertEqual(dict(aggregate(read_records([self.log_file]))["FAIL"]["outcomes"]),
+                         {"exception:RuntimeError": 1})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,116 @@
+#! /usr/bin/env python
+"""
+Replays a recorded stream of SMACH introspection messages through the smach viewer's dotcode generation, once
+regenerating the dotcode of all containers for every redraw and once re-using the dotcode of unchanged containers.
+
+Record the stream of a running challenge with:
+
+    rosbag record -O smach.bag -e ".*/smach/container_(structure|status)"
+"""
+
+# System
+import argparse
+import textwrap
+import time
+
+# ROS
+import numpy as np
+import rosbag
+from smach_ros import introspection
+
+# TU/e Robotics
+from test_tools.headless_smach_viewer import SmachGraph
+
+
+def read_introspection_messages(bag_file):
+    """
+    Reads the SMACH introspection messages of a bag file
+
+    :param bag_file: (str) path of the bag file
+    :return: generator of (stamp [s], server name, message) tuples, server name is None for status messages
+    """
+    with rosbag.Bag(bag_file) as bag:
+        for topic, msg, stamp in bag.read_messages():
+            if topic.endswith(introspection.STRUCTURE_TOPIC):
+                yield stamp.to_sec(), topic[:-len(introspection.STRUCTURE_TOPIC)], msg
+            elif topic.endswith(introspection.STATUS_TOPIC):
+                yield stamp.to_sec(), None, msg
+
+
+def replay(messages, render_rate, path, max_depth, show_all, label_width):
+    """
+    Feeds the messages to two graphs and generates the dotcode when the viewer would redraw it
+
+    :param messages: list of (stamp, server name, message) tuples
+    :param render_rate: (float) maximum number of redraws per second [Hz], redraws requested in between are
+        coalesced. If 0, every update is redrawn
+    :return: dict with the generation times [s] of both graphs and counts
+    """
+    incremental, full = SmachGraph(), SmachGraph()
+    label_wrapper = textwrap.TextWrapper(label_width, break_long_words=True)
+    period = 1.0 / render_rate if render_rate > 0 else 0.0
+
+    result = {"updates": 0, "renders": 0, "mismatches": 0, "incremental": [], "full": []}
+    pending = False
+    last_render = None
+    for stamp, server_name, msg in messages:
+        if server_name is not None:
+            _, needs_redraw = incremental.update_structure(msg, server_name)
+            full.update_structure(msg, server_name)
+        else:
+            needs_update, needs_redraw = incremental.update_status(msg)
+            full.update_status(msg)
+            needs_redraw = needs_update and needs_redraw
+
+        if needs_redraw:
+            result["updates"] += 1
+            pending = True
+        if not pending or (last_render is not None and stamp < last_render + period):
+            continue
+
+        pending = False
+        last_render = stamp
+        result["renders"] += 1
+
+        start = time.time()
+        dotcode = incremental.get_dotcode(path, [], max_depth, show_all, label_wrapper)
+        result["incremental"].append(time.time() - start)
+
+        start = time.time()
+        full.invalidate_all()
+        full_dotcode = full.get_dotcode(path, [], max_depth, show_all, label_wrapper)
+        result["full"].append(time.time() - start)
+
+        if dotcode != full_dotcode:
+            result["mismatches"] += 1
+
+    return result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measures the dotcode generation of the smach viewer on a recorded "
+                                                 "stream of SMACH introspection messages")
+    parser.add_argument("bag_file", help="Bag file with the structure and status topics of SMACH introspection servers")
+    parser.add_argument("--render-rate", type=float, default=5.0, help="Maximum redraw rate [Hz], 0 to redraw on "
+                                                                       "every update")
+    parser.add_argument("--path", default="/", help="Path of the container that is shown")
+    parser.add_argument("--max-depth", type=int, default=-1, help="Depth to which containers are expanded")
+    parser.add_argument("--show-all", action="store_true", help="Show implicit transitions")
+    parser.add_argument("--label-width", type=int, default=40)
+    args = parser.parse_args()
+
+    messages = list(read_introspection_messages(args.bag_file))
+    print("Replaying {} messages spanning {:.1f} s".format(
+        len(messages), messages[-1][0] - messages[0][0] if messages else 0.0))
+
+    result = replay(messages, args.render_rate, args.path, args.max_depth, args.show_all, args.label_width)
+    print("{} updates requiring new dotcode, {} renders at {} Hz".format(
+        result["updates"], result["renders"], args.render_rate))
+    for name in ["full", "incremental"]:
+        durations = np.array(result[name]) * 1000.0
+        if len(durations):
+            print("{:<12} total {:10.1f} ms, mean {:8.3f} ms, p90 {:8.3f} ms, max {:8.3f} ms".format(
+                name, durations.sum(), durations.mean(), np.percentile(durations, 90), durations.max()))
+    if result["mismatches"]:
+        print("WARNING: the incremental dotcode differed from the full dotcode in {} renders".format(
+            result["mismatches"]))
@@ -9,8 +9,10 @@ r = float(rospy.get_param("~rate", 1/60.0))
 length = int(rospy.get_param("~buffer_length", 1))
 path = rospy.get_param("~path", odometer.DEFAULT_PATH)
 filename = rospy.get_param("~filename", odometer.DEFAULT_FILENAME)
+fsync_period = float(rospy.get_param("~fsync_period", 60.0))
+compact_after = rospy.get_param("~compact_after", 7)
 
-meter = odometer.Odometer(path, filename)
+meter = odometer.Odometer(path, filename, fsync_period=fsync_period, compact_after=compact_after)
 rate = rospy.Rate(max(r, 1e-3))
 
 while not rospy.is_shutdown():
@@ -0,0 +1,211 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from multiprocessing.pool import ThreadPool
+
+MANIFEST_FILE = ".manifest.jsonl"
+CHUNK_SIZE = 1024 * 1024
+
+
+class Manifest(object):
+    """
+    Records which files were collected into a directory, one JSON object per line:
+
+        {"source": "/tmp/hmi/1.json", "destination": "hmi/1.json", "size": 1024, "mtime": 1562331234.5,
+         "sha1": "...", "method": "copy"}
+
+    A line is only written once the file is completely collected and the file is only appended to, so an interrupted
+    collection can be restarted safely.
+    """
+    def __init__(self, directory):
+        self.path = os.path.join(directory, MANIFEST_FILE)
+        self._directory = directory
+        self._entries = {}
+        self._sources = {}  # Maps destination to source
+        self._lock = threading.Lock()
+
+        if os.path.exists(self.path):
+            with open(self.path, "r+") as f:
+                complete = 0  # Length of the complete lines
+                for line in iter(f.readline, ""):
+                    if not line.endswith("\n"):
+                        break  # Incomplete last line of an interrupted collection
+                    complete += len(line)
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue
+                    self._entries[entry["source"]] = entry
+                    self._sources[entry["destination"]] = entry["source"]
+                # Drop the incomplete line, so the next entry starts on a line of its own
+                f.truncate(complete)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def source_of(self, destination):
+        """ Returns the source that was collected to the destination (relative to the directory), None if none was """
+        return self._sources.get(destination)
+
+    def is_collected(self, source, size, mtime):
+        """ Checks whether the source file was collected before and has not changed since """
+        entry = self._entries.get(source)
+        return entry is not None and entry["size"] == size and entry["mtime"] == mtime and \
+            os.path.exists(os.path.join(self._directory, entry["destination"]))
+
+    def add(self, entry):
+        with self._lock:
+            self._entries[entry["source"]] = entry
+            self._sources[entry["destination"]] = entry["source"]
+            with open(self.path, "a") as f:
+                f.write(json.dumps(entry, sort_keys=True) + "\n")
+
+
+def _checksum(file_name):
+    sha1 = hashlib.sha1()
+    with open(file_name, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            sha1.update(chunk)
+    return sha1.hexdigest()
+
+
+def _copy(source, destination):
+    """ Copies the file via a temporary file and returns its checksum, which is computed while copying """
+    sha1 = hashlib.sha1()
+    fd, tmp_destination = tempfile.mkstemp(suffix=".partial", prefix=".", dir=os.path.dirname(destination))
+    try:
+        with open(source, "rb") as src, os.fdopen(fd, "wb") as dst:
+            for chunk in iter(lambda: src.read(CHUNK_SIZE), b""):
+                sha1.update(chunk)
+                dst.write(chunk)
+        shutil.copystat(source, tmp_destination)
+        os.rename(tmp_destination, destination)
+    except BaseException:
+        if os.path.exists(tmp_destination):
+            os.remove(tmp_destination)
+        raise
+    return sha1.hexdigest()
+
+
+def _collect_file(source, destination, link):
+    """
+    Hard-links or copies a single file
+
+    :return: tuple with the checksum and the method that was used
+    """
+    if os.path.exists(destination):
+        os.remove(destination)
+    if link:
+        try:
+            os.link(source, destination)
+            return _checksum(destination), "link"
+        except OSError:
+            pass  # E.g. a different file system, fall back to copying
+    return _copy(source, destination), "copy"
+
+
+def _common_directory(paths):
+    """ Returns the deepest directory that contains all paths """
+    parts = [os.path.dirname(path).split(os.sep) for path in paths]
+    common = []
+    for names in zip(*parts):
+        if any(name != names[0] for name in names):
+            break
+        common.append(names[0])
+    return os.sep.join(common) or os.sep
+
+
+def resolve_destinations(jobs, manifest):
+    """
+    Determines where every file is collected, relative to the collection directory. A file is collected as
+    <sub directory>/<basename>, unless other sources would end up at the same destination, either in this collection
+    or in a previous one according to the manifest. These files keep their path relative to the parent of the deepest
+    directory that contains all of them, e.g. /tmp/a/1.json and /tmp/b/1.json become hmi/tmp/a/1.json and
+    hmi/tmp/b/1.json. Hence, they never end up at <sub directory>/<basename> itself.
+
+    :param jobs: list of (source file, destination sub directory) tuples
+    :param manifest: Manifest of the collection directory
+    :return: dict mapping the jobs to the destinations
+    """
+    sources = defaultdict(set)
+    for source, sub_directory in jobs:
+        sources[os.path.join(sub_directory, os.path.basename(source))].add(source)
+
+    destinations = {}
+    for destination, colliding in sources.items():
+        previous = manifest.source_of(destination)
+        if len(colliding) == 1 and previous in (None, next(iter(colliding))):
+            destinations[(next(iter(colliding)), os.path.dirname(destination))] = destination
+            continue
+
+        parent = os.path.dirname(_common_directory(colliding | {previous} - {None}))
+        for source in colliding:
+            sub_directory = os.path.dirname(destination)
+            destinations[(source, sub_directory)] = os.path.join(sub_directory, os.path.relpath(source, parent))
+    return destinations
+
+
+def collect_files(jobs, directory, workers=4, link=False):
+    """
+    Collects files into a directory with a pool of workers, skipping the files that were already collected according
+    to the manifest of the directory. Files with the same name are collected side by side, see resolve_destinations.
+
+    :param jobs: list of (source file, destination sub directory) tuples
+    :param directory: directory the files are collected in
+    :param workers: number of files that are collected in parallel
+    :param link: hard-link the files instead of copying them, if possible
+    :return: dict with statistics
+    """
+    manifest = Manifest(directory)
+    destinations = resolve_destinations(jobs, manifest)
+    stats = {"collected": 0, "skipped": 0, "failed": 0, "bytes": 0}
+    stats_lock = threading.Lock()
+
+    def collect(job):
+        source = job[0]
+        try:
+            stat = os.stat(source)
+            if manifest.is_collected(source, stat.st_size, stat.st_mtime):
+                with stats_lock:
+                    stats["skipped"] += 1
+                return
+
+            destination = destinations[job]
+            checksum, method = _collect_file(source, os.path.join(directory, destination), link)
+            manifest.add({"source": source, "destination": destination, "size": stat.st_size,
+                          "mtime": stat.st_mtime, "sha1": checksum, "method": method})
+            with stats_lock:
+                stats["collected"] += 1
+                stats["bytes"] += stat.st_size
+        except (IOError, OSError) as e:
+            print '\033[91mCannot collect %s: %s \033[0m' % (source, e)
+            with stats_lock:
+                stats["failed"] += 1
+
+    for sub_directory in set(os.path.dirname(destination) for destination in destinations.values()):
+        if not os.path.exists(os.path.join(directory, sub_directory)):
+            os.makedirs(os.path.join(directory, sub_directory))
+
+    jobs = list(destinations)
+    start = time.time()
+    pool = ThreadPool(workers)
+    try:
+        pool.map(collect, jobs)
+    finally:
+        pool.close()
+        pool.join()
+
+    stats["duration"] = time.time() - start
+    stats["throughput"] = stats["bytes"] / stats["duration"] if stats["duration"] > 0 else 0.0
+    return stats
+
+
+def print_statistics(stats):
+    print "Collected %d files (%.1f MB) in %.1f s (%.1f MB/s), skipped %d already collected files, %d failed" % (
+        stats["collected"], stats["bytes"] / 1e6, stats["duration"], stats["throughput"] / 1e6, stats["skipped"],
+        stats["failed"])
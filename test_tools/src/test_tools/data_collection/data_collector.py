@@ -3,7 +3,7 @@
 """Data collector
 
 Usage:
-  data_collector.py <name> <start_time> <end_time> [--go]
+  data_collector.py <name> <start_time> <end_time> [--go] [--workers=<n>] [--link]
   data_collector.py (-h | --help)
   data_collector.py --version
 
@@ -13,7 +13,11 @@ Examples:
   data_collector.py rwc_2016_challenge_speech_recognition 15:30 2015-03-02 17:40 2015-04-08
 
 Options:
-  -h --help     Show this screen.
+  -h --help       Show this screen.
+  --workers=<n>   Number of files that are collected in parallel [default: 4].
+  --link          Hard-link the files instead of copying them, if possible.
+
+Files that were collected into <name> before, and did not change since, are skipped (see collection.Manifest).
 
 """
 from docopt import docopt
@@ -21,7 +25,7 @@ from datetime import datetime
 import sys
 import os
 from glob import glob
-import shutil
+from collection import collect_files, print_statistics
 from util import parse_start_end, get_modification_date
 
 GLOBS = {
@@ -66,18 +70,18 @@ if __name__ == '__main__':
     if not os.path.exists(name):
         os.makedirs(name)
 
-    # Copy files
+    # Select files
+    jobs = []
     for cat_name, glob_entries in GLOBS.iteritems():
-        dir_name = name + "/" + cat_name
-        if not os.path.exists(dir_name):
-            os.makedirs(dir_name)
-
         for glob_entry in glob_entries:
             for file_name in glob(glob_entry):
                 # Check if modification date is between bounds (or unknown)
                 mod_date = get_modification_date(file_name)
                 if not mod_date or start < mod_date < end:
-                    print "Writing file '%s' to '%s'" % (file_name, dir_name)
-                    shutil.copy(file_name, dir_name)
+                    jobs.append((file_name, cat_name))
+
+    # Copy files
+    stats = collect_files(jobs, name, workers=int(arguments["--workers"]), link=arguments["--link"])
+    print_statistics(stats)
 
     del_empty_dirs(name)
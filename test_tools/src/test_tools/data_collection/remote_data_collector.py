@@ -7,6 +7,9 @@ Usage:
   remote_data_collector.py (-h | --help)
   remote_data_collector.py --version
 
+The data is collected on the remotes in /tmp/data_collection/<name>, which is synchronized to <name>/<remote> with
+rsync. Invoking the collector again only collects and transfers files that are new or modified.
+
 Examples:
   remote_data_collector.py reo2016_challenge_navigation 15:30 15:40 amigo1 amigo2 amigo3
   remote_data_collector.py rwc_2016_challenge_restaurant 15:30 now sergio1 sergio2 sergi3
@@ -42,7 +45,6 @@ def del_empty_dirs(s_dir):
 
 if __name__ == '__main__':
     now = datetime.now()
-    now_str = now.strftime("%Y-%m-%d_%H-%M-%S")
 
     arguments = docopt(__doc__, version='Data Collector 1.0')
 
@@ -64,14 +66,15 @@ if __name__ == '__main__':
         if not os.path.exists(dir_name):
             os.makedirs(dir_name)
 
-        remote_dir_name = "/tmp/%s" % now_str
+        # Keep the collected data on the remote, so its manifest can be used next time
+        remote_dir_name = "/tmp/data_collection/%s" % os.path.basename(os.path.abspath(name))
 
-        cmd = "rosrun test_tools data_collector.py %s %s %s --go" % (remote_dir_name, start.strftime("%H:%M"), end.strftime("%H:%M"))
+        cmd = "rosrun test_tools data_collector.py %s %s %s --go --link" % (remote_dir_name, start.strftime("%H:%M"), end.strftime("%H:%M"))
         print ">> %s" % cmd
 
         os.system("ssh %s 'source ~/.tue/setup.bash && %s'" % (remote, cmd))
 
-        cp_cmd = "scp -r %s:%s/* %s" % (remote, remote_dir_name, dir_name)
+        cp_cmd = "rsync -a --exclude=.manifest.jsonl %s:%s/ %s" % (remote, remote_dir_name, dir_name)
         print ">> %s" % cp_cmd
 
         os.system(cp_cmd)
@@ -43,6 +43,7 @@ import pprint
 import copy
 import StringIO
 import colorsys
+import time
 
 import wxversion
 wxversion.select("2.8")
@@ -116,6 +117,18 @@ class ContainerNode():
         self._local_data = smach.UserData()
         self._info = ''
 
+        # Dotcode of this container, re-used as long as this container and its children don't change
+        self._dotcode = None
+        self._dotcode_key = None
+
+    def invalidate(self):
+        """Discard the cached dotcode of this container."""
+        self._dotcode = None
+
+    def has_dotcode(self):
+        """Return True if the dotcode of this container is cached."""
+        return self._dotcode is not None
+
     def update_structure(self, msg):
         """Update the structure of this container from a given message. Return True if anything changes."""
         needs_update = False
@@ -134,6 +147,7 @@ class ContainerNode():
             self._outcomes_to = msg.outcomes_to
 
             self._container_outcomes = msg.container_outcomes
+            self.invalidate()
 
         return needs_update
 
@@ -145,7 +159,8 @@ class ContainerNode():
 
         # Check if the initial states or active states have changed
         if set(msg.initial_states) != set(self._initial_states):
-            self._structure_changed = True
+            # The edges to the initial states are part of the dotcode
+            self.invalidate()
             needs_update = True
         if set(msg.active_states) != set(self._active_states):
             needs_update = True
@@ -184,6 +199,10 @@ class ContainerNode():
         @param label_wrapper: A text wrapper for wrapping element names
         @param attrs: A dict of dotcode attributes for this cluster
         """
+        attrs = dict(attrs)
+        key = (depth, max_depth, show_all, label_wrapper.width, tuple(sorted(attrs.items())))
+        if self._dotcode is not None and self._dotcode_key == key:
+            return self._dotcode
 
         dotstr = 'subgraph "cluster_%s" {\n' % (self._path)
         if depth == 0:
@@ -326,6 +345,9 @@ class ContainerNode():
                             from_key, to_key, attr_string(edge_attrs))
 
         dotstr += '}\n'
+
+        self._dotcode = dotstr
+        self._dotcode_key = key
         return dotstr
 
     def set_styles(self, selected_paths, depth, max_depth, items, subgraph_shapes, containers):
@@ -432,6 +454,115 @@ class ContainerNode():
                         #print child_path+" NOT IN "+str(items.keys())
                         pass
 
+class SmachGraph():
+    """
+    This class keeps track of the containers of the running SMACH systems and
+    generates the dotcode of the graph.
+
+    The dotcode of each container is cached. When a container changes, only
+    its cached dotcode and that of its ancestors is discarded, so only the
+    changed subtrees are generated again.
+    """
+    def __init__(self):
+        self.containers = {}
+        self.top_containers = {}
+
+    def invalidate(self, path):
+        """Discard the cached dotcode of a container and of all its ancestors."""
+        while path:
+            if path in self.containers:
+                self.containers[path].invalidate()
+            path = '/'.join(path.split('/')[0:-1])
+
+    def invalidate_all(self):
+        """Discard the cached dotcode of all containers."""
+        for container in self.containers.itervalues():
+            container.invalidate()
+
+    def update_structure(self, msg, server_name):
+        """Update the structure of a container from a given message.
+
+        @return: (new, needs_redraw) tuple, new is True if the container was not known yet
+        """
+        path = msg.path
+        parent_path = '/'.join(path.split('/')[0:-1])
+
+        if path in self.containers:
+            needs_redraw = self.containers[path].update_structure(msg)
+            if needs_redraw:
+                self.invalidate(path)
+            return False, needs_redraw
+
+        container = ContainerNode(server_name, msg)
+        self.containers[path] = container
+
+        # Store this as a top container if it has no parent
+        if parent_path == '':
+            self.top_containers[path] = container
+
+        # The parent draws this child as a cluster from now on
+        self.invalidate(path)
+
+        # We need to redraw the graph if this container's parent is already known
+        return True, parent_path in self.containers
+
+    def update_status(self, msg):
+        """Update the status of a container from a given message.
+
+        @return: (needs_update, structure_changed) tuple
+        """
+        container = self.containers.get(msg.path)
+        if container is None:
+            return False, False
+
+        needs_update = container.update_status(msg)
+        structure_changed = not container.has_dotcode()
+        if structure_changed:
+            self.invalidate(msg.path)
+        return needs_update, structure_changed
+
+    def get_containers(self, path):
+        """Get the containers to draw for a given path."""
+        if path in self.containers:
+            # Some non-root path
+            return {path: self.containers[path]}
+        elif path == '/':
+            # Root path
+            return self.top_containers
+        return {}
+
+    def get_dotcode(self, path, selected_paths, max_depth, show_all, label_wrapper):
+        """Generate the dotcode of the graph, re-using the dotcode of the containers that didn't change."""
+        dotstr = "digraph {\n\t"
+        dotstr += ';'.join([
+            "compound=true",
+            "outputmode=nodesfirst",
+            "labeljust=l",
+            "nodesep=0.5",
+            "minlen=2",
+            "mclimit=5",
+            "clusterrank=local",
+            "ranksep=0.75",
+            # "remincross=true",
+            # "rank=sink",
+            "ordering=\"\"",
+            ])
+        dotstr += ";\n"
+
+        # Generate the rest of the graph
+        for tc in self.get_containers(path).itervalues():
+            dotstr += tc.get_dotcode(
+                    selected_paths,[],
+                    0,max_depth,
+                    self.containers,
+                    show_all,
+                    label_wrapper)
+        else:
+            dotstr += '"__empty__" [label="Path not available.", shape="plaintext"]'
+
+        dotstr += '\n}\n'
+        return dotstr
+
 class SmachViewerFrame(wx.Frame):
     """
     This class provides a GUI application for viewing SMACH plans.
@@ -440,11 +571,18 @@ class SmachViewerFrame(wx.Frame):
         wx.Frame.__init__(self, None, -1, "Smach Viewer", size=(720,480))
 
         # Create graph
-        self._containers = {}
-        self._top_containers = {}
+        self._graph = SmachGraph()
+        self._containers = self._graph.containers
+        self._top_containers = self._graph.top_containers
         self._update_cond = threading.Condition()
         self._needs_refresh = True
 
+        # Bursts of updates are coalesced into a single redraw, at most max_render_rate times per second
+        self._render_period = 1.0 / rospy.get_param('~max_render_rate', 5.0)
+        self._graph_update_pending = True
+        self._tree_update_pending = True
+        self._dotcode = None
+
         vbox = wx.BoxSizer(wx.VERTICAL)
 
 
@@ -572,7 +710,6 @@ class SmachViewerFrame(wx.Frame):
 
         # smach introspection client
         self._client = smach_ros.IntrospectionClient()
-        self._containers= {}
         self._selected_paths = []
 
         # Message subscribers
@@ -613,8 +750,20 @@ class SmachViewerFrame(wx.Frame):
     def update_graph(self):
         """Notify all that the graph needs to be updated."""
         with self._update_cond:
+            self._graph_update_pending = True
+            self._tree_update_pending = True
             self._update_cond.notify_all()
 
+    def _wait_for_update(self, pending_flag):
+        """Wait until an update is requested, return False if we're shutting down.
+
+        Must be called while holding the update condition.
+        """
+        while self._keep_running and not rospy.is_shutdown() and not getattr(self, pending_flag):
+            # Time out now and then to notice a ROS shutdown
+            self._update_cond.wait(1.0)
+        return self._keep_running and not rospy.is_shutdown()
+
     def on_set_initial_state(self, event):
         """Event: Change the initial state of the server."""
         state_path = self._selected_paths[0]
@@ -719,44 +868,27 @@ class SmachViewerFrame(wx.Frame):
 
         # Get the node path
         path = msg.path
-        pathsplit = path.split('/')
-        parent_path = '/'.join(pathsplit[0:-1])
 
         rospy.logdebug("RECEIVED: "+path)
         rospy.logdebug("CONTAINERS: "+str(self._containers.keys()))
 
-        # Initialize redraw flag
-        needs_redraw = False
-
-        if path in self._containers:
-            rospy.logdebug("UPDATING: "+path)
+        with self._update_cond:
+            new, needs_redraw = self._graph.update_structure(msg, server_name)
 
-            # Update the structure of this known container
-            needs_redraw = self._containers[path].update_structure(msg)
-        else:
+        if new:
             rospy.logdebug("CONSTRUCTING: "+path)
 
-            # Create a new container
-            container = ContainerNode(server_name, msg)
-            self._containers[path] = container
-
-            # Store this as a top container if it has no parent
-            if parent_path == '':
-                self._top_containers[path] = container
-
             # Append paths to selector
             self.path_combo.Append(path)
             self.path_input.Append(path)
 
-            # We need to redraw thhe graph if this container's parent is already known
-            if parent_path in self._containers:
-                needs_redraw= True
-
         # Update the graph if necessary
         if needs_redraw:
             with self._update_cond:
                 self._structure_changed = True
                 self._needs_zoom = True # TODO: Make it so you can disable this
+                self._graph_update_pending = True
+                self._tree_update_pending = True
                 self._update_cond.notify_all()
 
     def _status_msg_update(self, msg):
@@ -772,10 +904,12 @@ class SmachViewerFrame(wx.Frame):
 
         # Check if this is a known container
         if path in self._containers:
-            # Get the container and check if the status update requires regeneration
-            container = self._containers[path]
-            if container.update_status(msg):
-                with self._update_cond:
+            # Update the container and check if the status update requires regeneration
+            with self._update_cond:
+                needs_update, structure_changed = self._graph.update_status(msg)
+                if needs_update:
+                    self._structure_changed |= structure_changed
+                    self._graph_update_pending = True
                     self._update_cond.notify_all()
 
             # TODO: Is this necessary?
@@ -791,77 +925,69 @@ class SmachViewerFrame(wx.Frame):
         The graph gets updated in one of two ways:
 
           1: The structure of the SMACH plans has changed, or the display
-          settings have been changed. In this case, the dotcode needs to be
-          regenerated.
+          settings have been changed. In this case, the dotcode of the
+          changed containers needs to be regenerated.
 
           2: The status of the SMACH plans has changed. In this case, we only
           need to change the styles of the graph.
+
+        The graph is redrawn at most once per render period, all updates that
+        arrive in the meantime are handled by that single redraw.
         """
-        while self._keep_running and not rospy.is_shutdown():
+        last_render = 0.0
+        while True:
             with self._update_cond:
-                # Wait for the update condition to be triggered
-                self._update_cond.wait()
+                # Wait for an update to be requested
+                if not self._wait_for_update('_graph_update_pending'):
+                    break
+
+            # Coalesce the updates that arrive until the next render slot
+            delay = last_render + self._render_period - time.time()
+            if delay > 0:
+                time.sleep(delay)
+            last_render = time.time()
+
+            with self._update_cond:
+                self._graph_update_pending = False
 
                 # Get the containers to update
-                containers_to_update = {}
-                if self._path in self._containers:
-                    # Some non-root path
-                    containers_to_update = {self._path:self._containers[self._path]}
-                elif self._path == '/':
-                    # Root path
-                    containers_to_update = self._top_containers
+                containers_to_update = self._graph.get_containers(self._path)
 
                 # Check if we need to re-generate the dotcode (if the structure changed)
                 # TODO: needs_zoom is a misnomer
+                dotstr = None
                 if self._structure_changed or self._needs_zoom:
-                    dotstr = "digraph {\n\t"
-                    dotstr += ';'.join([
-                        "compound=true",
-                        "outputmode=nodesfirst",
-                        "labeljust=l",
-                        "nodesep=0.5",
-                        "minlen=2",
-                        "mclimit=5",
-                        "clusterrank=local",
-                        "ranksep=0.75",
-                        # "remincross=true",
-                        # "rank=sink",
-                        "ordering=\"\"",
-                        ])
-                    dotstr += ";\n"
-
-                    # Generate the rest of the graph
-                    # TODO: Only re-generate dotcode for containers that have changed
-                    for path,tc in containers_to_update.iteritems():
-                        dotstr += tc.get_dotcode(
-                                self._selected_paths,[],
-                                0,self._max_depth,
-                                self._containers,
-                                self._show_all_transitions,
-                                self._label_wrapper)
-                    else:
-                        dotstr += '"__empty__" [label="Path not available.", shape="plaintext"]'
-
-                    dotstr += '\n}\n'
-
-                    # Set the dotcode to the new dotcode, reset the flags
-                    self.set_dotcode(dotstr,zoom=False)
+                    dotstr = self._graph.get_dotcode(
+                            self._path,
+                            self._selected_paths,
+                            self._max_depth,
+                            self._show_all_transitions,
+                            self._label_wrapper)
                     self._structure_changed = False
 
-                # Update the styles for the graph if there are any updates
-                for path,tc in containers_to_update.iteritems():
-                    tc.set_styles(
-                            self._selected_paths,
-                            0,self._max_depth,
-                            self.widget.items_by_url,
-                            self.widget.subgraph_shapes,
-                            self._containers)
+            # Set the dotcode to the new dotcode, parsing it is the expensive part so that happens outside the lock
+            if dotstr is not None:
+                self.set_dotcode(dotstr,zoom=False)
 
-                # Redraw
-                self.widget.Refresh()
+            # Update the styles for the graph if there are any updates
+            for path,tc in containers_to_update.items():
+                tc.set_styles(
+                        self._selected_paths,
+                        0,self._max_depth,
+                        self.widget.items_by_url,
+                        self.widget.subgraph_shapes,
+                        self._containers)
+
+            # Redraw
+            self.widget.Refresh()
 
     def set_dotcode(self, dotcode, zoom=True):
         """Set the xdot view's dotcode and refresh the display."""
+        # Parsing the dotcode is expensive, skip it if nothing changed
+        if dotcode == self._dotcode and not (zoom or self._needs_zoom):
+            return
+        self._dotcode = dotcode
+
         # Set the new dotcode
         if self.widget.set_dotcode(dotcode, None):
             self.SetTitle('Smach Viewer')
@@ -878,9 +1004,11 @@ class SmachViewerFrame(wx.Frame):
 
     def _update_tree(self):
         """Update the tree view."""
-        while self._keep_running and not rospy.is_shutdown():
+        while True:
             with self._update_cond:
-                self._update_cond.wait()
+                if not self._wait_for_update('_tree_update_pending'):
+                    break
+                self._tree_update_pending = False
                 self.tree.DeleteAllItems()
                 self._tree_nodes = {}
                 for path,tc in self._top_containers.iteritems():
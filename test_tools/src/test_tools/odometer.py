@@ -16,17 +16,141 @@ from nav_msgs.msg import Odometry
 DEFAULT_PATH = "~/odometer"
 DEFAULT_FILENAME = 'odometer'
 EXT = '.csv'
+COMPACT_EXT = '.compact' + EXT
 ROUND_LEVEL = 5
+FIELDNAMES = ['timestamp', 'distance', 'rotation', 'time']
+DATE_FORMAT = "%Y_%m_%d"
+TIMESTAMP_FORMAT = DATE_FORMAT + "_%H_%M_%S"
+
+
+def _parse_record(line):
+    """
+    Parses a line of a data file
+
+    :param line: (str) line without line ending
+    :return: dict with the record, None if the line is not a valid record
+    """
+    try:
+        row = next(csv.reader([line]))
+    except (csv.Error, StopIteration):
+        return None
+    if len(row) != len(FIELDNAMES):
+        return None
+    record = dict(zip(FIELDNAMES, row))
+    try:
+        float(record['distance'])
+        float(record['rotation'])
+        float(record['time'])
+    except ValueError:
+        return None
+    return record
+
+
+def read_last_record(filepath, block_size=4096, max_line_length=1024):
+    """
+    Reads the last valid record of a data file. Blocks are read from the end of the file, so the duration does not
+    depend on the size of the file. Invalid lines, e.g. an incomplete last line, are skipped.
+
+    :param filepath: (str) path of the data file
+    :param block_size: (int) number of bytes that are read at once
+    :param max_line_length: (int) lines that are longer are considered corrupt
+    :return: dict with the last record, None if the file contains no records
+    :raises ValueError: if the file has no header
+    """
+    header = ",".join(FIELDNAMES)
+    with open(filepath, "rb") as f:
+        # In case an empty line was written first, the header is not necessarily the first line
+        head = f.read(block_size).decode("utf-8", "replace")
+        if header not in [line.strip() for line in head.splitlines()]:
+            raise ValueError("No header found in file: {}".format(filepath))
+
+        f.seek(0, os.SEEK_END)
+        position = f.tell()
+        remainder = b""
+        while position > 0:
+            size = min(block_size, position)
+            position -= size
+            f.seek(position)
+            lines = (f.read(size) + remainder).split(b"\n")
+            # The first line may continue in the previous block
+            remainder = lines.pop(0) if position > 0 else b""
+            if len(remainder) > max_line_length:
+                remainder = b""
+
+            for line in reversed(lines):
+                line = line.decode("utf-8", "replace").strip()
+                if not line:
+                    continue
+                if line == header:
+                    return None
+                record = _parse_record(line)
+                if record:
+                    return record
+                rospy.logwarn("Skipping invalid line in {}: {}".format(filepath, line[:max_line_length]))
+    return None
+
+
+def compact_file(filepath):
+    """
+    Compacts a data file by only keeping the last record of every hour. As the records contain totals, no distance,
+    rotation or time is lost. The compacted file replaces the original one, its name ends with COMPACT_EXT.
+
+    :param filepath: (str) path of the data file
+    :return: (str) path of the compacted file
+    """
+    records = {}
+    with open(filepath, "r") as f:
+        for line in f:
+            record = _parse_record(line.strip())
+            if record:
+                records[record['timestamp'][:len("YYYY_mm_dd_HH")]] = record
+
+    compact_filepath = filepath[:-len(EXT)] + COMPACT_EXT
+    tmp_filepath = compact_filepath + ".tmp"
+    with open(tmp_filepath, "w") as f:
+        writer = csv.DictWriter(f, fieldnames=FIELDNAMES)
+        writer.writeheader()
+        writer.writerows([records[hour] for hour in sorted(records)])
+        f.flush()
+        os.fsync(f.fileno())
+    os.rename(tmp_filepath, compact_filepath)
+    os.remove(filepath)
+    return compact_filepath
+
+
+def compact_old_files(folder, filename, days, keep=None):
+    """
+    Compacts the data files that are older than a number of days
+
+    :param folder: (str) folder with the data files
+    :param filename: (str) filename of the data files, without date and extension
+    :param days: (int) files of this number of days ago or older are compacted
+    :param keep: (str) path of a file that should not be compacted, i.e. the file that is written to
+    """
+    threshold = time.strftime(DATE_FORMAT, time.localtime(time.time() - days * 24 * 3600))
+    for item in os.listdir(folder):
+        filepath = os.path.join(folder, item)
+        if not fnmatch(item, filename + "_*" + EXT) or item.endswith(COMPACT_EXT) or filepath == keep:
+            continue
+        date = item[len(filename) + 1:-len(EXT)]
+        if date <= threshold:
+            try:
+                compact_file(filepath)
+                rospy.logdebug("Compacted data file: {}".format(filepath))
+            except Exception as e:
+                rospy.logerr("Could not compact {}: {}".format(filepath, e))
 
 
 class Odometer:
     """
     Odometer logs odometry. The odometry is measured in a callback function and sampled to a data storage in sample().
-    The data is written to a csv file, which is appended with a date. This is done is write(). In shutdown(), sample() and
-    write() are called to prevent data lost. This function is called on rospy shutdown. You can activate periodic
-    writing by calling active_write() in a loop, which the maximum length of your data storage as argument.
+    The data is written to a csv file, which is appended with a date. This is done is write(). The file is kept open
+    and synced to disk periodically, a new file is started every day and files of previous days are compacted.
+    In shutdown(), sample() and write() are called to prevent data lost. This function is called on rospy shutdown.
+    You can activate periodic writing by calling active_write() in a loop, which the maximum length of your data
+    storage as argument.
     """
-    def __init__(self, path=DEFAULT_PATH, filename=DEFAULT_FILENAME):
+    def __init__(self, path=DEFAULT_PATH, filename=DEFAULT_FILENAME, fsync_period=60.0, compact_after=7):
         """
         Constructor
         In the constructor old data is retrieved, if possible. Otherwise it starts from zero.
@@ -35,19 +159,30 @@ class Odometer:
         :type path: str
         :param filename: Filename of data file. Filenames are appended with date and extension.
         :type filename: str
+        :param fsync_period: Minimal period [s] between syncs of the data file to disk
+        :type fsync_period: float
+        :param compact_after: Files of this number of days ago or older are compacted, see compact_file. If None, files
+            are not compacted
+        :type compact_after: int
         """
         if fnmatch(path, "~*"):  # if path is in home folder
             path = os.path.expanduser(path)
         path = os.path.abspath(path)  # returns abs path, also when path is already abs.
 
         hostname = socket.gethostname()
-        date = time.strftime("%Y_%m_%d")
+        date = time.strftime(DATE_FORMAT)
 
         hostfolderpath = os.path.join(os.path.expanduser(path), hostname.lower())
+        self._folder = hostfolderpath
+        self._filename = filename
         self.newfilepath = os.path.join(hostfolderpath, filename + "_" + date + EXT)
         lastfilepath = ""
 
-        self.file_has_header = False
+        self.fsync_period = fsync_period
+        self.compact_after = compact_after
+        self._file = None
+        self._writer = None
+        self._last_fsync = time.time()
 
         self.total_time = 0
         self.total_distance = 0
@@ -86,40 +221,20 @@ class Odometer:
             rospy.logdebug("No previous data file found. Starting from zero")
         else:
             rospy.logdebug("Reading from last data file: {}".format(lastfilepath))
-            with open(lastfilepath, "r") as f:
-                reader = csv.reader(f)
-                # in case an empty file is there. The first line will stay empty. Therefore the header needs to be found
-                found_header = False
-                for header in reader:
-                    if header == ['timestamp', 'distance', 'rotation', 'time']:
-                        found_header = True
-                        break
-
-                if found_header:
-                    # Iterate over all lines and get the last valid line. So it continues after an invalid line.
-                    last_row = None
-                    while True:
-                        try:
-                            last_row = next(reader)
-                        except csv.Error:
-                            pass
-                        except StopIteration:
-                            break
-                    if last_row:
-                        last_row = dict(zip(header, last_row))
-                        try:
-                            self.total_distance = float(last_row['distance'])
-                            self.total_rotation = float(last_row['rotation'])
-                            self.total_time = int(float(last_row['time']))
-                            if lastfilepath == self.newfilepath:
-                                self.file_has_header = True
-                            rospy.logdebug("Loaded data from file: {}".format(lastfilepath))
-                        except Exception as e:
-                            rospy.logerr(e)
-                            rospy.signal_shutdown("Unable to read last data. Last data is corrupt")
-                else:
-                    rospy.logerr("No header found in file: {}".format(lastfilepath))
-                    rospy.signal_shutdown("Shutdown, because last data file has no header")
+            try:
+                last_row = read_last_record(lastfilepath)
+            except ValueError as e:
+                rospy.logerr(e)
+                rospy.signal_shutdown("Shutdown, because last data file has no header")
+            else:
+                if last_row:
+                    self.total_distance = float(last_row['distance'])
+                    self.total_rotation = float(last_row['rotation'])
+                    self.total_time = int(float(last_row['time']))
+                    rospy.logdebug("Loaded data from file: {}".format(lastfilepath))
+
+        if self.compact_after is not None:
+            compact_old_files(hostfolderpath, filename, self.compact_after, keep=self.newfilepath)
 
         rospy.loginfo("Logging odometry to file: {}".format(self.newfilepath))
 
@@ -137,38 +252,75 @@ class Odometer:
         self.total_time += time_delta
         self.last_time = new_time
 
-        timestamp = time.strftime("%Y_%m_%d_%H_%M_%S")
+        timestamp = time.strftime(TIMESTAMP_FORMAT)
         dist = round(self.total_distance, ROUND_LEVEL)
         rot = round(self.total_rotation, ROUND_LEVEL)
         t = self.total_time
         self.data.append({'timestamp': timestamp, 'distance': dist, 'rotation': rot, 'time': t})
 
+    def _open(self):
+        """
+        Opens today's data file, if it is not opened yet. If the date has changed, the previous file is closed and old
+        files are compacted.
+        """
+        filepath = os.path.join(self._folder, self._filename + "_" + time.strftime(DATE_FORMAT) + EXT)
+        if self._file is not None and filepath == self.newfilepath:
+            return
+
+        self.close()
+        if filepath != self.newfilepath:
+            rospy.loginfo("Logging odometry to file: {}".format(filepath))
+            self.newfilepath = filepath
+            if self.compact_after is not None:
+                compact_old_files(self._folder, self._filename, self.compact_after, keep=self.newfilepath)
+
+        self._file = open(self.newfilepath, "a")
+        self._writer = csv.DictWriter(self._file, fieldnames=FIELDNAMES)
+        if self._file.tell() == 0:
+            rospy.logdebug("Printing header of csv file")
+            self._writer.writeheader()
+
     def write(self):
         """
-        Writing all data in self.data to the data file and closing it again. This should prevent file corruption.
+        Writing all data in self.data to the data file. The data is synced to disk if the last sync is more than
+        fsync_period ago.
 
         :return: no return
         """
-        # Create today's file if not already there
-        if os.path.exists(self.newfilepath):
-            rospy.logdebug("Today's file already exists")
-        else:
-            rospy.logdebug("First time writing in today's file")
+        try:
+            self._open()
+            if self.data:
+                rospy.logdebug("Writing data to csv file")
+                self._writer.writerows(self.data)
+                self.data = []
+
+            if time.time() - self._last_fsync >= self.fsync_period:
+                self.sync()
+        except Exception as e:
+            rospy.logerr(e)
+
+    def sync(self):
+        """
+        Flushes the data file and syncs it to disk
 
-        with open(self.newfilepath, "a", 1) as new_file:  # 1=line-buffered
-            try:
-                writer = csv.DictWriter(new_file, fieldnames=['timestamp', 'distance', 'rotation', 'time'])
-                if not self.file_has_header:
-                    rospy.logdebug("Printing header of csv file")
-                    writer.writeheader()
-                    self.file_has_header = True
-                if self.data:
-                    rospy.logdebug("Writing data to csv file")
-                    writer.writerows(self.data)
-                    self.data = []
+        :return: no return
+        """
+        if self._file is not None:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+        self._last_fsync = time.time()
 
-            except Exception as e:
-                rospy.logerr(e)
+    def close(self):
+        """
+        Syncs and closes the data file
+
+        :return: no return
+        """
+        if self._file is not None:
+            self.sync()
+            self._file.close()
+            self._file = None
+            self._writer = None
 
     def callback(self, msg):
         """
@@ -226,3 +378,4 @@ class Odometer:
         """
         self.sample()
         self.write()
+        self.close()
@@ -0,0 +1,101 @@
+#! /usr/bin/env python
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+# The data collection scripts are not part of the test_tools Python package
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src", "test_tools",
+                                "data_collection"))
+from collection import collect_files, Manifest, MANIFEST_FILE  # noqa: E402
+
+
+class TestCollection(unittest.TestCase):
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.source = os.path.join(self.path, "source")
+        self.directory = os.path.join(self.path, "collection")
+        os.makedirs(os.path.join(self.source, "a"))
+        os.makedirs(os.path.join(self.source, "b"))
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def _write(self, name, content):
+        file_name = os.path.join(self.source, name)
+        with open(file_name, "w") as f:
+            f.write(content)
+        return file_name
+
+    def _read(self, destination):
+        with open(os.path.join(self.directory, destination)) as f:
+            return f.read()
+
+    def test_collect(self):
+        """
+        Check that the files are copied and recorded in the manifest, without leaving temporary files behind
+        """
+        jobs = [(self._write("a/1.json", "one"), "hmi"), (self._write("a/2.json", "two"), "hmi")]
+        stats = collect_files(jobs, self.directory, workers=2)
+
+        self.assertEqual((stats["collected"], stats["skipped"], stats["failed"], stats["bytes"]), (2, 0, 0, 6))
+        self.assertEqual(self._read("hmi/1.json"), "one")
+        self.assertEqual(self._read("hmi/2.json"), "two")
+        self.assertEqual(sorted(os.listdir(os.path.join(self.directory, "hmi"))), ["1.json", "2.json"])
+        self.assertEqual(Manifest(self.directory).source_of("hmi/1.json"), jobs[0][0])
+
+    def test_restart(self):
+        """
+        Check that files collected before are skipped, also if the manifest ends with an incomplete line
+        """
+        jobs = [(self._write("a/1.json", "one"), "hmi")]
+        collect_files(jobs, self.directory)
+        with open(os.path.join(self.directory, MANIFEST_FILE), "a") as f:
+            f.write('{"source": "/tmp/hmi/3.j')
+
+        jobs.append((self._write("a/2.json", "two"), "hmi"))
+        stats = collect_files(jobs, self.directory)
+        self.assertEqual((stats["collected"], stats["skipped"]), (1, 1))
+        self.assertEqual(len(Manifest(self.directory)), 2)
+
+    def test_changed_mtime(self):
+        """
+        Check that a file is collected again if it changed since it was collected
+        """
+        source = self._write("a/1.json", "one")
+        collect_files([(source, "hmi")], self.directory)
+
+        self._write("a/1.json", "uno")
+        stat = os.stat(source)
+        os.utime(source, (stat.st_atime, stat.st_mtime + 10.0))
+        self.assertFalse(Manifest(self.directory).is_collected(source, stat.st_size, stat.st_mtime + 10.0))
+
+        stats = collect_files([(source, "hmi")], self.directory)
+        self.assertEqual((stats["collected"], stats["skipped"]), (1, 0))
+        self.assertEqual(self._read("hmi/1.json"), "uno")
+
+    def test_same_basename(self):
+        """
+        Check that files with the same name are collected side by side, also if one of them was collected before
+        """
+        first = self._write("a/1.json", "a")
+        second = self._write("b/1.json", "b")
+        stats = collect_files([(first, "hmi"), (second, "hmi")], self.directory, workers=2)
+        self.assertEqual(stats["collected"], 2)
+        self.assertEqual(self._read("hmi/source/a/1.json"), "a")
+        self.assertEqual(self._read("hmi/source/b/1.json"), "b")
+
+        third = self._write("1.json", "c")
+        collect_files([(third, "objects")], self.directory)
+        fourth = os.path.join(self.source, "a", "b", "1.json")
+        os.makedirs(os.path.dirname(fourth))
+        self._write("a/b/1.json", "d")
+        stats = collect_files([(third, "objects"), (fourth, "objects")], self.directory)
+        self.assertEqual((stats["collected"], stats["skipped"]), (1, 1))
+        self.assertEqual(self._read("objects/1.json"), "c")
+        self.assertEqual(self._read("objects/source/a/b/1.json"), "d")
+
+
+if __name__ == '__main__':
+    unittest.main()
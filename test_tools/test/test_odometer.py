@@ -0,0 +1,87 @@
+#! /usr/bin/env python
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from test_tools.odometer import compact_file, read_last_record, COMPACT_EXT, FIELDNAMES
+
+HEADER = ",".join(FIELDNAMES) + "\n"
+
+
+def row(hour, minute, distance):
+    return "2019_07_05_{:02d}_{:02d}_00,{},{},{}\n".format(hour, minute, distance, distance / 2.0, hour * 60 + minute)
+
+
+class TestOdometer(unittest.TestCase):
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.file = os.path.join(self.path, "odometer_2019_07_05.csv")
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def _write(self, *lines):
+        with open(self.file, "w") as f:
+            f.writelines(lines)
+
+    def test_last_record(self):
+        self._write(HEADER, row(10, 0, 1.0), row(10, 1, 2.0))
+        self.assertEqual(read_last_record(self.file)["distance"], "2.0")
+
+    def test_incomplete_last_line(self):
+        self._write(HEADER, row(10, 0, 1.0), row(10, 1, 2.0), "2019_07_05_10_02_00,3.")
+        self.assertEqual(read_last_record(self.file)["distance"], "2.0")
+
+    def test_no_records(self):
+        self._write("\n", HEADER)
+        self.assertIsNone(read_last_record(self.file))
+
+    def test_no_header(self):
+        self._write(row(10, 0, 1.0))
+        with self.assertRaises(ValueError):
+            read_last_record(self.file)
+
+    def _best_read_duration(self, repeat=10):
+        durations = []
+        for _ in range(repeat):
+            start = time.time()
+            record = read_last_record(self.file)
+            durations.append(time.time() - start)
+        return record, min(durations)
+
+    def test_startup_time(self):
+        """
+        Reading the last record of a log of several hundreds of megabytes should take as long as for a small log
+        """
+        self._write(HEADER, row(10, 0, 1.0))
+        _, small_duration = self._best_read_duration()
+
+        # Grow the log sparsely, so the test does not write hundreds of megabytes to disk
+        with open(self.file, "a") as f:
+            f.truncate(300 * 1024 * 1024)
+        with open(self.file, "a") as f:
+            f.write("\n")
+            f.writelines(row(10, minute, float(minute)) for minute in range(60))
+            f.write(row(23, 59, 12345.0))
+
+        record, large_duration = self._best_read_duration()
+
+        self.assertEqual(record["distance"], "12345.0")
+        self.assertLess(large_duration, 10 * small_duration)
+
+    def test_compact(self):
+        self._write(HEADER, row(10, 0, 1.0), row(10, 30, 2.0), row(11, 0, 3.0), row(11, 59, 4.0))
+        compacted = compact_file(self.file)
+
+        self.assertFalse(os.path.exists(self.file))
+        self.assertTrue(compacted.endswith(COMPACT_EXT))
+        with open(compacted) as f:
+            self.assertEqual([line.strip() for line in f],
+                             [line.strip() for line in [HEADER, row(10, 30, 2.0), row(11, 59, 4.0)]])
+        self.assertEqual(read_last_record(compacted)["distance"], "4.0")
+
+
+if __name__ == '__main__':
+    unittest.main()